@@ -0,0 +1,50 @@
+"""add_sync_watermarks_and_deleted_records
+
+Revision ID: 4b7e2c1d9a30
+Revises: 1cd60e94e960
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e2c1d9a30'
+down_revision: Union[str, Sequence[str], None] = '1cd60e94e960'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # updated_at is the sync watermark: set it on insert and backfill existing rows
+    op.alter_column('trades', 'updated_at', server_default=sa.text('now()'))
+    op.alter_column('trade_reflections', 'updated_at', server_default=sa.text('now()'))
+    op.execute("UPDATE trades SET updated_at = COALESCE(created_at, now()) WHERE updated_at IS NULL")
+    op.execute("UPDATE trade_reflections SET updated_at = COALESCE(created_at, now()) WHERE updated_at IS NULL")
+    op.create_index('ix_trades_user_id_updated_at', 'trades', ['user_id', 'updated_at'], unique=False)
+    op.create_index(op.f('ix_trade_reflections_updated_at'), 'trade_reflections', ['updated_at'], unique=False)
+
+    op.create_table('deleted_records',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('entity_type', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.UUID(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_deleted_records_user_id_deleted_at', 'deleted_records', ['user_id', 'deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_deleted_records_user_id_deleted_at', table_name='deleted_records')
+    op.drop_table('deleted_records')
+    op.drop_index(op.f('ix_trade_reflections_updated_at'), table_name='trade_reflections')
+    op.drop_index('ix_trades_user_id_updated_at', table_name='trades')
+    op.alter_column('trade_reflections', 'updated_at', server_default=None)
+    op.alter_column('trades', 'updated_at', server_default=None)
@@ -0,0 +1,54 @@
+"""add_trade_metrics
+
+Revision ID: a4d8e2f6b391
+Revises: f3c7a1e9b250
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d8e2f6b391'
+down_revision: Union[str, Sequence[str], None] = 'f3c7a1e9b250'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('trade_metrics',
+    sa.Column('trade_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('ticker_symbol', sa.String(length=20), nullable=False),
+    sa.Column('entered_on', sa.Date(), nullable=False),
+    sa.Column('exited_on', sa.Date(), nullable=False),
+    sa.Column('exit_price', sa.Float(), nullable=False),
+    sa.Column('bars', sa.Integer(), nullable=False),
+    sa.Column('max_favorable_excursion', sa.Float(), nullable=True),
+    sa.Column('max_adverse_excursion', sa.Float(), nullable=True),
+    sa.Column('max_favorable_excursion_pct', sa.Float(), nullable=True),
+    sa.Column('max_adverse_excursion_pct', sa.Float(), nullable=True),
+    sa.Column('capture_ratio', sa.Float(), nullable=True),
+    sa.Column('r_multiple', sa.Float(), nullable=True),
+    sa.Column('first_touch', sa.Enum('STOP_LOSS', 'TARGET_PRICE', 'SAME_BAR', name='firsttouch'), nullable=True),
+    sa.Column('first_touch_on', sa.Date(), nullable=True),
+    sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['trade_id'], ['trades.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('trade_id')
+    )
+    op.create_index('ix_trade_metrics_user_id', 'trade_metrics', ['user_id'], unique=False)
+    op.create_index('ix_trades_related_trade_id', 'trades', ['related_trade_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_trades_related_trade_id', table_name='trades')
+    op.drop_index('ix_trade_metrics_user_id', table_name='trade_metrics')
+    op.drop_table('trade_metrics')
+    sa.Enum(name='firsttouch').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,54 @@
+"""add_rationale_search_trigram_indexes
+
+Revision ID: a91d4f6e2c57
+Revises: 7c3f8e5a1b42
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a91d4f6e2c57'
+down_revision: Union[str, Sequence[str], None] = '7c3f8e5a1b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRADE_SEARCH_TEXT = (
+    "coalesce(entry_trigger, '') || ' ' || coalesce(catalyst, '') || ' ' || coalesce(rationale, '') || ' ' || coalesce(market_env, '') || ' ' || coalesce(technical_analysis, '') || ' ' || coalesce(fundamental_analysis, '') || ' ' || coalesce(competitor_analysis, '') || ' ' || coalesce(position_sizing_rationale, '')"
+)
+REFLECTION_SEARCH_TEXT = (
+    "coalesce(lessons_learned, '') || ' ' || coalesce(what_went_wrong, '') || ' ' || coalesce(what_went_well, '') || ' ' || coalesce(action_items, '')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column('trades', sa.Column(
+        'search_text', sa.Text(),
+        sa.Computed(TRADE_SEARCH_TEXT, persisted=True),
+    ))
+    op.add_column('trade_reflections', sa.Column(
+        'search_text', sa.Text(),
+        sa.Computed(REFLECTION_SEARCH_TEXT, persisted=True),
+    ))
+    op.create_index(
+        'ix_trades_search_text_trgm', 'trades', ['search_text'],
+        postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_trade_reflections_search_text_trgm', 'trade_reflections', ['search_text'],
+        postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_trade_reflections_search_text_trgm', table_name='trade_reflections')
+    op.drop_index('ix_trades_search_text_trgm', table_name='trades')
+    op.drop_column('trade_reflections', 'search_text')
+    op.drop_column('trades', 'search_text')
@@ -0,0 +1,38 @@
+"""add_trade_metrics_attribution
+
+Revision ID: b7e1c3d9f402
+Revises: a4d8e2f6b391
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e1c3d9f402'
+down_revision: Union[str, Sequence[str], None] = 'a4d8e2f6b391'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('trade_metrics', sa.Column('trade_return', sa.Float(), nullable=True))
+    op.add_column('trade_metrics', sa.Column('benchmark_return', sa.Float(), nullable=True))
+    op.add_column('trade_metrics', sa.Column('beta', sa.Float(), nullable=True))
+    op.add_column('trade_metrics', sa.Column('market_return', sa.Float(), nullable=True))
+    op.add_column('trade_metrics', sa.Column('alpha', sa.Float(), nullable=True))
+    # 計算済みの指標は派生データのため削除し、次回のバッチで要因分解を含めて再計算する
+    op.execute("DELETE FROM trade_metrics")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('trade_metrics', 'alpha')
+    op.drop_column('trade_metrics', 'market_return')
+    op.drop_column('trade_metrics', 'beta')
+    op.drop_column('trade_metrics', 'benchmark_return')
+    op.drop_column('trade_metrics', 'trade_return')
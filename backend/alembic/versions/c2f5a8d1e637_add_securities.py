@@ -0,0 +1,38 @@
+"""add_securities
+
+Revision ID: c2f5a8d1e637
+Revises: b7e1c3d9f402
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2f5a8d1e637'
+down_revision: Union[str, Sequence[str], None] = 'b7e1c3d9f402'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('securities',
+    sa.Column('code', sa.String(length=10), nullable=False),
+    sa.Column('name', sa.String(length=200), nullable=False),
+    sa.Column('name_kana', sa.String(length=200), nullable=True),
+    sa.Column('market', sa.String(length=50), nullable=True),
+    sa.Column('sector', sa.String(length=50), nullable=True),
+    sa.Column('industry', sa.String(length=50), nullable=True),
+    sa.Column('lot_size', sa.Integer(), server_default='100', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('code')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('securities')
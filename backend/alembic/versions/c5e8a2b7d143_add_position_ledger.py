@@ -0,0 +1,88 @@
+"""add_position_ledger
+
+Revision ID: c5e8a2b7d143
+Revises: a91d4f6e2c57
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e8a2b7d143'
+down_revision: Union[str, Sequence[str], None] = 'a91d4f6e2c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('positions',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('ticker_symbol', sa.String(length=20), nullable=False),
+    sa.Column('quantity', sa.Numeric(precision=20, scale=4), server_default=sa.text('0'), nullable=False),
+    sa.Column('total_amount', sa.Numeric(precision=20, scale=4), server_default=sa.text('0'), nullable=False),
+    sa.Column('realized_profit_loss', sa.Numeric(precision=20, scale=4), server_default=sa.text('0'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'ticker_symbol')
+    )
+    op.create_table('position_lots',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('ticker_symbol', sa.String(length=20), nullable=False),
+    sa.Column('entry_trade_id', sa.UUID(), nullable=False),
+    sa.Column('side', postgresql.ENUM('BUY', 'SELL', name='tradetype', create_type=False), nullable=False),
+    sa.Column('quantity', sa.Numeric(precision=20, scale=4), nullable=False),
+    sa.Column('open_quantity', sa.Numeric(precision=20, scale=4), nullable=False),
+    sa.Column('price', sa.Numeric(precision=20, scale=4), nullable=False),
+    sa.Column('realized_profit_loss', sa.Numeric(precision=20, scale=4), server_default=sa.text('0'), nullable=False),
+    sa.Column('opened_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('closed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['entry_trade_id'], ['trades.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('entry_trade_id')
+    )
+    op.create_index(
+        'ix_position_lots_open_fifo', 'position_lots', ['user_id', 'ticker_symbol', 'opened_at'],
+        unique=False, postgresql_where=sa.text('open_quantity > 0'),
+    )
+
+    # Backfill: one lot per entry trade, realized P&L from its exit trades
+    op.execute("""
+        INSERT INTO position_lots (
+            id, user_id, ticker_symbol, entry_trade_id, side, quantity, open_quantity,
+            price, realized_profit_loss, opened_at, closed_at
+        )
+        SELECT
+            gen_random_uuid(), e.user_id, e.ticker_symbol, e.id, e.trade_type, e.quantity,
+            CASE WHEN e.status = 'OPEN' THEN GREATEST(e.quantity - COALESCE(x.quantity, 0), 0) ELSE 0 END,
+            e.price, COALESCE(x.profit_loss, 0), COALESCE(e.executed_at, now()),
+            CASE WHEN e.status = 'OPEN' THEN NULL ELSE COALESCE(x.closed_at, e.executed_at, now()) END
+        FROM trades e
+        LEFT JOIN (
+            SELECT related_trade_id, SUM(quantity) AS quantity, SUM(profit_loss) AS profit_loss, MAX(executed_at) AS closed_at
+            FROM trades
+            WHERE related_trade_id IS NOT NULL
+            GROUP BY related_trade_id
+        ) x ON x.related_trade_id = e.id
+        WHERE e.related_trade_id IS NULL
+    """)
+    op.execute("""
+        INSERT INTO positions (user_id, ticker_symbol, quantity, total_amount, realized_profit_loss)
+        SELECT user_id, ticker_symbol, SUM(open_quantity), SUM(open_quantity * price), SUM(realized_profit_loss)
+        FROM position_lots
+        GROUP BY user_id, ticker_symbol
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_position_lots_open_fifo', table_name='position_lots', postgresql_where=sa.text('open_quantity > 0'))
+    op.drop_table('position_lots')
+    op.drop_table('positions')
@@ -0,0 +1,45 @@
+"""add_trade_alerts
+
+Revision ID: e2b6d9f4a718
+Revises: c5e8a2b7d143
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b6d9f4a718'
+down_revision: Union[str, Sequence[str], None] = 'c5e8a2b7d143'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('trade_alerts',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('trade_id', sa.UUID(), nullable=False),
+    sa.Column('ticker_symbol', sa.String(length=20), nullable=False),
+    sa.Column('kind', sa.Enum('STOP_LOSS', 'TARGET_PRICE', name='alertkind'), nullable=False),
+    sa.Column('threshold', sa.Numeric(precision=20, scale=4), nullable=False),
+    sa.Column('trigger_price', sa.Numeric(precision=20, scale=4), nullable=False),
+    sa.Column('triggered_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('acknowledged_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['trade_id'], ['trades.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('trade_id', 'kind', name='uq_trade_alerts_trade_id_kind')
+    )
+    op.create_index('ix_trade_alerts_user_id_triggered_at', 'trade_alerts', ['user_id', 'triggered_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_trade_alerts_user_id_triggered_at', table_name='trade_alerts')
+    op.drop_table('trade_alerts')
+    sa.Enum(name='alertkind').drop(op.get_bind(), checkfirst=True)
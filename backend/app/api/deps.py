@@ -1,5 +1,5 @@
-from typing import Generator
-from fastapi import Depends, HTTPException, status
+from typing import Generator, Optional
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
@@ -15,6 +15,8 @@ reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login"
 )
 
+STREAM_TOKEN_SCOPE = "alert-stream"
+
 def get_db() -> Generator:
     try:
         db = SessionLocal()
@@ -22,9 +24,7 @@ def get_db() -> Generator:
     finally:
         db.close()
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> User:
+def _user_from_token(db: Session, token: str, scope: Optional[str]) -> User:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[ALGORITHM]
@@ -35,7 +35,38 @@ def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
+    # 用途限定トークンは他の用途に使えない（URLに載るストリーム用トークンでAPI全体を叩かせない）
+    if token_data.scope != scope:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
     user = db.query(User).filter(User.id == token_data.sub).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
+
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
+) -> User:
+    return _user_from_token(db, token, None)
+
+def get_alert_stream_user(
+    db: Session = Depends(get_db),
+    token: str = Query(..., description="POST /alerts/stream-token で発行した短命トークン"),
+) -> User:
+    """
+    EventSource はヘッダーを付けられないため、SSEはクエリパラメータのトークンで認証する。
+    通常のアクセストークンは受け付けない（ログやブラウザ履歴に残るURLへ載せないため）
+    """
+    return _user_from_token(db, token, STREAM_TOKEN_SCOPE)
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match ヘッダーが指定のETagと一致するか（弱い比較）"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
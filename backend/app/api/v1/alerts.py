@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, List, Optional
+from uuid import UUID
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.core import security
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import alert as models
+from app.schemas import alert as schemas
+
+router = APIRouter()
+
+# triggered_at はトランザクション開始時刻のため、少し巻き戻して再取得しidで重複排除する
+STREAM_OVERLAP = timedelta(seconds=5)
+
+@router.get("/", response_model=List[schemas.AlertResponse])
+def read_alerts(
+    db: Session = Depends(deps.get_db),
+    unacknowledged_only: bool = False,
+    limit: int = Query(100, ge=1, le=500),
+    current_user = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Retrieve fired stop-loss / target-price alerts, newest first.
+    """
+    query = db.query(models.TradeAlert).filter(models.TradeAlert.user_id == current_user.id)
+    if unacknowledged_only:
+        query = query.filter(models.TradeAlert.acknowledged_at.is_(None))
+    return query.order_by(models.TradeAlert.triggered_at.desc()).limit(limit).all()
+
+@router.post("/{id}/acknowledge", response_model=schemas.AlertResponse)
+def acknowledge_alert(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: UUID,
+    current_user = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Mark an alert as read.
+    """
+    alert = db.query(models.TradeAlert).filter(
+        models.TradeAlert.id == id,
+        models.TradeAlert.user_id == current_user.id
+    ).first()
+    if not alert:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    if alert.acknowledged_at is None:
+        alert.acknowledged_at = datetime.now(timezone.utc)
+        db.commit()
+        db.refresh(alert)
+    return alert
+
+def _alerts_since(user_id: UUID, since: datetime) -> List[dict]:
+    db = SessionLocal()
+    try:
+        alerts = db.query(models.TradeAlert).filter(
+            models.TradeAlert.user_id == user_id,
+            models.TradeAlert.triggered_at > since,
+        ).order_by(models.TradeAlert.triggered_at).all()
+        return [schemas.AlertResponse.model_validate(alert).model_dump(mode="json") for alert in alerts]
+    finally:
+        db.close()
+
+@router.post("/stream-token", response_model=schemas.StreamToken)
+def create_stream_token(
+    current_user = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Issue a short-lived token for GET /stream?token=... (EventSource cannot send an
+    Authorization header). It only authenticates the alert stream; fetch a new one
+    before each (re)connect.
+    """
+    return {
+        "token": security.create_access_token(
+            data={"sub": str(current_user.id), "scope": deps.STREAM_TOKEN_SCOPE},
+            expires_delta=timedelta(seconds=settings.STREAM_TOKEN_EXPIRE_SECONDS),
+        ),
+        "expires_in": settings.STREAM_TOKEN_EXPIRE_SECONDS,
+    }
+
+@router.get("/stream")
+async def stream_alerts(
+    request: Request,
+    since: Optional[datetime] = None,
+    current_user = Depends(deps.get_alert_stream_user),
+) -> Any:
+    """
+    Server-Sent Events stream of newly fired alerts (event: alert, data: AlertResponse JSON).
+    Authenticated by the `token` query parameter from POST /stream-token; the token is
+    only checked when the connection opens. Without `since`, only alerts fired after
+    the connection opens are sent.
+    """
+    user_id = current_user.id
+    cursor = since or datetime.now(timezone.utc)
+    if cursor.tzinfo is None:
+        cursor = cursor.replace(tzinfo=timezone.utc)
+
+    async def events() -> AsyncIterator[bytes]:
+        nonlocal cursor
+        seen = set()
+        yield b"retry: 5000\n\n"
+        while not await request.is_disconnected():
+            alerts = await run_in_threadpool(_alerts_since, user_id, cursor - STREAM_OVERLAP)
+            fresh = [alert for alert in alerts if alert["id"] not in seen]
+            for alert in fresh:
+                yield b"id: " + alert["id"].encode() + b"\nevent: alert\ndata: " + orjson.dumps(alert) + b"\n\n"
+            if alerts:
+                seen = {alert["id"] for alert in alerts}
+                cursor = max(cursor, datetime.fromisoformat(alerts[-1]["triggered_at"]))
+            if not fresh:
+                yield b": keep-alive\n\n"
+            await asyncio.sleep(settings.ALERT_STREAM_POLL_SECONDS)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,124 @@
+from datetime import date, datetime
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.models.user import User
+from app.schemas.metric import AttributionGroup, TradeMetricResponse
+from app.services.analytics_service import AnalyticsService
+from app.services.portfolio_service import PortfolioService
+from app.services.response_cache import cached_user_response
+from app.services.risk_service import RiskService
+from app.services.trade_metrics_service import TradeMetricsService
+
+router = APIRouter()
+
+@router.get("/equity-curve")
+def read_equity_curve(
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+    width: int = Query(1000, ge=3, le=10000, description="返却する最大ポイント数（チャートの横幅px）"),
+    method: str = Query("lttb", pattern="^(lttb|minmax)$"),
+    format: str = Query("columnar", pattern="^(columnar|rows|binary)$"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Any:
+    """
+    累積損益（確定損益の累計）の推移を取得。履歴の長さに関わらず最大width点に間引いて返す
+
+    - columnar: {"timestamps": [epoch ms], "equity": [...]} の列形式
+    - rows: {"points": [{"timestamp", "equity"}]}
+    - binary: application/octet-stream（uint32 点数, uint32 間引き前の点数, int64[] 時刻, float64[] 損益。リトルエンディアン）
+    """
+    def compute() -> Any:
+        timestamps, equity, total = AnalyticsService.equity_curve(
+            db, current_user.id, width, method=method, since=since, until=until
+        )
+        if format == "binary":
+            return AnalyticsService.encode_binary(timestamps, equity, total)
+        if format == "rows":
+            return {
+                "total_points": total,
+                "points": [{"timestamp": t, "equity": v} for t, v in zip(timestamps.tolist(), equity.tolist())],
+            }
+        return {"total_points": total, "timestamps": timestamps.tolist(), "equity": equity.tolist()}
+
+    return cached_user_response(
+        request, current_user, "equity-curve", (width, method, format, since, until), compute,
+        media_type="application/octet-stream" if format == "binary" else "application/json",
+    )
+
+@router.get("/pnl")
+def read_pnl_by_period(
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+    period: str = Query("month", pattern="^(day|week|month|year)$"),
+) -> Any:
+    """日次/週次/月次/年次の確定損益と累計（月別・年別チャート用）"""
+    def compute() -> Any:
+        return AnalyticsService.pnl_by_period(db, current_user.id, period)
+
+    return cached_user_response(request, current_user, "pnl", period, compute)
+
+@router.get("/portfolio-history")
+def read_portfolio_history(
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+    since: Optional[date] = None,
+) -> Any:
+    """
+    保有ポジションの日次時価評価の推移（保存済み日足で評価）
+
+    nav: 確定損益 + 含み損益の累計, net_exposure / gross_exposure: 建玉の評価額（ネット / 絶対値合計）,
+    drawdown: navの過去最高値からの下落幅
+    """
+    return PortfolioService.history(db, current_user, since=since)
+
+@router.get("/risk")
+def read_portfolio_risk(
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+    lookback: int = Query(250, ge=20, le=1000, description="計算に使う日次リターンの本数"),
+    confidence: float = Query(0.95, ge=0.8, le=0.995, description="VaRの信頼水準"),
+) -> Any:
+    """
+    保有ポジションのリスク（取引日ごとにキャッシュ）
+
+    - positions: 銘柄ごとの評価額・ウェイト・年率ボラティリティ・リスク寄与（合計するとポートフォリオの日次ボラティリティ）
+    - portfolio: 年率ボラティリティ、ヒストリカルVaR / 期待ショートフォール（1日・円）、集中度（ハーフィンダール指数）
+    - correlation / covariance: tickers順の相関・共分散行列（日次リターン）
+    - correlated_pairs: 相関の絶対値がしきい値以上の銘柄ペア
+    """
+    return RiskService.report(db, current_user, lookback, confidence)
+
+@router.get("/trade-metrics", response_model=List[TradeMetricResponse])
+def read_trade_metrics(
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    決済済み取引ごとの最大順行幅(MFE)・最大逆行幅(MAE)、損切りライン/目標価格のどちらに先に到達したか、
+    日経平均に対する要因分解（trade_return = market_return + alpha）
+
+    前回の計算以降に決済（または編集）された取引だけを保存済み日足から計算してから返す
+    """
+    TradeMetricsService.refresh(db, current_user.id)
+    return TradeMetricsService.list_for_user(db, current_user.id)
+
+@router.get("/attribution", response_model=List[AttributionGroup])
+def read_attribution(
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+    group_by: str = Query("confidence_level", pattern="^(confidence_level|holding_period)$"),
+) -> Any:
+    """
+    決済済み取引の騰落率を市場要因（ベータ × 日経平均）とalphaに分解し、確信度・想定保有期間ごとに平均
+
+    確信度の高い取引が市場の上昇に乗っただけなのか、銘柄選択で勝てていたのかを比較するため
+    """
+    TradeMetricsService.refresh(db, current_user.id)
+    return TradeMetricsService.attribution(db, current_user.id, group_by)
@@ -7,6 +7,7 @@ from app.api import deps
 from app.models import reflection as models
 from app.models import trade as trade_models
 from app.schemas import reflection as schemas
+from app.services.response_cache import bump_data_version
 
 router = APIRouter()
 
@@ -44,6 +45,7 @@ def create_reflection(
         **reflection_in.model_dump()
     )
     db.add(db_reflection)
+    bump_data_version(db, current_user)
     db.commit()
     db.refresh(db_reflection)
     return db_reflection
@@ -106,6 +108,7 @@ def update_reflection(
         setattr(reflection, field, value)
 
     db.add(reflection)
+    bump_data_version(db, current_user)
     db.commit()
     db.refresh(reflection)
     return reflection
@@ -1,9 +1,29 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import Any
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from typing import Any, List
+from app import schemas, models
+from app.api import deps
+from app.services.alert_service import AlertService
+from app.services.screener_service import ScreenerService
+from app.services.securities import SecurityService
 from app.services.stock_service import StockService
 
 router = APIRouter()
 
+@router.get("/search", response_model=List[schemas.stock.SecuritySearchResult])
+async def search_securities(
+    q: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(10, ge=1, le=50),
+) -> Any:
+    """
+    銘柄コード・銘柄名（漢字/カナ/ひらがな）の入力補完。メモリ上の索引のみを検索し外部APIは呼ばない
+    （銘柄マスタの更新確認のみ一定間隔でDBに問い合わせる）
+
+    コード前方一致 → 銘柄名前方一致 → 銘柄名部分一致の順
+    """
+    index = await SecurityService.get_current_index()
+    return [entry._asdict() for entry in index.search(q, limit)]
+
 @router.get("/price/{ticker_symbol}")
 async def get_stock_price(
     ticker_symbol: str,
@@ -19,7 +39,9 @@ async def get_stock_price(
                 detail="Invalid ticker symbol format"
             )
             
-        result = StockService.get_stock_price(ticker_symbol)
+        result = await StockService.get_stock_price_async(ticker_symbol)
+        # 取得した価格で損切り・目標価格への到達を判定
+        await run_in_threadpool(AlertService.observe_price, ticker_symbol, result["price"])
         return result
     except ValueError as e:
         raise HTTPException(
@@ -32,12 +54,15 @@ async def get_stock_price(
             detail=f"Failed to fetch stock price: {str(e)}"
         )
 
-@router.get("/analysis/{ticker_symbol}")
+@router.get("/analysis/{ticker_symbol}", response_model=schemas.stock.AnalysisResponse)
 async def get_stock_analysis(
     ticker_symbol: str,
+    request: Request,
 ) -> Any:
     """
     Get analysis data (market env, technicals, fundamentals) for a given ticker symbol.
+    Responses carry an ETag and are cached per time bucket; a matching
+    If-None-Match yields 304 Not Modified.
     """
     try:
         # Basic validation for ticker symbol
@@ -47,8 +72,15 @@ async def get_stock_analysis(
                 detail="Invalid ticker symbol format"
             )
             
-        result = StockService.get_analysis_data(ticker_symbol)
-        return result
+        body, etag, max_age, complete = StockService.get_cached_analysis(ticker_symbol)
+        # 取引時間外は次の寄り付きまで（休日を挟むと数日）共有キャッシュさせるため、
+        # 取得に失敗したセクションを含む結果はブラウザ・プロキシに保存させない
+        cache_control = f"public, max-age={max_age}" if complete else "no-store"
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+        if deps.etag_matches(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        # キャッシュ済みのJSONをそのまま返す（response_modelはスキーマ定義のみ）
+        return Response(content=body, media_type="application/json", headers=headers)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -59,3 +91,20 @@ async def get_stock_analysis(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch analysis data: {str(e)}"
         )
+
+@router.post("/screener", response_model=schemas.stock.ScreenerResponse)
+def screen_stocks(
+    criteria: schemas.stock.ScreenerRequest,
+    current_user: models.user.User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    ウォッチリスト（最大1,000銘柄）に分析チェックリストと同じ判定を一括で適用し、
+    条件に合う銘柄を指定の列で並べ替えて返す
+    """
+    try:
+        return ScreenerService.get_cached_screen(criteria)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to screen stocks: {str(e)}"
+        )
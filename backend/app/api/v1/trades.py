@@ -1,125 +1,258 @@
-from typing import Any, List
+from typing import Any, Dict, List, Optional, Tuple, Union
+from datetime import datetime, timedelta
 from decimal import Decimal
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from pydantic import TypeAdapter
+from sqlalchemy import func
+from sqlalchemy.orm import Session, load_only
 from uuid import UUID
 
 from app import schemas, models
 from app.api import deps
+from app.services.alert_service import AlertService
+from app.services.ledger_service import LedgerError, LedgerService
+from app.services.response_cache import bump_data_version, cached_user_response
+from app.services.search_service import SearchService
 
 router = APIRouter()
 
-@router.get("/positions", response_model=List[schemas.trade.PositionResponse])
-def read_positions(
-    db: Session = Depends(deps.get_db),
-    current_user: models.user.User = Depends(deps.get_current_user),
-    include_closed: bool = False,
-) -> Any:
-    """ユーザーの保有ポジションを銘柄ごとに集計して取得"""
-    # Build query based on include_closed parameter
-    query = db.query(models.trade.Trade).filter(
-        models.trade.Trade.user_id == current_user.id
-    )
-    
-    # Filter by status and trade type
+# updated_at はトランザクション開始時刻のため、同期中にコミットされた変更を
+# 取りこぼさないよう since を少し巻き戻して重複を許容する（クライアントはidでupsert）
+SYNC_OVERLAP = timedelta(seconds=5)
+
+TRADE_FIELDS = tuple(schemas.trade.TradeResponse.model_fields)
+TRADE_SUMMARY_FIELDS = tuple(schemas.trade.TradeSummary.model_fields)
+
+_TRADE_LIST = TypeAdapter(List[schemas.trade.TradeResponse])
+_POSITION_LIST = TypeAdapter(List[schemas.trade.PositionResponse])
+_SEARCH_HIT_LIST = TypeAdapter(List[schemas.trade.TradeSearchHit])
+
+def _resolve_fields(view: str, fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """返却するカラムを決定（Noneなら全カラム）"""
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = set(requested) - set(TRADE_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        return tuple(dict.fromkeys(["id", *requested]))
+    if view == "summary":
+        return TRADE_SUMMARY_FIELDS
+    return None
+
+def _load_columns(columns: Tuple[str, ...]):
+    """指定カラムのみをSELECTする（根拠テキスト等をDBから転送しない）"""
+    return load_only(*(getattr(models.trade.Trade, c) for c in columns))
+
+def _project(trade: models.trade.Trade, columns: Tuple[str, ...]) -> dict:
+    return {c: getattr(trade, c) for c in columns}
+
+def _serialize_positions(positions: List[dict], columns: Optional[Tuple[str, ...]]) -> Any:
+    """summary表示ではPydantic検証を省き指定カラムのみを返す"""
+    if columns is None:
+        return _POSITION_LIST.dump_python(
+            _POSITION_LIST.validate_python(positions, from_attributes=True), mode="json"
+        )
+    for position in positions:
+        position.setdefault("profit_loss", None)
+        position["trades"] = [_project(t, columns) for t in position["trades"]]
+    return positions
+
+def _serialize_trades(trades: List[models.trade.Trade], columns: Optional[Tuple[str, ...]]) -> Any:
+    if columns is None:
+        return _TRADE_LIST.dump_python(
+            _TRADE_LIST.validate_python(trades, from_attributes=True), mode="json"
+        )
+    return [_project(t, columns) for t in trades]
+
+def _query_positions(
+    db: Session,
+    user_id: UUID,
+    include_closed: bool,
+    columns: Optional[Tuple[str, ...]],
+) -> List[dict]:
+    Trade = models.trade.Trade
+
     if include_closed:
         # For closed positions, show only entry trades (trades without related_trade_id)
         # This works for both long (BUY entry) and short (SELL entry) positions
-        query = query.filter(
-            models.trade.Trade.status == models.trade.TradeStatus.CLOSED,
-            models.trade.Trade.related_trade_id == None
+        query = db.query(Trade).filter(
+            Trade.user_id == user_id,
+            Trade.status == models.trade.TradeStatus.CLOSED,
+            Trade.related_trade_id == None
         )
-    else:
-        # For open positions, show only open trades
-        query = query.filter(models.trade.Trade.status == models.trade.TradeStatus.OPEN)
-    
-    trades = query.order_by(
-        models.trade.Trade.executed_at.desc(), 
-        models.trade.Trade.id.desc()
-    ).all()
-    
-    # For closed positions, return individual position pairs (entry + exit)
-    # For open positions, aggregate by ticker symbol
-    if include_closed:
+        if columns is not None:
+            query = query.options(_load_columns(columns))
+        entries = query.order_by(Trade.executed_at.desc(), Trade.id.desc()).all()
+
+        # Exit trades of all entries in one query (an entry has several after partial closes)
+        exits_by_entry = {}
+        if entries:
+            exit_query = db.query(Trade)
+            if columns is not None:
+                exit_query = exit_query.options(_load_columns(columns))
+            exit_trades = exit_query.filter(
+                Trade.related_trade_id.in_([entry.id for entry in entries])
+            ).order_by(Trade.executed_at, Trade.id).all()
+            for exit_trade in exit_trades:
+                exits_by_entry.setdefault(exit_trade.related_trade_id, []).append(exit_trade)
+
+        # Return individual position pairs (entry + exits)
         result = []
-        for entry_trade in trades:
-            # Find the exit trade
-            exit_trade = db.query(models.trade.Trade).filter(
-                models.trade.Trade.related_trade_id == entry_trade.id
-            ).first()
-            
-            # Create a position for this entry-exit pair
-            position_trades = [entry_trade]
+        for entry_trade in entries:
+            exits = exits_by_entry.get(entry_trade.id, [])
             profit_loss = None
-            if exit_trade:
-                position_trades.append(exit_trade)
-                profit_loss = exit_trade.profit_loss
-            
+            if exits:
+                profit_loss = sum((e.profit_loss or Decimal(0) for e in exits), Decimal(0))
             result.append({
                 "ticker_symbol": entry_trade.ticker_symbol,
                 "total_quantity": entry_trade.quantity,
                 "average_price": entry_trade.price,
                 "total_amount": entry_trade.total_amount,
                 "profit_loss": profit_loss,
-                "trades": position_trades
+                "trades": [entry_trade, *exits]
             })
         return result
     
-    # For open positions, aggregate by ticker symbol
-    positions_map = {}
-    for trade in trades:
-        symbol = trade.ticker_symbol
-        if symbol not in positions_map:
-            positions_map[symbol] = {
-                "ticker_symbol": symbol,
-                "total_quantity": Decimal(0),
-                "total_amount": Decimal(0),
-                "trades": []
-            }
-        
-        positions_map[symbol]["total_quantity"] += trade.quantity
-        positions_map[symbol]["total_amount"] += trade.total_amount
-        positions_map[symbol]["trades"].append(trade)
-        
-        # For closed positions, also include the exit trade
-        if include_closed and trade.related_trade_id is None:
-            # Find the exit trade that references this entry trade
-            exit_trade = db.query(models.trade.Trade).filter(
-                models.trade.Trade.related_trade_id == trade.id
-            ).first()
-            if exit_trade:
-                positions_map[symbol]["trades"].append(exit_trade)
+    # For open positions, read the ledger: open quantity/cost per ticker plus entry trades of open lots
+    ledger = {
+        position.ticker_symbol: position
+        for position in db.query(models.position.Position).filter(
+            models.position.Position.user_id == user_id,
+            models.position.Position.quantity > 0,
+        )
+    }
+    query = (
+        db.query(Trade)
+        .join(models.position.PositionLot, models.position.PositionLot.entry_trade_id == Trade.id)
+        .filter(
+            models.position.PositionLot.user_id == user_id,
+            models.position.PositionLot.open_quantity > 0,
+        )
+    )
+    if columns is not None:
+        query = query.options(_load_columns(columns))
+    open_trades = query.order_by(Trade.executed_at.desc(), Trade.id.desc()).all()
+
+    trades_by_symbol = {}
+    for trade in open_trades:
+        trades_by_symbol.setdefault(trade.ticker_symbol, []).append(trade)
     
     result = []
-    for symbol, data in positions_map.items():
-        avg_price = data["total_amount"] / data["total_quantity"] if data["total_quantity"] > 0 else 0
+    for symbol, trades in trades_by_symbol.items():
+        position = ledger.get(symbol)
+        if position is None:
+            continue
         result.append({
             "ticker_symbol": symbol,
-            "total_quantity": data["total_quantity"],
-            "average_price": avg_price,
-            "total_amount": data["total_amount"],
-            "trades": data["trades"]
+            "total_quantity": position.quantity,
+            "average_price": position.total_amount / position.quantity,
+            "total_amount": position.total_amount,
+            "trades": trades
         })
     
     return result
 
-@router.get("/", response_model=List[schemas.trade.TradeResponse])
+@router.get(
+    "/positions",
+    response_model=Union[List[schemas.trade.PositionResponse], List[schemas.trade.PositionSummary]],
+)
+def read_positions(
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    current_user: models.user.User = Depends(deps.get_current_user),
+    include_closed: bool = False,
+    view: str = Query("full", pattern="^(full|summary)$"),
+) -> Any:
+    """ユーザーの保有ポジションを銘柄ごとに集計して取得（view=summaryで根拠テキストを省略したPositionSummary）"""
+    columns = _resolve_fields(view, None)
+    return cached_user_response(
+        request, current_user, "positions", (include_closed, columns),
+        lambda: _serialize_positions(_query_positions(db, current_user.id, include_closed, columns), columns),
+    )
+
+@router.get(
+    "/",
+    # fields指定時は id と指定カラムのみ
+    response_model=Union[List[schemas.trade.TradeResponse], List[schemas.trade.TradeSummary], List[Dict[str, Any]]],
+)
 def read_trades(
+    request: Request,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
     current_user: models.user.User = Depends(deps.get_current_user),
+    view: str = Query("full", pattern="^(full|summary)$"),
+    fields: Optional[str] = Query(None, description="返却するカラム（カンマ区切り）"),
+) -> Any:
+    """ユーザーの全取引を取得（view=summaryで一覧用の軽量表示TradeSummary、fieldsで返却カラムを指定）"""
+    columns = _resolve_fields(view, fields)
+
+    def compute() -> Any:
+        query = db.query(models.trade.Trade)
+        if columns is not None:
+            query = query.options(_load_columns(columns))
+        trades = (
+            query
+            .filter(models.trade.Trade.user_id == current_user.id)
+            .order_by(models.trade.Trade.executed_at.desc(), models.trade.Trade.id.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+        return _serialize_trades(trades, columns)
+
+    return cached_user_response(request, current_user, "trades", (skip, limit, columns), compute)
+
+@router.get("/changes", response_model=schemas.trade.TradeChangesResponse)
+def read_trade_changes(
+    db: Session = Depends(deps.get_db),
+    current_user: models.user.User = Depends(deps.get_current_user),
+    since: Optional[datetime] = None,
 ) -> Any:
-    """ユーザーの全取引を取得"""
-    trades = (
-        db.query(models.trade.Trade)
+    """since以降に作成・更新・削除された取引と振り返りを取得（差分同期）。sinceなしは全件"""
+    watermark = db.query(func.now()).scalar()
+
+    trade_query = db.query(models.trade.Trade).filter(models.trade.Trade.user_id == current_user.id)
+    reflection_query = (
+        db.query(models.reflection.TradeReflection)
+        .join(models.trade.Trade, models.reflection.TradeReflection.trade_id == models.trade.Trade.id)
         .filter(models.trade.Trade.user_id == current_user.id)
-        .order_by(models.trade.Trade.executed_at.desc(), models.trade.Trade.id.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
     )
-    return trades
+    deleted_query = db.query(models.tombstone.DeletedRecord).filter(
+        models.tombstone.DeletedRecord.user_id == current_user.id
+    )
+    if since is not None:
+        since = since - SYNC_OVERLAP
+        trade_query = trade_query.filter(models.trade.Trade.updated_at > since)
+        reflection_query = reflection_query.filter(models.reflection.TradeReflection.updated_at > since)
+        deleted_query = deleted_query.filter(models.tombstone.DeletedRecord.deleted_at > since)
+    else:
+        # 初回同期では削除履歴は不要
+        deleted_query = deleted_query.filter(False)
+
+    return {
+        "trades": trade_query.order_by(models.trade.Trade.updated_at).all(),
+        "reflections": reflection_query.order_by(models.reflection.TradeReflection.updated_at).all(),
+        "deleted": deleted_query.order_by(models.tombstone.DeletedRecord.deleted_at).all(),
+        "watermark": watermark,
+    }
+
+@router.get("/search", response_model=List[schemas.trade.TradeSearchHit])
+def search_trades(
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    current_user: models.user.User = Depends(deps.get_current_user),
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+) -> Any:
+    """根拠・振り返りテキストを全文検索（スコア順、スニペット付き）"""
+    query = q.strip()
+
+    def compute() -> Any:
+        hits = SearchService.search(db, current_user.id, query, limit)
+        return _SEARCH_HIT_LIST.dump_python(_SEARCH_HIT_LIST.validate_python(hits), mode="json")
+
+    return cached_user_response(request, current_user, "search", (query, limit), compute)
 
 @router.post("/", response_model=schemas.trade.TradeResponse)
 def create_trade(
@@ -134,8 +267,14 @@ def create_trade(
         user_id=current_user.id
     )
     db.add(trade)
+    db.flush()
+    if trade.status == models.trade.TradeStatus.OPEN and trade.related_trade_id is None:
+        LedgerService.open_lot(db, trade)
+    bump_data_version(db, current_user)
     db.commit()
     db.refresh(trade)
+    if trade.stop_loss is not None or trade.target_price is not None:
+        AlertService.invalidate()
     return trade
 
 @router.get("/{id}", response_model=schemas.trade.TradeResponse)
@@ -170,13 +309,30 @@ def update_trade(
     if not trade:
         raise HTTPException(status_code=404, detail="Trade not found")
     
+    previous_ticker = trade.ticker_symbol
+    previous_levels = {"stop_loss": trade.stop_loss, "target_price": trade.target_price}
     update_data = trade_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(trade, field, value)
     
     db.add(trade)
+    db.flush()
+    LedgerService.sync_entry(db, trade, previous_ticker)
+    # ラインを変更したら再度アラートを発火できるようにする
+    rearmed = [
+        kind for kind, field in ((models.alert.AlertKind.STOP_LOSS, "stop_loss"), (models.alert.AlertKind.TARGET_PRICE, "target_price"))
+        if getattr(trade, field) != previous_levels[field]
+    ]
+    if rearmed:
+        db.query(models.alert.TradeAlert).filter(
+            models.alert.TradeAlert.trade_id == trade.id,
+            models.alert.TradeAlert.kind.in_(rearmed),
+        ).delete(synchronize_session=False)
+    bump_data_version(db, current_user)
     db.commit()
     db.refresh(trade)
+    if rearmed or trade.ticker_symbol != previous_ticker or "trade_type" in update_data:
+        AlertService.invalidate()
     return trade
 
 @router.delete("/{id}", response_model=schemas.trade.TradeResponse)
@@ -194,8 +350,28 @@ def delete_trade(
     if not trade:
         raise HTTPException(status_code=404, detail="Trade not found")
     
+    # 差分同期用の削除記録
+    db.add(models.tombstone.DeletedRecord(
+        user_id=current_user.id, entity_type="trade", entity_id=trade.id
+    ))
+    if trade.reflection is not None:
+        db.add(models.tombstone.DeletedRecord(
+            user_id=current_user.id, entity_type="reflection", entity_id=trade.reflection.id
+        ))
+    if trade.related_trade_id is not None:
+        # 決済取引の削除: 数量と損益をエントリーのロットに戻す
+        LedgerService.reverse_exit(db, trade)
+    else:
+        lot = LedgerService.get_lot(db, trade, for_update=True)
+        if lot is not None:
+            db.delete(lot)
     db.delete(trade)
+    db.flush()
+    LedgerService.rebuild_position(db, current_user.id, trade.ticker_symbol)
+    bump_data_version(db, current_user)
     db.commit()
+    # 削除したエントリーのラインを外す（決済の削除では再オープンしたエントリーのラインを戻す）
+    AlertService.invalidate()
     return trade
 
 @router.post("/{id}/close", response_model=schemas.trade.TradeResponse)
@@ -206,14 +382,12 @@ def settle_trade(
     trade_close: schemas.trade.TradeClose,
     current_user: models.user.User = Depends(deps.get_current_user),
 ) -> Any:
-    """保有中の取引を決済し、履歴に新しい行（売決済/買決済）を追加"""
-    from datetime import datetime
-    
+    """保有中の取引を決済し、履歴に新しい行（売決済/買決済）を追加。quantity指定で部分決済"""
     # 1. 元の取引を取得
     trade = db.query(models.trade.Trade).filter(
         models.trade.Trade.id == id,
         models.trade.Trade.user_id == current_user.id
-    ).first()
+    ).with_for_update().first()
     
     if not trade:
         raise HTTPException(status_code=404, detail="Trade not found")
@@ -221,35 +395,84 @@ def settle_trade(
     if trade.status == models.trade.TradeStatus.CLOSED:
         raise HTTPException(status_code=400, detail="Trade is already closed")
     
-    # 元の取引をクローズ済みに更新
-    trade.status = models.trade.TradeStatus.CLOSED
-    
-    # 2. 決済用の新しい取引記録を作成
-    # 買いなら売り決済、売りなら買い決済
-    exit_type = models.trade.TradeType.SELL if trade.trade_type == models.trade.TradeType.BUY else models.trade.TradeType.BUY
-    
-    # 損益計算
-    if trade.trade_type == models.trade.TradeType.BUY:
-        profit_loss = (trade_close.closing_price - trade.price) * trade.quantity
-    else:
-        profit_loss = (trade.price - trade_close.closing_price) * trade.quantity
-        
-    exit_trade = models.trade.Trade(
-        user_id=current_user.id,
-        ticker_symbol=trade.ticker_symbol,
-        trade_type=exit_type,
-        quantity=trade.quantity,
-        price=trade_close.closing_price,
-        total_amount=trade.quantity * trade_close.closing_price,
-        executed_at=trade_close.closed_at or datetime.now(),
-        status=models.trade.TradeStatus.CLOSED,
-        profit_loss=profit_loss,
-        rationale=trade_close.rationale,
-        related_trade_id=trade.id
-    )
+    # 2. ロットから決済し、決済用の新しい取引記録を作成（全量決済で元の取引はクローズ済みになる）
+    lot = LedgerService.get_or_open_lot(db, trade)
+    try:
+        exit_trade = LedgerService.close_lot(
+            db,
+            lot,
+            trade_close.quantity or lot.open_quantity,
+            trade_close.closing_price,
+            closed_at=trade_close.closed_at,
+            rationale=trade_close.rationale,
+        )
+    except LedgerError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    db.add(trade)
-    db.add(exit_trade)
+    bump_data_version(db, current_user)
     db.commit()
+    # 決済済みのエントリーのラインを監視対象から外す
+    AlertService.invalidate()
     db.refresh(exit_trade)
     return exit_trade
+
+@router.post("/positions/{ticker_symbol}/close", response_model=List[schemas.trade.TradeResponse])
+def close_position(
+    *,
+    db: Session = Depends(deps.get_db),
+    ticker_symbol: str,
+    position_close: schemas.trade.PositionClose,
+    current_user: models.user.User = Depends(deps.get_current_user),
+) -> Any:
+    """銘柄のポジションを指定数量だけ古いロットから順に（FIFO）決済"""
+    try:
+        exits = LedgerService.close_fifo(
+            db,
+            current_user.id,
+            ticker_symbol,
+            position_close.quantity,
+            position_close.closing_price,
+            side=position_close.side,
+            closed_at=position_close.closed_at,
+            rationale=position_close.rationale,
+        )
+    except LedgerError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    bump_data_version(db, current_user)
+    db.commit()
+    AlertService.invalidate()
+    for exit_trade in exits:
+        db.refresh(exit_trade)
+    return exits
+
+@router.post("/close-batch", response_model=List[schemas.trade.TradeResponse])
+def close_trades_batch(
+    *,
+    db: Session = Depends(deps.get_db),
+    batch: schemas.trade.TradeCloseBatch,
+    current_user: models.user.User = Depends(deps.get_current_user),
+) -> Any:
+    """複数の取引（または銘柄の全ロット）を1トランザクションで一括決済"""
+    try:
+        exit_ids = LedgerService.close_batch(
+            db,
+            current_user.id,
+            batch.prices,
+            closing_price=batch.closing_price,
+            trade_ids=batch.trade_ids,
+            ticker_symbol=batch.ticker_symbol,
+            closed_at=batch.closed_at,
+            rationale=batch.rationale,
+        )
+    except LedgerError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    bump_data_version(db, current_user)
+    db.commit()
+    AlertService.invalidate()
+    if not exit_ids:
+        return []
+    return db.query(models.trade.Trade).filter(models.trade.Trade.id.in_(exit_ids)).order_by(
+        models.trade.Trade.ticker_symbol, models.trade.Trade.related_trade_id
+    ).all()
@@ -0,0 +1,229 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """
+    Thread-safe in-process cache bounded by entry count.
+    Least recently used entries are evicted first; entries may also carry a TTL.
+    """
+
+    def __init__(self, maxsize: int = 1024, default_ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TieredCache:
+    """
+    Two-tier cache: an in-process LRUCache (L1) in front of an optional shared
+    Redis (L2) used by every worker and pod. Values stored in L2 are serialized
+    with msgpack, so they must be plain dict/list/str/number/bytes structures.
+
+    get_or_set() is single-flight: concurrent misses for the same key within a
+    process wait on a local lock, and across processes on a Redis lock, so only
+    one caller computes the value and everyone else reads it from the cache.
+    """
+
+    def __init__(self, namespace: str, maxsize: int = 1024, redis_client: Any = None, lock_timeout: float = 30.0):
+        self.namespace = namespace
+        self.l1 = LRUCache(maxsize=maxsize)
+        self.lock_timeout = lock_timeout
+        self._redis = redis_client
+        self._redis_resolved = redis_client is not None
+        self._key_locks: Dict[str, list] = {}
+        self._key_locks_guard = threading.Lock()
+
+    # --- L2 helpers ---
+
+    @property
+    def redis(self) -> Any:
+        if not self._redis_resolved:
+            self._redis = get_redis()
+            self._redis_resolved = True
+        return self._redis
+
+    def _l2_key(self, key: str) -> str:
+        return f"whytrade:{self.namespace}:{key}"
+
+    def _l2_get(self, key: str) -> Tuple[Any, Optional[float]]:
+        if self.redis is None:
+            return None, None
+        try:
+            pipe = self.redis.pipeline()
+            pipe.get(self._l2_key(key))
+            pipe.pttl(self._l2_key(key))
+            raw, pttl = pipe.execute()
+        except Exception as e:
+            logger.warning(f"Redis get failed for {key}: {e}")
+            return None, None
+        if raw is None:
+            return None, None
+        ttl = pttl / 1000 if pttl and pttl > 0 else None
+        return _unpackb(raw), ttl
+
+    def _l2_set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        if self.redis is None:
+            return
+        try:
+            px = max(int(ttl * 1000), 1) if ttl is not None else None
+            self.redis.set(self._l2_key(key), _packb(value), px=px)
+        except Exception as e:
+            logger.warning(f"Redis set failed for {key}: {e}")
+
+    # --- public API ---
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.l1.get(key)
+        if value is not None:
+            return value
+        value, ttl = self._l2_get(key)
+        if value is None:
+            return default
+        self.l1.set(key, value, ttl=ttl)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.l1.set(key, value, ttl=ttl)
+        self._l2_set(key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        self.l1.delete(key)
+        if self.redis is not None:
+            try:
+                self.redis.delete(self._l2_key(key))
+            except Exception as e:
+                logger.warning(f"Redis delete failed for {key}: {e}")
+
+    def get_or_set(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: Optional[float] = None,
+        ttl_for: Optional[Callable[[Any], Optional[float]]] = None,
+    ) -> Any:
+        """
+        Cached value for `key`, computing and storing it on a miss. `ttl_for`
+        picks the TTL from the computed value instead (e.g. shorter for a
+        partial result); a None value is returned but not stored.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._local_lock(key):
+            value = self.l1.get(key)
+            if value is not None:
+                return value
+            with self._distributed_lock(key):
+                value = self.get(key)
+                if value is None:
+                    value = compute()
+                    if value is not None:
+                        self.set(key, value, ttl=ttl_for(value) if ttl_for is not None else ttl)
+            return value
+
+    @contextmanager
+    def _local_lock(self, key: str) -> Iterator[None]:
+        # Reference-counted per-key locks so the table does not grow with every key ever seen
+        with self._key_locks_guard:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._key_locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._key_locks.pop(key, None)
+
+    @contextmanager
+    def _distributed_lock(self, key: str) -> Iterator[None]:
+        if self.redis is None:
+            yield
+            return
+        lock = self.redis.lock(
+            self._l2_key(f"lock:{key}"),
+            timeout=self.lock_timeout,
+            blocking_timeout=self.lock_timeout,
+        )
+        try:
+            acquired = lock.acquire()
+        except Exception as e:
+            logger.warning(f"Redis lock failed for {key}: {e}")
+            acquired = False
+        try:
+            # On timeout or Redis failure fall through and compute locally
+            yield
+        finally:
+            if acquired:
+                try:
+                    lock.release()
+                except Exception as e:
+                    logger.warning(f"Redis unlock failed for {key}: {e}")
+
+
+_redis_client: Any = None
+_redis_resolved = False
+
+
+def get_redis() -> Any:
+    """Shared Redis client for the L2 tier, or None when REDIS_URL is not configured."""
+    global _redis_client, _redis_resolved
+    if not _redis_resolved:
+        if settings.REDIS_URL:
+            import redis
+            _redis_client = redis.Redis.from_url(settings.REDIS_URL)
+        _redis_resolved = True
+    return _redis_client
+
+
+def _packb(value: Any) -> bytes:
+    import msgpack
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def _unpackb(raw: bytes) -> Any:
+    import msgpack
+    return msgpack.unpackb(raw, raw=False)
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 class Settings(BaseSettings):
     # プロジェクト情報
@@ -15,6 +15,8 @@ class Settings(BaseSettings):
     POSTGRES_USER: str = "whytrade_user"
     POSTGRES_PASSWORD: str = "whytrade_password"
     POSTGRES_DB: str = "whytrade"
+    # 起動時に create_all でテーブルを作成する（開発用。本番は Alembic を使用し False に）
+    DB_CREATE_TABLES_ON_STARTUP: bool = True
     
     @property
     def DATABASE_URL(self) -> str:
@@ -25,6 +27,72 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    STREAM_TOKEN_EXPIRE_SECONDS: int = 60  # SSE接続用トークン（URLに載せるため短命・用途限定）
+
+    # マーケットデータ設定
+    # "yfinance" (live) or "fixture" (offline replay from MARKET_DATA_FIXTURE_DIR)
+    MARKET_DATA_PROVIDER: str = "yfinance"
+    MARKET_DATA_FIXTURE_DIR: str = "fixtures/market_data"
+    # Set to record live yfinance responses in the fixture layout
+    MARKET_DATA_RECORD_DIR: Optional[str] = None
+    # 外部APIへのHTTP接続（プロセス共通のセッションでkeep-aliveを再利用）
+    MARKET_DATA_HTTP_POOL_SIZE: int = 20  # ホストあたりの保持接続数（yf.downloadのスレッド数以上）
+    MARKET_DATA_HTTP_TIMEOUT_SECONDS: float = 10.0
+    MARKET_DATA_HTTP_RETRIES: int = 3
+    MARKET_DATA_HTTP_BACKOFF_SECONDS: float = 0.5  # 再試行の間隔: 即時, 1s, 2s ...（＋ジッター）
+    MARKET_DATA_HTTP_BACKOFF_JITTER_SECONDS: float = 0.5
+    # 株価・日足の取得をイベントループ上で行う非同期クライアント（httpxが必要、yfinance利用時のみ）
+    MARKET_DATA_ASYNC: bool = False
+    MARKET_DATA_YAHOO_BASE_URL: str = "https://query1.finance.yahoo.com"
+    MARKET_DATA_ASYNC_MAX_CONNECTIONS: int = 100
+
+    # キャッシュ設定 (REDIS_URL未設定ならプロセス内キャッシュのみ)
+    REDIS_URL: Optional[str] = None
+    CACHE_LOCK_TIMEOUT_SECONDS: float = 30.0
+
+    # ユーザー単位のレスポンスキャッシュ（data_versionで無効化）
+    USER_CACHE_TTL_SECONDS: int = 600
+    USER_CACHE_MAX_ENTRIES: int = 2048
+
+    # 分析チェックリストのキャッシュ設定
+    ANALYSIS_CACHE_BUCKET_SECONDS: int = 300
+    ANALYSIS_CACHE_MAX_ENTRIES: int = 512
+    ANALYSIS_ERROR_CACHE_SECONDS: int = 30  # 取得に失敗したセクションを含む結果の保持時間（障害を全ユーザーに長く配らない）
+
+    # スクリーナー設定
+    SCREENER_MAX_TICKERS: int = 1000
+    SCREENER_FUNDAMENTALS_WORKERS: int = 8  # PER/PBR取得の並列数（銘柄ごとに1リクエスト）
+    # 日足のメモリマップキャッシュ（銘柄ごとの列指向ファイル。全ワーカーでページキャッシュを共有）
+    # 未設定ならスクリーナーは毎回1年分の履歴を取得する
+    BAR_CACHE_DIR: Optional[str] = None
+    BAR_CACHE_MAX_OPEN: int = 512  # プロセスごとに開いたままにするマップ数（1マップにつき1ファイル記述子）
+
+    # 銘柄マスタ（東証の上場銘柄一覧CSV。設定すると起動時に読み込んで検索索引を作成）
+    SECURITIES_CSV_PATH: Optional[str] = None
+    SECURITIES_INDEX_CHECK_SECONDS: int = 60  # 他のワーカー・プロセスでの銘柄マスタ更新を確認する間隔（検索時）
+
+    # 損切り・目標価格アラート
+    ALERT_POLL_INTERVAL_SECONDS: int = 60  # 監視中の銘柄の価格を取得する間隔（0で定期監視を無効化）
+    ALERT_INDEX_REFRESH_SECONDS: int = 60  # 価格ラインの索引をDBから再構築する間隔
+    ALERT_STREAM_POLL_SECONDS: float = 5.0  # SSE配信で新着アラートを確認する間隔
+
+    # 東証の取引カレンダー（祝日・年末年始は自動計算。臨時休場・半日立会のみ指定）
+    MARKET_EXTRA_HOLIDAYS: List[str] = []  # 例: ["2020-10-01"]
+    MARKET_HALF_DAYS: List[str] = []  # 前場のみの日
+
+    # 日足の保存・ポートフォリオ評価
+    BAR_REFRESH_INTERVAL_SECONDS: int = 900  # キャッシュ済みの評価履歴に新しい日足を取り込む間隔
+    PORTFOLIO_CACHE_TTL_SECONDS: int = 7 * 24 * 3600  # data_versionが変わらない限り再利用
+
+    # 取引ごとの値動き指標（MFE/MAE）
+    TRADE_METRICS_INTERVAL_SECONDS: int = 3600  # 新たに決済された取引を計算するバッチの間隔（0で無効化）
+    BENCHMARK_TICKER: str = "^N225"  # 取引の騰落率を市場要因とalphaに分解する際の指数
+    BETA_LOOKBACK_DAYS: int = 250  # ベータ推定に使う日次リターンの本数
+    BETA_MIN_OBSERVATIONS: int = 60  # これより少ない場合はベータ・alphaを計算しない
+
+    # 保有ポジションのリスク（相関・ボラティリティ・VaR）
+    RISK_CACHE_TTL_SECONDS: int = 24 * 3600  # 取引日ごとにキャッシュ（建玉が変わればdata_versionで無効化）
+    RISK_CORRELATION_THRESHOLD: float = 0.7  # この値以上の相関を持つ銘柄ペアを警告として返す
     
     class Config:
         env_file = ".env"
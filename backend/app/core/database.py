@@ -1,9 +1,11 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.metrics import instrument_engine
 
 engine = create_engine(settings.DATABASE_URL)
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -15,3 +17,19 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def init_db():
+    """テーブル作成（開発用）。本番では `alembic upgrade head` を使用する"""
+    from app import models  # noqa: F401  モデルをBaseに登録
+    with engine.begin() as conn:
+        # 全文検索のトライグラムインデックスに必要
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    Base.metadata.create_all(bind=engine)
+    # マイグレーションを経ないDBでも既存の取引をポジション台帳に反映する
+    from app.services.ledger_service import LedgerService
+    db = SessionLocal()
+    try:
+        LedgerService.backfill(db)
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,67 @@
+import logging
+import threading
+import zlib
+from typing import Any, Optional
+
+from sqlalchemy import text
+
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+
+class Leadership:
+    """
+    One-of-N election for background jobs across uvicorn workers and pods.
+
+    The first process to take a session-level Postgres advisory lock keyed by
+    the job name holds it on a dedicated connection for as long as it lives;
+    every other process's acquire() returns False, so the job runs once per
+    database instead of once per worker. When the leader exits (or its
+    connection drops) Postgres releases the lock and the next acquire()
+    elsewhere takes over.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        # pg_try_advisory_lock takes a signed bigint
+        self.key = zlib.crc32(f"whytrade:{name}".encode())
+        self._conn: Optional[Any] = None
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """True when this process is (or has just become) the leader. Blocking; call from a thread."""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.execute(text("SELECT 1"))
+                    return True
+                except Exception as e:
+                    logger.warning(f"Lost leadership of {self.name}: {e}")
+                    self._close()
+            conn = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+            try:
+                leader = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}).scalar()
+            except Exception:
+                conn.close()
+                raise
+            if not leader:
+                conn.close()
+                return False
+            logger.info(f"Leading background job {self.name}")
+            self._conn = conn
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._close()
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            try:
+                # Closing returns the connection to the pool, so unlock explicitly first
+                self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+            except Exception:
+                self._conn.invalidate()
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,234 @@
+"""
+Lightweight in-process metrics with Prometheus text exposition.
+
+Per request the middleware collects latency, SQL statement count and DB time
+(via SQLAlchemy engine events) and upstream market-data calls, exports them
+as histograms on /metrics and as a Server-Timing header on the response.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _format_labels(self, values: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, values))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        inner = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+        return "{" + inner + "}"
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for labels, value in self._values.items():
+                lines.append(f"{self.name}{self._format_labels(labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0.0] * (len(self.buckets) + 2)
+            state[index] += 1
+            state[-1] += value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for labels, state in self._values.items():
+                cumulative = 0.0
+                for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{self.name}_bucket{self._format_labels(labels, ('le', le))} {cumulative}")
+                lines.append(f"{self.name}_sum{self._format_labels(labels)} {state[-1]}")
+                lines.append(f"{self.name}_count{self._format_labels(labels)} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# --- Registry ---
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests", ["method", "route", "status"])
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency", ["method", "route"])
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+REQUEST_DB_STATEMENTS = Histogram("http_request_db_statements", "SQL statements per request", ["route"], buckets=COUNT_BUCKETS)
+REQUEST_DB_TIME = Histogram("http_request_db_duration_seconds", "Total DB time per request", ["route"])
+UPSTREAM_CALLS = Counter("market_data_calls_total", "Upstream market-data calls", ["provider", "method"])
+UPSTREAM_LATENCY = Histogram("market_data_call_duration_seconds", "Upstream market-data call latency", ["provider", "method"])
+UPSTREAM_CONNECTIONS = Counter("market_data_connections_total", "New upstream HTTP connections (handshakes)", ["scheme", "host"])
+
+REGISTRY: List[_Metric] = [
+    HTTP_REQUESTS, HTTP_LATENCY, HTTP_IN_FLIGHT,
+    REQUEST_DB_STATEMENTS, REQUEST_DB_TIME,
+    UPSTREAM_CALLS, UPSTREAM_LATENCY, UPSTREAM_CONNECTIONS,
+]
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Per-request accounting ---
+
+@dataclass
+class RequestStats:
+    db_statements: int = 0
+    db_time: float = 0.0
+    upstream_calls: int = 0
+    upstream_time: float = 0.0
+
+
+# Holds a mutable RequestStats so sync endpoints running in the threadpool
+# (which receive a copy of the context) still update the same object.
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+@contextmanager
+def track_upstream(provider: str, method: str) -> Iterator[None]:
+    """Time an upstream market-data call and attribute it to the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        UPSTREAM_CALLS.inc(provider, method)
+        UPSTREAM_LATENCY.observe(elapsed, provider, method)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.upstream_calls += 1
+            stats.upstream_time += elapsed
+
+
+def instrument_engine(engine) -> None:
+    """Count SQL statements and DB time per request via SQLAlchemy cursor events."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start_times = conn.info.get("query_start_time")
+        if not start_times:
+            return
+        elapsed = time.perf_counter() - start_times.pop()
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.db_statements += 1
+            stats.db_time += elapsed
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency, in-flight requests and the
+    DB / upstream split of each request. The split is also returned in a
+    Server-Timing header so it is visible in browser dev tools.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+        HTTP_IN_FLIGHT.inc()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total_ms = (time.perf_counter() - start) * 1000
+                server_timing = (
+                    f'db;dur={stats.db_time * 1000:.1f};desc="{stats.db_statements} queries", '
+                    f'upstream;dur={stats.upstream_time * 1000:.1f};desc="{stats.upstream_calls} calls", '
+                    f"total;dur={total_ms:.1f}"
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            HTTP_REQUESTS.inc(method, route_path, str(status_code))
+            HTTP_LATENCY.observe(elapsed, method, route_path)
+            REQUEST_DB_STATEMENTS.observe(stats.db_statements, route_path)
+            REQUEST_DB_TIME.observe(stats.db_time, route_path)
+            _request_stats.reset(token)
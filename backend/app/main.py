@@ -1,17 +1,18 @@
+import asyncio
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.core.config import settings
-from app.core.database import engine, Base
-from app.models import User, Trade, TradeReflection  # Import models to register them with Base
-from sqlalchemy import text
-
-# データベーステーブルの作成
-Base.metadata.create_all(bind=engine)
+from app.core.database import init_db
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.responses import ORJSONResponse
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=ORJSONResponse,
 )
 
 # CORS設定
@@ -21,8 +22,61 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag"],
 )
 
+# リクエスト単位の計測（レイテンシ、SQL数/DB時間、外部API呼び出し）
+app.add_middleware(MetricsMiddleware)
+
+# データベーステーブルの作成（インポート時ではなく起動時に実行）
+@app.on_event("startup")
+def create_tables():
+    if settings.DB_CREATE_TABLES_ON_STARTUP:
+        init_db()
+
+# 銘柄検索の索引（CSVが設定されていれば銘柄マスタを更新してから作成）
+@app.on_event("startup")
+def build_securities_index():
+    from app.core.database import SessionLocal
+    from app.services.securities import SecurityService
+    db = SessionLocal()
+    try:
+        if settings.SECURITIES_CSV_PATH:
+            with open(settings.SECURITIES_CSV_PATH, "rb") as f:
+                SecurityService.load_csv(db, f.read())
+        else:
+            SecurityService.build_index(db)
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"Securities index not built: {e}")
+    finally:
+        db.close()
+
+# 損切り・目標価格の監視（保有中の取引がある銘柄の価格を定期取得）
+@app.on_event("startup")
+async def start_alert_poller():
+    if settings.ALERT_POLL_INTERVAL_SECONDS > 0:
+        from app.services.alert_service import run_alert_poller
+        app.state.alert_poller = asyncio.create_task(run_alert_poller())
+
+# 決済済み取引のMFE/MAE計算（前回以降に決済された取引のみ）
+@app.on_event("startup")
+async def start_trade_metrics_job():
+    if settings.TRADE_METRICS_INTERVAL_SECONDS > 0:
+        from app.services.trade_metrics_service import run_trade_metrics_job
+        app.state.trade_metrics_job = asyncio.create_task(run_trade_metrics_job())
+
+# 非同期マーケットデータクライアントを使うイベントループを登録（ワーカースレッドの同期処理から日足を一括取得するため）
+@app.on_event("startup")
+async def bind_market_data_loop():
+    from app.services.market_data.async_client import bind_event_loop
+    bind_event_loop(asyncio.get_running_loop())
+
+# 非同期マーケットデータクライアントの接続プールを閉じる
+@app.on_event("shutdown")
+async def close_market_data_client():
+    from app.services.market_data.async_client import close_async_client
+    await close_async_client()
+
 @app.get("/")
 async def root():
     return {"message": "WhyTrade API", "version": settings.VERSION}
@@ -31,9 +85,16 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus形式のメトリクス"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # APIルーターをここに追加
-from app.api.v1 import auth, trades, reflections, stock
+from app.api.v1 import auth, trades, reflections, stock, alerts, analytics
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
 app.include_router(trades.router, prefix=f"{settings.API_V1_STR}/trades", tags=["trades"])
 app.include_router(reflections.router, prefix=f"{settings.API_V1_STR}/reflections", tags=["reflections"])
 app.include_router(stock.router, prefix=f"{settings.API_V1_STR}/stock", tags=["stock"])
+app.include_router(alerts.router, prefix=f"{settings.API_V1_STR}/alerts", tags=["alerts"])
+app.include_router(analytics.router, prefix=f"{settings.API_V1_STR}/analytics", tags=["analytics"])
@@ -1,3 +1,9 @@
 from .user import User
 from .trade import Trade
 from .reflection import TradeReflection
+from .tombstone import DeletedRecord
+from .position import Position, PositionLot
+from .alert import TradeAlert
+from .bar import DailyBar
+from .metric import TradeMetric
+from .security import Security
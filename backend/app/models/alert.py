@@ -0,0 +1,29 @@
+import uuid
+import enum
+from sqlalchemy import Column, String, ForeignKey, DateTime, Enum, Numeric, Index, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.database import Base
+
+class AlertKind(str, enum.Enum):
+    STOP_LOSS = "STOP_LOSS"
+    TARGET_PRICE = "TARGET_PRICE"
+
+class TradeAlert(Base):
+    """損切りライン・目標価格への到達アラート（取引・種類ごとに1回だけ発火）"""
+    __tablename__ = "trade_alerts"
+    __table_args__ = (
+        UniqueConstraint("trade_id", "kind", name="uq_trade_alerts_trade_id_kind"),
+        # 新着アラートの取得・SSE配信用
+        Index("ix_trade_alerts_user_id_triggered_at", "user_id", "triggered_at"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    trade_id = Column(UUID(as_uuid=True), ForeignKey("trades.id", ondelete="CASCADE"), nullable=False)
+    ticker_symbol = Column(String(20), nullable=False)
+    kind = Column(Enum(AlertKind), nullable=False)
+    threshold = Column(Numeric(precision=20, scale=4), nullable=False)  # 到達したライン
+    trigger_price = Column(Numeric(precision=20, scale=4), nullable=False)  # 発火時の価格
+    triggered_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    acknowledged_at = Column(DateTime(timezone=True), nullable=True)  # 既読日時
@@ -0,0 +1,17 @@
+from sqlalchemy import BigInteger, Column, Date, DateTime, Float, String, func
+
+from app.core.database import Base
+
+class DailyBar(Base):
+    """日足のローカル保存（ポートフォリオ評価・リスク計算で外部APIを都度呼ばないため）"""
+    __tablename__ = "daily_bars"
+
+    ticker_symbol = Column(String(20), primary_key=True)  # 取引と同じ銘柄コード（例: 7203, ^N225）
+    date = Column(Date, primary_key=True)
+    # 配列演算でそのまま使うため倍精度浮動小数で保持
+    open = Column(Float, nullable=True)
+    high = Column(Float, nullable=True)
+    low = Column(Float, nullable=True)
+    close = Column(Float, nullable=False)
+    volume = Column(BigInteger, nullable=True)
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,45 @@
+import enum
+from sqlalchemy import Column, String, ForeignKey, Date, DateTime, Enum, Float, Integer, Index, func
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.database import Base
+
+class FirstTouch(str, enum.Enum):
+    STOP_LOSS = "STOP_LOSS"
+    TARGET_PRICE = "TARGET_PRICE"
+    SAME_BAR = "SAME_BAR"  # 同じ日足で両方に到達（日足では先後を判定できない）
+
+class TradeMetric(Base):
+    """決済済みエントリー取引ごとの値動き指標（MFE/MAE等）。日足からバッチで計算する"""
+    __tablename__ = "trade_metrics"
+    __table_args__ = (
+        Index("ix_trade_metrics_user_id", "user_id"),
+    )
+
+    trade_id = Column(UUID(as_uuid=True), ForeignKey("trades.id", ondelete="CASCADE"), primary_key=True)  # エントリー取引
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    ticker_symbol = Column(String(20), nullable=False)
+    entered_on = Column(Date, nullable=False)  # エントリー日（日本時間）
+    exited_on = Column(Date, nullable=False)  # 最後の決済日（日本時間）
+    exit_price = Column(Float, nullable=False)  # 決済価格（部分決済は数量加重平均）
+    bars = Column(Integer, nullable=False)  # 保有期間中の日足の本数（エントリー日・決済日を含む）
+
+    # 保有期間中の最大順行幅・最大逆行幅（1株あたりの価格差と、エントリー価格に対する比率）
+    max_favorable_excursion = Column(Float, nullable=True)
+    max_adverse_excursion = Column(Float, nullable=True)
+    max_favorable_excursion_pct = Column(Float, nullable=True)
+    max_adverse_excursion_pct = Column(Float, nullable=True)
+    capture_ratio = Column(Float, nullable=True)  # 実現した値幅 / MFE（順行をどれだけ取れたか）
+    r_multiple = Column(Float, nullable=True)  # 実現した値幅 / 想定リスク（エントリー価格と損切りラインの差）
+
+    # 日経平均に対する要因分解: trade_return = market_return (beta × 指数騰落率) + alpha
+    trade_return = Column(Float, nullable=True)  # 取引の騰落率（ショートは下落で正）
+    benchmark_return = Column(Float, nullable=True)  # 同じ保有期間の指数騰落率（エントリー前日終値→決済日終値）
+    beta = Column(Float, nullable=True)  # エントリー前日までの日次リターンから推定したベータ
+    market_return = Column(Float, nullable=True)  # 市場要因
+    alpha = Column(Float, nullable=True)  # 銘柄選択・タイミング要因
+
+    first_touch = Column(Enum(FirstTouch), nullable=True)  # 損切りライン・目標価格のどちらに先に到達したか（未到達はNULL）
+    first_touch_on = Column(Date, nullable=True)
+
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -0,0 +1,44 @@
+import uuid
+from sqlalchemy import Column, String, ForeignKey, DateTime, Enum, Numeric, Index, func, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+
+from app.core.database import Base
+from app.models.trade import TradeType
+
+class Position(Base):
+    """銘柄ごとの保有ポジション（取引の書き込みと同一トランザクションで更新される台帳）"""
+    __tablename__ = "positions"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    ticker_symbol = Column(String(20), primary_key=True)
+    quantity = Column(Numeric(precision=20, scale=4), nullable=False, default=0, server_default=text("0"))  # 未決済数量
+    total_amount = Column(Numeric(precision=20, scale=4), nullable=False, default=0, server_default=text("0"))  # 未決済分の取得金額
+    realized_profit_loss = Column(Numeric(precision=20, scale=4), nullable=False, default=0, server_default=text("0"))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class PositionLot(Base):
+    """エントリー取引ごとのロット。部分決済はFIFOでロットから差し引く"""
+    __tablename__ = "position_lots"
+    __table_args__ = (
+        # 未決済ロットをFIFO順に取得するための部分インデックス
+        Index(
+            "ix_position_lots_open_fifo",
+            "user_id", "ticker_symbol", "opened_at",
+            postgresql_where=text("open_quantity > 0"),
+        ),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    ticker_symbol = Column(String(20), nullable=False)
+    entry_trade_id = Column(UUID(as_uuid=True), ForeignKey("trades.id", ondelete="CASCADE"), unique=True, nullable=False)
+    side = Column(Enum(TradeType), nullable=False)  # エントリーの売買区分（BUY=ロング, SELL=ショート）
+    quantity = Column(Numeric(precision=20, scale=4), nullable=False)
+    open_quantity = Column(Numeric(precision=20, scale=4), nullable=False)
+    price = Column(Numeric(precision=20, scale=4), nullable=False)
+    realized_profit_loss = Column(Numeric(precision=20, scale=4), nullable=False, default=0, server_default=text("0"))
+    opened_at = Column(DateTime(timezone=True), nullable=False)
+    closed_at = Column(DateTime(timezone=True), nullable=True)
+
+    entry_trade = relationship("Trade")
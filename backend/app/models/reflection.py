@@ -1,12 +1,24 @@
 import uuid
-from sqlalchemy import Column, String, ForeignKey, DateTime, func, Text, Integer
+from sqlalchemy import Column, Computed, String, ForeignKey, DateTime, func, Text, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
 from app.core.database import Base
+from app.models.trade import search_text_expression
+
+# 全文検索の対象となる振り返りテキスト
+SEARCH_FIELDS = ("lessons_learned", "what_went_wrong", "what_went_well", "action_items")
 
 class TradeReflection(Base):
     __tablename__ = "trade_reflections"
+    __table_args__ = (
+        Index(
+            "ix_trade_reflections_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     trade_id = Column(UUID(as_uuid=True), ForeignKey("trades.id"), unique=True, nullable=False)
@@ -17,7 +29,10 @@ class TradeReflection(Base):
     action_items = Column(Text, nullable=True)
     satisfaction_rating = Column(Integer, nullable=True) # 1-5
 
+    # 振り返りテキストを連結した検索用カラム（DBが自動生成）
+    search_text = deferred(Column(Text, Computed(search_text_expression(SEARCH_FIELDS), persisted=True)))
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
 
     trade = relationship("Trade", back_populates="reflection")
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, DateTime, Integer, String, func
+
+from app.core.database import Base
+
+class Security(Base):
+    """上場銘柄マスタ（東証の上場銘柄一覧CSVから読み込み、銘柄検索の索引に使う）"""
+    __tablename__ = "securities"
+
+    code = Column(String(10), primary_key=True)  # 証券コード（.Tなし。例: 7203, 130A）
+    name = Column(String(200), nullable=False)  # 銘柄名
+    name_kana = Column(String(200), nullable=True)  # 銘柄名（カナ）
+    market = Column(String(50), nullable=True)  # 市場・商品区分（プライム等）
+    sector = Column(String(50), nullable=True)  # 17業種区分
+    industry = Column(String(50), nullable=True)  # 33業種区分
+    lot_size = Column(Integer, nullable=False, default=100, server_default="100")  # 売買単位
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,18 @@
+import uuid
+from sqlalchemy import Column, String, ForeignKey, DateTime, Index, func
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.database import Base
+
+class DeletedRecord(Base):
+    """削除済みレコードの記録（差分同期でクライアントに削除を伝えるため）"""
+    __tablename__ = "deleted_records"
+    __table_args__ = (
+        Index("ix_deleted_records_user_id_deleted_at", "user_id", "deleted_at"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    entity_type = Column(String(20), nullable=False)  # "trade" / "reflection"
+    entity_id = Column(UUID(as_uuid=True), nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
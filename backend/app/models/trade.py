@@ -1,7 +1,7 @@
 import uuid
-from sqlalchemy import Column, String, ForeignKey, DateTime, Enum, Numeric, func, Text, Integer
+from sqlalchemy import Column, Computed, String, ForeignKey, DateTime, Enum, Numeric, func, Text, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 import enum
 
 from app.core.database import Base
@@ -14,8 +14,37 @@ class TradeStatus(str, enum.Enum):
     OPEN = "OPEN"
     CLOSED = "CLOSED"
 
+# 全文検索の対象となる根拠テキスト
+SEARCH_FIELDS = (
+    "entry_trigger",
+    "catalyst",
+    "rationale",
+    "market_env",
+    "technical_analysis",
+    "fundamental_analysis",
+    "competitor_analysis",
+    "position_sizing_rationale",
+)
+
+def search_text_expression(fields) -> str:
+    """検索用の生成カラム式（concat_wsはIMMUTABLEでないため || で連結）"""
+    return " || ' ' || ".join(f"coalesce({field}, '')" for field in fields)
+
 class Trade(Base):
     __tablename__ = "trades"
+    __table_args__ = (
+        # 差分同期 (GET /trades/changes) 用
+        Index("ix_trades_user_id_updated_at", "user_id", "updated_at"),
+        # エントリー取引から決済取引を引くため
+        Index("ix_trades_related_trade_id", "related_trade_id"),
+        # 全文検索 (GET /trades/search) 用。日本語にも使えるようトライグラムを使用
+        Index(
+            "ix_trades_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -37,7 +66,7 @@ class Trade(Base):
     rationale = Column(Text, nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Enhanced entry rationale fields
     entry_trigger = Column(Text, nullable=True)  # エントリー理由/トリガー
@@ -48,6 +77,9 @@ class Trade(Base):
     competitor_analysis = Column(Text, nullable=True)  # 競合他社との比較
     catalyst = Column(Text, nullable=True)  # カタリスト（材料）
 
+    # 根拠テキストを連結した検索用カラム（DBが自動生成、通常のSELECTでは読み込まない）
+    search_text = deferred(Column(Text, Computed(search_text_expression(SEARCH_FIELDS), persisted=True)))
+
     user = relationship("User", back_populates="trades")
     
     related_trade_id = Column(UUID(as_uuid=True), ForeignKey("trades.id"), nullable=True)
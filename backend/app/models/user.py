@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Boolean, Column, Integer, String
+from sqlalchemy import Boolean, Column, Integer, String, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.core.database import Base
@@ -12,5 +12,7 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     full_name = Column(String(100), index=True)
     is_active = Column(Boolean(), default=True)
+    # 取引・振り返りの更新ごとに加算（レスポンスキャッシュのバージョン）
+    data_version = Column(Integer, nullable=False, default=0, server_default=text("0"))
 
     trades = relationship("Trade", back_populates="user", cascade="all, delete-orphan")
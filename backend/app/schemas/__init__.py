@@ -1,2 +1,3 @@
 from .user import UserCreate, UserUpdate, UserResponse, Token, TokenPayload
-from .trade import TradeCreate, TradeUpdate, TradeResponse
+from .trade import TradeCreate, TradeUpdate, TradeResponse, TradeSummary, PositionSummary
+from .stock import ScreenerRequest, ScreenerResponse
@@ -0,0 +1,29 @@
+from typing import Optional
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+
+class AlertKind(str, Enum):
+    STOP_LOSS = "STOP_LOSS"
+    TARGET_PRICE = "TARGET_PRICE"
+
+# Properties to return via API
+class AlertResponse(BaseModel):
+    id: UUID
+    trade_id: UUID
+    ticker_symbol: str
+    kind: AlertKind
+    threshold: Decimal
+    trigger_price: Decimal
+    triggered_at: datetime
+    acknowledged_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# SSE接続用の短命トークン
+class StreamToken(BaseModel):
+    token: str
+    expires_in: int  # 秒
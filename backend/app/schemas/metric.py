@@ -0,0 +1,46 @@
+from typing import Optional
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import date, datetime
+from enum import Enum
+
+class FirstTouch(str, Enum):
+    STOP_LOSS = "STOP_LOSS"
+    TARGET_PRICE = "TARGET_PRICE"
+    SAME_BAR = "SAME_BAR"
+
+# Properties to return via API
+class TradeMetricResponse(BaseModel):
+    trade_id: UUID
+    ticker_symbol: str
+    entered_on: date
+    exited_on: date
+    exit_price: float
+    bars: int
+    max_favorable_excursion: Optional[float] = None
+    max_adverse_excursion: Optional[float] = None
+    max_favorable_excursion_pct: Optional[float] = None
+    max_adverse_excursion_pct: Optional[float] = None
+    capture_ratio: Optional[float] = None
+    r_multiple: Optional[float] = None
+    trade_return: Optional[float] = None
+    benchmark_return: Optional[float] = None
+    beta: Optional[float] = None
+    market_return: Optional[float] = None
+    alpha: Optional[float] = None
+    first_touch: Optional[FirstTouch] = None
+    first_touch_on: Optional[date] = None
+    computed_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class AttributionGroup(BaseModel):
+    """confidence_level / holding_period ごとの集計"""
+    group: Optional[str] = None  # 未入力の取引はNULL
+    trades: int
+    average_return: Optional[float] = None
+    average_market_return: Optional[float] = None
+    average_alpha: Optional[float] = None
+    average_beta: Optional[float] = None
+    positive_alpha_rate: Optional[float] = None  # alphaが正だった取引の割合
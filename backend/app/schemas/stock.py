@@ -0,0 +1,72 @@
+from typing import Literal, Optional, List, Union
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+
+ScreenerSortKey = Literal[
+    "ticker_symbol", "price", "change_pct", "sma25_gap_pct", "volume_ratio", "rsi", "per", "pbr", "dividend_yield"
+]
+
+class ScreenerRequest(BaseModel):
+    """ウォッチリストのスクリーニング条件（未指定の条件は判定しない）"""
+    tickers: List[str] = Field(..., min_length=1, max_length=settings.SCREENER_MAX_TICKERS)
+    above_sma25: Optional[bool] = None  # 日足トレンド（価格 > 25日線）
+    above_sma13w: Optional[bool] = None  # 週足トレンド（価格 > 13週線）
+    rsi_min: Optional[float] = None
+    rsi_max: Optional[float] = None
+    volume_ratio_min: Optional[float] = None  # 出来高（5日平均比）
+    per_max: Optional[float] = None
+    pbr_max: Optional[float] = None
+    dividend_yield_min: Optional[float] = None  # %
+    include_fundamentals: bool = False  # PER/PBR/配当を取得（バリュエーション条件指定時は自動で有効）
+    sort_by: ScreenerSortKey = "volume_ratio"
+    descending: bool = True
+    limit: Optional[int] = Field(None, gt=0)
+
+class ScreenerRow(BaseModel):
+    ticker_symbol: str
+    price: float
+    change_pct: Optional[float] = None
+    sma25: Optional[float] = None
+    sma75: Optional[float] = None
+    sma25_gap_pct: Optional[float] = None  # 25日線からの乖離率
+    sma13w: Optional[float] = None
+    trend: Optional[str] = None  # "Up" / "Down"（価格 vs 25日線）
+    weekly_trend: Optional[str] = None  # "Up" / "Down"（価格 vs 13週線）
+    volume_ratio: Optional[float] = None
+    rsi: Optional[float] = None
+    per: Optional[float] = None
+    pbr: Optional[float] = None
+    dividend_yield: Optional[float] = None
+
+class ScreenerResponse(BaseModel):
+    screened: int  # データを取得できた銘柄数
+    matched: int  # 条件に合致した銘柄数（limitで切り詰める前）
+    missing: List[str]  # データを取得できなかった銘柄
+    results: List[ScreenerRow]
+
+class SecuritySearchResult(BaseModel):
+    """銘柄検索（オートコンプリート）の候補"""
+    code: str
+    name: str
+    name_kana: Optional[str] = None
+    market: Optional[str] = None
+    sector: Optional[str] = None
+    industry: Optional[str] = None
+    lot_size: int
+
+class AnalysisChecklistItem(BaseModel):
+    """分析チェックリストの1項目"""
+    label: str
+    value: Union[float, str, None] = None  # 数値、トレンドは "Up" / "Down"、取得失敗は "Error"
+    text: str  # 説明と「💡」以降のアドバイス
+    is_met: bool = False
+    url: Optional[str] = None  # 参照先（市場コンセンサスなど）
+
+class AnalysisChecklist(BaseModel):
+    market: List[AnalysisChecklistItem]
+    technical: List[AnalysisChecklistItem]
+    fundamental: List[AnalysisChecklistItem]
+
+class AnalysisResponse(BaseModel):
+    checklist: AnalysisChecklist
@@ -1,10 +1,12 @@
-from typing import Optional, List
-from pydantic import BaseModel, Field
+from typing import Dict, Optional, List
+from pydantic import BaseModel, Field, model_validator
 from uuid import UUID
 from datetime import datetime
 from decimal import Decimal
 from enum import Enum
 
+from app.schemas.reflection import ReflectionResponse
+
 class TradeType(str, Enum):
     BUY = "BUY"
     SELL = "SELL"
@@ -84,6 +86,22 @@ class TradeResponse(TradeBase):
     class Config:
         from_attributes = True
 
+class TradeSummary(BaseModel):
+    """一覧表示用の軽量な取引（根拠テキストを含まない）"""
+    id: UUID
+    ticker_symbol: str
+    trade_type: TradeType
+    quantity: Decimal
+    price: Decimal
+    total_amount: Decimal
+    executed_at: datetime
+    status: TradeStatus
+    profit_loss: Optional[Decimal] = None
+    related_trade_id: Optional[UUID] = None
+
+    class Config:
+        from_attributes = True
+
 class PositionResponse(BaseModel):
     ticker_symbol: str
     total_quantity: Decimal
@@ -95,7 +113,66 @@ class PositionResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class PositionSummary(BaseModel):
+    ticker_symbol: str
+    total_quantity: Decimal
+    average_price: Decimal
+    total_amount: Decimal
+    profit_loss: Optional[Decimal] = None
+    trades: List[TradeSummary]
+
+class DeletedRecordResponse(BaseModel):
+    entity_type: str
+    entity_id: UUID
+    deleted_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class TradeChangesResponse(BaseModel):
+    """差分同期のレスポンス。次回は watermark を since に指定する"""
+    trades: List[TradeResponse]
+    reflections: List[ReflectionResponse]
+    deleted: List[DeletedRecordResponse]
+    watermark: datetime
+
+class TradeSearchHit(BaseModel):
+    trade_id: UUID
+    ticker_symbol: str
+    trade_type: TradeType
+    executed_at: datetime
+    source: str  # "trade" / "reflection"
+    field: str
+    snippet: str
+    score: float
+
 class TradeClose(BaseModel):
     closing_price: Decimal
     closed_at: Optional[datetime] = None
     rationale: Optional[str] = None
+    quantity: Optional[Decimal] = Field(None, gt=0)  # 部分決済する数量（省略時は全量）
+
+class PositionClose(BaseModel):
+    """銘柄単位の決済（古いロットから順に決済）"""
+    quantity: Decimal = Field(..., gt=0)
+    closing_price: Decimal
+    side: Optional[TradeType] = None  # ロング(BUY)/ショート(SELL)が混在する場合に指定
+    closed_at: Optional[datetime] = None
+    rationale: Optional[str] = None
+
+class TradeCloseBatch(BaseModel):
+    """複数取引の一括決済（trade_ids または ticker_symbol のどちらかを指定）"""
+    trade_ids: Optional[List[UUID]] = Field(None, min_length=1, max_length=1000)
+    ticker_symbol: Optional[str] = None  # 指定銘柄の未決済取引をすべて決済
+    closing_price: Optional[Decimal] = None  # 全銘柄共通の決済価格
+    prices: Dict[str, Decimal] = {}  # 銘柄ごとの決済価格（closing_priceより優先）
+    closed_at: Optional[datetime] = None
+    rationale: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if (self.trade_ids is None) == (self.ticker_symbol is None):
+            raise ValueError("Specify either trade_ids or ticker_symbol")
+        if self.closing_price is None and not self.prices:
+            raise ValueError("Specify closing_price or prices")
+        return self
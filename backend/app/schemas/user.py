@@ -31,3 +31,4 @@ class Token(BaseModel):
 
 class TokenPayload(BaseModel):
     sub: Optional[str] = None
+    scope: Optional[str] = None  # 用途限定トークン（例: "alert-stream"）。通常のアクセストークンはNone
@@ -0,0 +1,270 @@
+import asyncio
+import logging
+import threading
+import time
+from bisect import bisect_left
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.leader import Leadership
+from app.models.alert import AlertKind, TradeAlert
+from app.models.trade import Trade, TradeStatus, TradeType
+from app.services.market_clock import MarketClock
+from app.services.market_data import get_market_data_provider
+from app.services.market_data.async_client import AsyncYahooClient, get_async_client
+from app.services.securities import normalize_ticker, upstream_symbol
+
+logger = logging.getLogger(__name__)
+
+
+class AlertLevel(NamedTuple):
+    trade_id: UUID
+    user_id: UUID
+    ticker_symbol: str
+    kind: AlertKind
+    threshold: Decimal
+
+
+class _Book:
+    """Levels sorted by key; a level is breached once `key >= x`, so breaches are always a suffix."""
+
+    __slots__ = ("keys", "levels")
+
+    def __init__(self, entries: List[Tuple[float, AlertLevel]]):
+        entries.sort(key=lambda entry: entry[0])
+        self.keys = [key for key, _ in entries]
+        self.levels = [level for _, level in entries]
+
+    def pop_from(self, x: float) -> List[AlertLevel]:
+        i = bisect_left(self.keys, x)
+        if i == len(self.keys):
+            return []
+        breached = self.levels[i:]
+        del self.keys[i:]
+        del self.levels[i:]
+        return breached
+
+
+class PriceLevelIndex:
+    """
+    Stop-loss / target levels of OPEN trades, per symbol.
+
+    Each symbol has two books: levels hit when the price falls to them (long
+    stops, short targets) keyed by the level, and levels hit when the price
+    rises to them (long targets, short stops) keyed by the negated level.
+    A tick is one binary search per book plus the breached entries, which
+    are removed so every level fires at most once per index build.
+    """
+
+    def __init__(self, levels: List[AlertLevel], sides: Dict[UUID, TradeType]):
+        falling: Dict[str, List[Tuple[float, AlertLevel]]] = {}
+        rising: Dict[str, List[Tuple[float, AlertLevel]]] = {}
+        for level in levels:
+            long = sides[level.trade_id] == TradeType.BUY
+            fires_on_fall = long == (level.kind == AlertKind.STOP_LOSS)
+            key = normalize_ticker(level.ticker_symbol)
+            if fires_on_fall:
+                falling.setdefault(key, []).append((float(level.threshold), level))
+            else:
+                rising.setdefault(key, []).append((-float(level.threshold), level))
+        self._falling = {key: _Book(entries) for key, entries in falling.items()}
+        self._rising = {key: _Book(entries) for key, entries in rising.items()}
+
+    def symbols(self) -> List[str]:
+        return sorted(set(self._falling) | set(self._rising))
+
+    def pop_breached(self, ticker_symbol: str, price: float) -> List[AlertLevel]:
+        key = normalize_ticker(ticker_symbol)
+        breached = []
+        if key in self._falling:
+            breached += self._falling[key].pop_from(price)  # price <= level
+        if key in self._rising:
+            breached += self._rising[key].pop_from(-price)  # price >= level
+        return breached
+
+
+_lock = threading.Lock()
+_index: Optional[PriceLevelIndex] = None
+_built_at = 0.0
+
+
+class AlertService:
+    @staticmethod
+    def build_index(db: Session) -> PriceLevelIndex:
+        """Load the levels of all OPEN entry trades that have not fired yet."""
+        trades = db.query(
+            Trade.id, Trade.user_id, Trade.ticker_symbol, Trade.trade_type, Trade.stop_loss, Trade.target_price,
+        ).filter(
+            Trade.related_trade_id.is_(None),
+            Trade.status == TradeStatus.OPEN,
+            (Trade.stop_loss.isnot(None)) | (Trade.target_price.isnot(None)),
+        ).all()
+        fired = set(
+            db.query(TradeAlert.trade_id, TradeAlert.kind)
+            .join(Trade, Trade.id == TradeAlert.trade_id)
+            .filter(Trade.status == TradeStatus.OPEN)
+            .all()
+        )
+
+        levels = []
+        for trade in trades:
+            for kind, threshold in ((AlertKind.STOP_LOSS, trade.stop_loss), (AlertKind.TARGET_PRICE, trade.target_price)):
+                if threshold is not None and (trade.id, kind) not in fired:
+                    levels.append(AlertLevel(trade.id, trade.user_id, trade.ticker_symbol, kind, threshold))
+        return PriceLevelIndex(levels, {trade.id: trade.trade_type for trade in trades})
+
+    @staticmethod
+    def invalidate() -> None:
+        """Rebuild the index on the next tick (call after stop/target levels change)."""
+        global _index
+        with _lock:
+            _index = None
+
+    @staticmethod
+    def _get_index(db: Session) -> PriceLevelIndex:
+        global _index, _built_at
+        if _index is None or time.monotonic() - _built_at > settings.ALERT_INDEX_REFRESH_SECONDS:
+            _index = AlertService.build_index(db)
+            _built_at = time.monotonic()
+        return _index
+
+    @staticmethod
+    def check_price(db: Session, ticker_symbol: str, price: float) -> List[TradeAlert]:
+        """Record alerts for every level breached by `price`. Returns the new alerts."""
+        with _lock:
+            breached = AlertService._get_index(db).pop_breached(ticker_symbol, price)
+        if not breached:
+            return []
+        return AlertService._record(db, breached, price)
+
+    @staticmethod
+    def _record(db: Session, breached: List[AlertLevel], price: float) -> List[TradeAlert]:
+        # The index may be older than the trades (closed, edited, or fired by another worker)
+        current = {
+            row.id: row
+            for row in db.query(Trade.id, Trade.status, Trade.stop_loss, Trade.target_price).filter(
+                Trade.id.in_({level.trade_id for level in breached})
+            )
+        }
+        rows = []
+        for level in breached:
+            trade = current.get(level.trade_id)
+            if trade is None or trade.status != TradeStatus.OPEN:
+                continue
+            threshold = trade.stop_loss if level.kind == AlertKind.STOP_LOSS else trade.target_price
+            if threshold != level.threshold:
+                continue
+            rows.append({
+                "user_id": level.user_id,
+                "trade_id": level.trade_id,
+                "ticker_symbol": level.ticker_symbol,
+                "kind": level.kind,
+                "threshold": level.threshold,
+                "trigger_price": Decimal(str(price)),
+            })
+        if not rows:
+            return []
+
+        inserted = db.execute(
+            pg_insert(TradeAlert)
+            .values(rows)
+            .on_conflict_do_nothing(constraint="uq_trade_alerts_trade_id_kind")
+            .returning(TradeAlert.id)
+        ).scalars().all()
+        db.commit()
+        if not inserted:
+            return []
+        alerts = db.query(TradeAlert).filter(TradeAlert.id.in_(inserted)).all()
+        for alert in alerts:
+            logger.info(f"Alert {alert.kind.value} fired for trade {alert.trade_id} ({alert.ticker_symbol} @ {price})")
+        return alerts
+
+    @staticmethod
+    def observe_price(ticker_symbol: str, price: float) -> None:
+        """Feed a quote fetched elsewhere (e.g. the price endpoint) into the engine; never raises."""
+        db = SessionLocal()
+        try:
+            AlertService.check_price(db, ticker_symbol, float(price))
+        except Exception as e:
+            logger.warning(f"Alert check failed for {ticker_symbol}: {e}")
+        finally:
+            db.close()
+
+    @staticmethod
+    def monitored_symbols() -> List[str]:
+        db = SessionLocal()
+        try:
+            with _lock:
+                return list(AlertService._get_index(db).symbols())
+        finally:
+            db.close()
+
+    @staticmethod
+    def check_prices(prices: Dict[str, float]) -> int:
+        """Check quotes fetched in bulk ({symbol: price}). Returns the number of alerts fired."""
+        db = SessionLocal()
+        try:
+            return sum(len(AlertService.check_price(db, symbol, price)) for symbol, price in prices.items())
+        finally:
+            db.close()
+
+    @staticmethod
+    def poll_once() -> int:
+        """Fetch a quote for every monitored symbol and check it. Returns the number of alerts fired."""
+        provider = get_market_data_provider()
+        prices = {}
+        for symbol in AlertService.monitored_symbols():
+            upstream = upstream_symbol(symbol)
+            try:
+                price = provider.get_quote(upstream).last_price
+            except Exception as e:
+                logger.warning(f"Alert poll: failed to fetch quote for {upstream}: {e}")
+                continue
+            if price:
+                prices[symbol] = float(price)
+        return AlertService.check_prices(prices)
+
+    @staticmethod
+    async def poll_once_async(client: AsyncYahooClient) -> int:
+        """poll_once with every quote requested concurrently on the event loop."""
+        symbols = await asyncio.to_thread(AlertService.monitored_symbols)
+        quotes = await client.get_quotes([upstream_symbol(symbol) for symbol in symbols])
+        prices = {
+            symbol: float(quote.last_price)
+            for symbol in symbols
+            if (quote := quotes.get(upstream_symbol(symbol))) is not None and quote.last_price
+        }
+        return await asyncio.to_thread(AlertService.check_prices, prices)
+
+
+async def run_alert_poller() -> None:
+    """
+    Background task: poll quotes for monitored symbols every
+    ALERT_POLL_INTERVAL_SECONDS while a session is open. Every worker starts
+    it, but only the elected leader polls, so upstream calls do not grow with
+    the worker count. Outside sessions (lunch, nights, holidays) quotes do
+    not move, so it sleeps until the next open instead.
+    """
+    loop = asyncio.get_running_loop()
+    leadership = Leadership("alert-poller")
+    while True:
+        await asyncio.sleep(settings.ALERT_POLL_INTERVAL_SECONDS)
+        if not MarketClock.state().is_open:
+            await asyncio.sleep(MarketClock.seconds_until_open())
+            continue
+        try:
+            if not await loop.run_in_executor(None, leadership.acquire):
+                continue
+            client = get_async_client()
+            if client is not None:
+                await AlertService.poll_once_async(client)
+            else:
+                await loop.run_in_executor(None, AlertService.poll_once)
+        except Exception as e:
+            logger.error(f"Alert poll failed: {e}")
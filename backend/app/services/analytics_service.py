@@ -0,0 +1,126 @@
+import logging
+import struct
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import BigInteger, Float, cast, func, literal_column
+from sqlalchemy.orm import Session
+
+from app.models.trade import Trade
+
+if TYPE_CHECKING:
+    # numpy is only needed once a chart is requested; keep it off the import path
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Grouping time zone for period charts (TSE trading days)
+MARKET_TIMEZONE = "Asia/Tokyo"
+PERIODS = ("day", "week", "month", "year")
+
+
+def _realized(user_id: UUID):
+    """Rows that realize P&L (exit trades; profit_loss is only set when a position is closed)."""
+    return (Trade.user_id == user_id, Trade.profit_loss.isnot(None))
+
+
+class AnalyticsService:
+    @staticmethod
+    def equity_series(
+        db: Session,
+        user_id: UUID,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Cumulative realized P&L after every closing trade, as (epoch ms, equity) arrays.
+        The running sum is a window function in SQL; only two numeric columns cross the wire.
+        """
+        import numpy as np
+
+        filters = list(_realized(user_id))
+        if until is not None:
+            filters.append(Trade.executed_at <= until)
+        series = (
+            db.query(
+                cast(func.extract("epoch", Trade.executed_at) * 1000, BigInteger).label("ts"),
+                Trade.executed_at.label("executed_at"),
+                Trade.id.label("id"),
+                cast(
+                    func.sum(Trade.profit_loss).over(order_by=(Trade.executed_at, Trade.id)),
+                    Float,
+                ).label("equity"),
+            )
+            .filter(*filters)
+            .subquery()
+        )
+        query = db.query(series.c.ts, series.c.equity)
+        if since is not None:
+            # Filter after the window so the curve keeps P&L realized before `since`
+            query = query.filter(series.c.executed_at >= since)
+        rows = query.order_by(series.c.executed_at, series.c.id).all()
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=float)
+        timestamps, equity = zip(*rows)
+        return np.asarray(timestamps, dtype=np.int64), np.asarray(equity, dtype=float)
+
+    @staticmethod
+    def equity_curve(
+        db: Session,
+        user_id: UUID,
+        width: int,
+        method: str = "lttb",
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Tuple["np.ndarray", "np.ndarray", int]:
+        """Equity series downsampled to at most `width` points. Returns (timestamps, equity, total points)."""
+        from app.services import downsample
+
+        timestamps, equity = AnalyticsService.equity_series(db, user_id, since, until)
+        if method == "minmax":
+            keep = downsample.minmax(equity, width)
+        else:
+            keep = downsample.lttb(timestamps, equity, width)
+        return timestamps[keep], equity[keep], len(timestamps)
+
+    @staticmethod
+    def encode_binary(timestamps: "np.ndarray", equity: "np.ndarray", total_points: int) -> bytes:
+        """
+        Little-endian layout: uint32 point count, uint32 total points before downsampling,
+        then count int64 epoch-ms timestamps, then count float64 equity values.
+        """
+        header = struct.pack("<II", len(timestamps), total_points)
+        return header + timestamps.astype("<i8").tobytes() + equity.astype("<f8").tobytes()
+
+    @staticmethod
+    def pnl_by_period(db: Session, user_id: UUID, period: str) -> List[Dict[str, Any]]:
+        """Realized P&L per day/week/month/year (JST) with the running total, aggregated in SQL."""
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period: {period}")
+        # Rendered inline (not a bind parameter) so SELECT and GROUP BY use the identical expression
+        bucket = func.date_trunc(literal_column(f"'{period}'"), func.timezone(MARKET_TIMEZONE, Trade.executed_at)).label("period")
+        profit_loss = func.sum(Trade.profit_loss)
+        rows = (
+            db.query(
+                bucket,
+                profit_loss.label("profit_loss"),
+                func.count(Trade.id).label("trades"),
+                func.count(Trade.id).filter(Trade.profit_loss > 0).label("wins"),
+                func.sum(profit_loss).over(order_by=bucket).label("cumulative_profit_loss"),
+            )
+            .filter(*_realized(user_id))
+            .group_by(bucket)
+            .order_by(bucket)
+            .all()
+        )
+        return [
+            {
+                "period": row.period.date().isoformat(),
+                "profit_loss": row.profit_loss,
+                "trades": row.trades,
+                "wins": row.wins,
+                "cumulative_profit_loss": row.cumulative_profit_loss,
+            }
+            for row in rows
+        ]
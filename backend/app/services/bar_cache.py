@@ -0,0 +1,188 @@
+"""
+Memory-mapped columnar copy of the daily bars.
+
+Each symbol's bars are one .npy file holding a (fields x bars) float64
+array, rows DAY (days since 1970-01-01), OPEN, HIGH, LOW, CLOSE, VOLUME,
+opened with numpy's mmap_mode="r". A field is one contiguous row, so the
+last N closes of a symbol are a view into the OS page cache: no query, no
+parsing, no DataFrame, no copy, and every worker process maps the same
+pages instead of holding its own copy of the history.
+
+Files are derived from daily_bars (the source of truth) and rewritten
+whenever a symbol's stored bars change: a different bar count, or a newer
+fetched_at, which also catches past bars re-fetched after a split or
+dividend adjustment. The file's mtime is set to the fetched_at it was
+written from, so the comparison needs no side file. A rewrite goes to a
+temporary file renamed over the old one, so a reader that already mapped
+the old file keeps a consistent snapshot and the next lookup maps the new
+one.
+"""
+import logging
+import os
+import re
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.bar_store import BarStore
+from app.services.securities import normalize_ticker
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("day", "open", "high", "low", "close", "volume")
+DAY, OPEN, HIGH, LOW, CLOSE, VOLUME = range(len(FIELDS))
+
+_EPOCH = date(1970, 1, 1)
+_UTC_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _filename(key: str) -> str:
+    # Codes are file-safe; escape index/FX punctuation (^N225, USDJPY=X) reversibly
+    return re.sub(r"[^0-9A-Za-z]", lambda m: f"_{ord(m.group()):02x}", key) + ".npy"
+
+
+def _stamp(fetched_at: Optional[datetime]) -> int:
+    """fetched_at as the nanosecond mtime its file carries."""
+    return 0 if fetched_at is None else (fetched_at - _UTC_EPOCH) // timedelta(microseconds=1) * 1000
+
+
+@lru_cache(maxsize=settings.BAR_CACHE_MAX_OPEN)
+def _map(path: str, version: tuple) -> "np.ndarray":
+    """Read-only mapping of one file version; a rewritten file is a new inode and is mapped anew."""
+    import numpy as np
+
+    return np.load(path, mmap_mode="r")
+
+
+def stack(series: Sequence[Optional["np.ndarray"]], rows: Optional[int] = None) -> "np.ndarray":
+    """
+    (rows x symbols) matrix of each series' last `rows` values, right-aligned
+    and NaN-padded at the top, i.e. what indicators.right_align produces;
+    None is an all-NaN column. This copy is the only one a screen makes.
+    """
+    import numpy as np
+
+    rows = max((len(values) for values in series if values is not None), default=0) if rows is None else rows
+    matrix = np.full((rows, len(series)), np.nan)
+    for col, values in enumerate(series):
+        if values is not None and len(values) and rows:
+            tail = values[-rows:]
+            matrix[rows - len(tail):, col] = tail
+    return matrix
+
+
+def weekly_last(days: "np.ndarray", values: "np.ndarray") -> "np.ndarray":
+    """Last value of each Saturday-to-Friday week (resample("W-FRI").last() on one series)."""
+    import numpy as np
+
+    if not len(days):
+        return values[:0]
+    # 1970-01-01 was a Thursday, so (day + 5) // 7 changes on Saturdays
+    week = (days.astype(np.int64) + 5) // 7
+    ends = np.append(week[1:] != week[:-1], True)
+    return values[ends]
+
+
+class BarCache:
+    @staticmethod
+    def path(key: str) -> str:
+        return os.path.join(settings.BAR_CACHE_DIR, _filename(key))
+
+    @staticmethod
+    def load(symbol: str) -> Optional["np.ndarray"]:
+        """The (fields x bars) mapping for a symbol, None when it has no file."""
+        path = BarCache.path(normalize_ticker(symbol))
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return _map(path, (stat.st_ino, stat.st_mtime_ns))
+
+    @staticmethod
+    def _version(key: str) -> Optional[tuple]:
+        """(bar count, stamp) of a symbol's file, None when it has none."""
+        path = BarCache.path(key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return _map(path, (stat.st_ino, stat.st_mtime_ns)).shape[1], stat.st_mtime_ns
+
+    @staticmethod
+    def _write(key: str, bars: "np.ndarray", stamp: int) -> None:
+        import numpy as np
+
+        directory = settings.BAR_CACHE_DIR
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".", suffix=".npy.tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.ascontiguousarray(bars, dtype=np.float64))
+            os.utime(tmp, ns=(stamp, stamp))
+            os.replace(tmp, BarCache.path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @staticmethod
+    def sync(db: Session, symbols: Iterable[str]) -> int:
+        """
+        Rewrite the files of symbols whose bar count or latest fetched_at
+        differs from daily_bars. Returns files written.
+        """
+        import numpy as np
+
+        keys = sorted({normalize_ticker(symbol) for symbol in symbols})
+        # Read before the bars: a refresh committed in between leaves an older stamp, so the next sync rewrites again
+        versions = {
+            key: (count, _stamp(fetched_at)) for key, (count, fetched_at) in BarStore.stored_versions(db, keys).items()
+        }
+        stale = [key for key in keys if key in versions and BarCache._version(key) != versions[key]]
+        if not stale:
+            return 0
+
+        os.makedirs(settings.BAR_CACHE_DIR, exist_ok=True)
+        days, matrices = BarStore.load_fields(db, stale, FIELDS[1:])
+        for col, key in enumerate(stale):
+            present = ~np.isnan(matrices["close"][:, col])
+            bars = np.vstack([days[present]] + [matrices[field][present, col] for field in FIELDS[1:]])
+            BarCache._write(key, bars, versions[key][1])
+        logger.info(f"Bar cache: wrote {len(stale)} symbols")
+        return len(stale)
+
+    @staticmethod
+    def ensure(symbols: Sequence[str], start: date) -> Dict[str, "np.ndarray"]:
+        """
+        Mappings for `symbols` with bars since `start`: missing sessions are
+        fetched into daily_bars first (one batch call per gap size) and the
+        changed files rewritten. Symbols without any bars are omitted.
+        """
+        keys = [normalize_ticker(symbol) for symbol in symbols]
+        db = SessionLocal()
+        try:
+            try:
+                BarStore.refresh(db, keys, start)
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Bar refresh failed, using stored bars only: {e}")
+            BarCache.sync(db, keys)
+        finally:
+            db.close()
+        mapped = {key: BarCache.load(key) for key in keys}
+        return {key: bars for key, bars in mapped.items() if bars is not None}
+
+    @staticmethod
+    def window(bars: "np.ndarray", field: int, start: date) -> "np.ndarray":
+        """Zero-copy view of one field from `start` on."""
+        import numpy as np
+
+        first = int(np.searchsorted(bars[DAY], (start - _EPOCH).days))
+        return bars[field, first:]
+
@@ -0,0 +1,228 @@
+import logging
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.bar import DailyBar
+from app.services.market_clock import MarketClock
+from app.services.market_data import get_history_batch
+from app.services.securities import normalize_ticker, upstream_symbol
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MARKET_TIMEZONE = "Asia/Tokyo"
+
+# SQL per loadable field; bars without open/high/low (some indices) use the close
+_FIELD_EXPRESSIONS = {
+    "open": "coalesce(open, close)",
+    "high": "coalesce(high, close)",
+    "low": "coalesce(low, close)",
+    "close": "close",
+    "volume": "volume",
+}
+
+# First bar upstream has for symbols whose history starts after a requested
+# start (recent listings), so they are not backfilled again on every refresh
+_first_available: Dict[str, date] = {}
+
+# Smallest yfinance period covering a gap of N calendar days
+_PERIODS = ((5, "5d"), (28, "1mo"), (90, "3mo"), (180, "6mo"), (365, "1y"), (730, "2y"), (1825, "5y"), (3650, "10y"))
+
+
+def _period_for(days: int) -> str:
+    for limit, period in _PERIODS:
+        if days <= limit:
+            return period
+    return "max"
+
+
+def _bar_rows(key: str, df: "pd.DataFrame", session: date) -> List[dict]:
+    index = df.index
+    if getattr(index, "tz", None) is not None:
+        index = index.tz_convert(MARKET_TIMEZONE)
+    rows = []
+    for day, open_, high, low, close, volume in zip(
+        index.date, df["Open"], df["High"], df["Low"], df["Close"], df["Volume"],
+    ):
+        if close != close or day > session:  # NaN, or today's bar while the session is still trading
+            continue
+        rows.append({
+            "ticker_symbol": key,
+            "date": day,
+            "open": float(open_) if open_ == open_ else None,
+            "high": float(high) if high == high else None,
+            "low": float(low) if low == low else None,
+            "close": float(close),
+            "volume": int(volume) if volume == volume else None,
+        })
+    return rows
+
+
+class BarStore:
+    """
+    Local copy of daily bars in the daily_bars table.
+
+    refresh() fetches only what is missing since each symbol's latest stored
+    bar (one batch call per gap size); load_closes() returns a dense
+    (days x symbols) close matrix for vectorized valuation.
+    """
+
+    @staticmethod
+    def stored_ranges(db: Session, keys: Sequence[str]) -> Dict[str, Tuple[date, date]]:
+        """(first, last) stored bar date per symbol."""
+        rows = db.query(DailyBar.ticker_symbol, func.min(DailyBar.date), func.max(DailyBar.date)).filter(
+            DailyBar.ticker_symbol.in_(keys)
+        ).group_by(DailyBar.ticker_symbol).all()
+        return {key: (first, last) for key, first, last in rows}
+
+    @staticmethod
+    def stored_versions(db: Session, keys: Sequence[str]) -> Dict[str, Tuple[int, Optional[datetime]]]:
+        """(bar count, latest fetched_at) per symbol: changes when bars are added, removed or re-fetched."""
+        rows = db.query(DailyBar.ticker_symbol, func.count(), func.max(DailyBar.fetched_at)).filter(
+            DailyBar.ticker_symbol.in_(keys)
+        ).group_by(DailyBar.ticker_symbol).all()
+        return {key: (count, fetched_at) for key, count, fetched_at in rows}
+
+    @staticmethod
+    def refresh(db: Session, symbols: Iterable[str], start: date) -> int:
+        """
+        Fetch and store bars newer than each symbol's latest stored bar (or
+        since `start`). Only completed sessions are stored, so a symbol that
+        has the last session's bar needs no upstream call until the next
+        close. Returns rows written.
+        """
+        keys = sorted({normalize_ticker(symbol) for symbol in symbols})
+        if not keys:
+            return 0
+        today = MarketClock.now().date()
+        session = MarketClock.last_session()
+        ranges = BarStore.stored_ranges(db, keys)
+
+        by_period: Dict[str, List[str]] = {}
+        backfill = set()
+        for key in keys:
+            first, last = ranges.get(key, (None, None))
+            if first is not None and first > start + timedelta(days=7) and _first_available.get(key) != first:
+                last = None  # history before the stored range is needed too
+            elif last is not None and last >= session:
+                continue
+            if last is None:
+                backfill.add(key)
+            gap = (today - (last or start)).days + 1
+            by_period.setdefault(_period_for(gap), []).append(key)
+
+        written = 0
+        for period, stale in by_period.items():
+            try:
+                frames = get_history_batch([upstream_symbol(key) for key in stale], period=period)
+            except Exception as e:
+                logger.warning(f"Failed to fetch bars for {len(stale)} symbols ({period}): {e}")
+                continue
+            rows = []
+            for key in stale:
+                df = frames.get(upstream_symbol(key))
+                if df is not None and not df.empty:
+                    bars = _bar_rows(key, df, session)
+                    if key in backfill and bars and bars[0]["date"] > start + timedelta(days=7):
+                        _first_available[key] = bars[0]["date"]
+                    rows.extend(bars)
+            if rows:
+                # Core executemany of one cached statement; SQLAlchemy only batches an
+                # ON CONFLICT insert into multi-row VALUES pages when it has RETURNING,
+                # otherwise psycopg2 sends one statement per row
+                stmt = pg_insert(DailyBar.__table__)
+                db.execute(stmt.on_conflict_do_update(
+                    index_elements=[DailyBar.ticker_symbol, DailyBar.date],
+                    set_={
+                        "open": stmt.excluded.open,
+                        "high": stmt.excluded.high,
+                        "low": stmt.excluded.low,
+                        "close": stmt.excluded.close,
+                        "volume": stmt.excluded.volume,
+                        "fetched_at": func.now(),
+                    },
+                ).returning(DailyBar.date), rows)
+            written += len(rows)
+        if written:
+            db.commit()
+        return written
+
+    @staticmethod
+    def load_fields(
+        db: Session,
+        symbols: Sequence[str],
+        fields: Sequence[str] = ("close",),
+        start: Optional[date] = None,
+        after: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> Tuple["np.ndarray", Dict[str, "np.ndarray"]]:
+        """
+        Bars as (days, {field: matrix}): days is a sorted int array of days since
+        1970-01-01, each matrix is (len(days) x len(symbols)) with NaN where a
+        symbol has no bar. Missing open/high/low fall back to the close, a
+        missing volume is NaN. Each
+        symbol's series comes back as one row of comma-separated text that
+        numpy parses directly, instead of the driver building a Python object
+        per value.
+        """
+        import numpy as np
+
+        keys = [normalize_ticker(symbol) for symbol in symbols]
+        conditions = ["ticker_symbol = ANY(:keys)"]
+        params = {"keys": keys}
+        if start is not None:
+            conditions.append("date >= :start")
+            params["start"] = start
+        if after is not None:
+            conditions.append("date > :after")
+            params["after"] = after
+        if end is not None:
+            conditions.append("date <= :end")
+            params["end"] = end
+        columns = "".join(
+            f", array_to_string(array_agg({_FIELD_EXPRESSIONS[field]} ORDER BY date), ',', 'NaN')" for field in fields
+        )
+        rows = db.execute(text(f"""
+            SELECT ticker_symbol,
+                   array_to_string(array_agg(date - DATE '1970-01-01' ORDER BY date), ','){columns}
+            FROM daily_bars
+            WHERE {' AND '.join(conditions)}
+            GROUP BY ticker_symbol
+        """), params).all()
+
+        series = {
+            row[0]: (
+                np.fromstring(row[1], dtype=np.int64, sep=","),
+                [np.fromstring(values, dtype=float, sep=",") for values in row[2:]],
+            )
+            for row in rows
+        }
+        if not series:
+            return np.empty(0, dtype=np.int64), {field: np.empty((0, len(keys))) for field in fields}
+        all_days = np.unique(np.concatenate([days for days, _ in series.values()]))
+        matrices = {field: np.full((len(all_days), len(keys)), np.nan) for field in fields}
+        for col, key in enumerate(keys):
+            if key in series:
+                days, values = series[key]
+                row = np.searchsorted(all_days, days)
+                for field, column in zip(fields, values):
+                    matrices[field][row, col] = column
+        return all_days, matrices
+
+    @staticmethod
+    def load_closes(
+        db: Session,
+        symbols: Sequence[str],
+        start: Optional[date] = None,
+        after: Optional[date] = None,
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Closes as (days, matrix); see load_fields."""
+        days, matrices = BarStore.load_fields(db, symbols, ("close",), start=start, after=after)
+        return days, matrices["close"]
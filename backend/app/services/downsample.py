@@ -0,0 +1,74 @@
+"""
+Downsampling of (x, y) series for charts.
+
+Both functions return sorted indices into the input, so callers can pick
+any parallel arrays (timestamps, values, ids) with the result. The first and
+last points are always kept.
+"""
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: keep `threshold` points that preserve the visual shape.
+    From each bucket, keep the point forming the largest triangle with the previously
+    kept point and the average of the next bucket.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = x.astype(float)
+    y = y.astype(float)
+    every = (n - 2) / (threshold - 2)
+    # Bucket i covers [edges[i], edges[i + 1]); the last edge is the final point
+    edges = np.floor(np.arange(threshold - 1) * every).astype(np.int64) + 1
+    edges = np.append(edges, n)
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2]
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def minmax(y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Min/max bucketing: split into (threshold - 2) // 2 equal-count buckets (at least
+    one) and keep each bucket's lowest and highest point, so peaks and drawdowns
+    survive. With threshold 3 only the extreme further from the endpoints is kept.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    buckets = max((threshold - 2) // 2, 1)
+
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    lows = np.minimum.reduceat(y, starts)
+    highs = np.maximum.reduceat(y, starts)
+    # Position of each bucket's min/max: first index in the bucket equal to it
+    bucket_of = np.repeat(np.arange(buckets), np.diff(edges))
+    positions = np.arange(n)
+    low_at = np.full(buckets, n, dtype=np.int64)
+    high_at = np.full(buckets, n, dtype=np.int64)
+    is_low = y == lows[bucket_of]
+    is_high = y == highs[bucket_of]
+    np.minimum.at(low_at, bucket_of[is_low], positions[is_low])
+    np.minimum.at(high_at, bucket_of[is_high], positions[is_high])
+    if threshold == 3:
+        # Room for one point between the endpoints
+        middle = (y[0] + y[-1]) / 2
+        extreme = low_at[0] if abs(y[low_at[0]] - middle) > abs(y[high_at[0]] - middle) else high_at[0]
+        return np.unique([0, extreme, n - 1])
+    return np.unique(np.concatenate(([0, n - 1], low_at, high_at)))
@@ -0,0 +1,82 @@
+"""
+Vectorized technical indicators over a (time x symbols) matrix.
+
+Every function takes a float matrix with one column per symbol and rows in
+time order, and returns one value per symbol for the latest bar, matching
+the rolling-window definitions used by StockService.get_analysis_data.
+NaN marks "no bar"; columns are expected to be right-aligned (see
+right_align) so that the last row is each symbol's latest bar.
+"""
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def frame_to_matrix(frames: Dict[str, pd.DataFrame], symbols: Sequence[str], column: str) -> pd.DataFrame:
+    """Outer-join one column of each symbol's history on the date index (symbols as columns)."""
+    series = {
+        symbol: frames[symbol][column].astype(float)
+        for symbol in symbols
+        if symbol in frames and column in frames[symbol]
+    }
+    matrix = pd.DataFrame(series, columns=list(symbols))
+    return matrix.sort_index()
+
+
+def right_align(matrix: np.ndarray) -> np.ndarray:
+    """
+    Move each column's bars to the bottom, dropping its NaN gaps.
+
+    Symbols trade on different days (listings, halts), so a shared date index
+    has holes. After alignment row -k is every symbol's k-th latest bar,
+    which is what per-symbol rolling windows see.
+    """
+    if matrix.size == 0:
+        return matrix
+    # Stable sort on "has a value": NaNs move to the top, bars keep their order
+    order = np.argsort(~np.isnan(matrix), axis=0, kind="stable")
+    return np.take_along_axis(matrix, order, axis=0)
+
+
+def bar_count(matrix: np.ndarray) -> np.ndarray:
+    """Number of bars per symbol."""
+    return np.count_nonzero(~np.isnan(matrix), axis=0)
+
+
+def last(matrix: np.ndarray, offset: int = 0) -> np.ndarray:
+    """Value `offset` bars before the latest one (NaN when there is no such bar)."""
+    if matrix.shape[0] <= offset:
+        return np.full(matrix.shape[1], np.nan)
+    return matrix[-1 - offset]
+
+
+def sma(matrix: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average of the last `window` bars (NaN with fewer bars, like rolling().mean())."""
+    if matrix.shape[0] < window:
+        return np.full(matrix.shape[1], np.nan)
+    return matrix[-window:].mean(axis=0)
+
+
+def rsi(close: np.ndarray, window: int = 14) -> np.ndarray:
+    """RSI with simple-average gains/losses over `window` changes (NaN when undefined)."""
+    if close.shape[0] < window + 1:
+        return np.full(close.shape[1], np.nan)
+    delta = np.diff(close[-(window + 1):], axis=0)
+    gain = np.where(delta > 0, delta, 0.0).mean(axis=0)
+    loss = np.where(delta < 0, -delta, 0.0).mean(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 - 100 / (1 + gain / loss)
+
+
+def ratio(numerator: np.ndarray, denominator: np.ndarray, default: float = np.nan) -> np.ndarray:
+    """Element-wise numerator / denominator with `default` where the denominator is not positive."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, default)
+
+
+def weekly_close(close: pd.DataFrame) -> pd.DataFrame:
+    """Weekly closes (last bar of each week) from a daily close matrix."""
+    if close.empty:
+        return close
+    return close.resample("W-FRI").last()
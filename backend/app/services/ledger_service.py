@@ -0,0 +1,449 @@
+import logging
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import DateTime, Numeric, String, Text, case, cast, column, func, insert, literal, select, text, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.metric import TradeMetric
+from app.models.position import Position, PositionLot
+from app.models.trade import Trade, TradeStatus, TradeType
+
+logger = logging.getLogger(__name__)
+
+
+class LedgerError(ValueError):
+    """Raised when a ledger operation is invalid (e.g. closing more than is open)."""
+
+
+class LedgerService:
+    """
+    Incrementally maintained position ledger.
+
+    Each OPEN entry trade owns one PositionLot; positions hold the running
+    open quantity, open cost and realized P&L per (user, ticker). All methods
+    only flush - they run inside the caller's transaction, which commits the
+    trade write and the ledger update together.
+    """
+
+    @staticmethod
+    def _lock_position(db: Session, user_id: UUID, ticker_symbol: str) -> Position:
+        db.execute(
+            pg_insert(Position)
+            .values(user_id=user_id, ticker_symbol=ticker_symbol, quantity=0, total_amount=0, realized_profit_loss=0)
+            .on_conflict_do_nothing()
+        )
+        return (
+            db.query(Position)
+            .filter(Position.user_id == user_id, Position.ticker_symbol == ticker_symbol)
+            .with_for_update()
+            .one()
+        )
+
+    @staticmethod
+    def get_lot(db: Session, entry_trade: Trade, for_update: bool = False) -> Optional[PositionLot]:
+        query = db.query(PositionLot).filter(PositionLot.entry_trade_id == entry_trade.id)
+        if for_update:
+            query = query.with_for_update()
+        return query.first()
+
+    @staticmethod
+    def open_lot(db: Session, trade: Trade) -> PositionLot:
+        """Create the lot for a new OPEN entry trade."""
+        position = LedgerService._lock_position(db, trade.user_id, trade.ticker_symbol)
+        lot = PositionLot(
+            user_id=trade.user_id,
+            ticker_symbol=trade.ticker_symbol,
+            entry_trade_id=trade.id,
+            side=trade.trade_type,
+            quantity=trade.quantity,
+            open_quantity=trade.quantity,
+            price=trade.price,
+            opened_at=trade.executed_at or datetime.now(),
+        )
+        db.add(lot)
+        position.quantity += trade.quantity
+        position.total_amount += trade.quantity * trade.price
+        db.flush()
+        return lot
+
+    @staticmethod
+    def get_or_open_lot(db: Session, trade: Trade) -> PositionLot:
+        """Lot for an OPEN entry trade, creating it for trades recorded before the ledger existed."""
+        lot = LedgerService.get_lot(db, trade, for_update=True)
+        return lot if lot is not None else LedgerService.open_lot(db, trade)
+
+    @staticmethod
+    def close_lot(
+        db: Session,
+        lot: PositionLot,
+        quantity: Decimal,
+        closing_price: Decimal,
+        closed_at: Optional[datetime] = None,
+        rationale: Optional[str] = None,
+    ) -> Trade:
+        """Close `quantity` of a lot and record the exit trade. Returns the exit trade."""
+        if quantity <= 0 or quantity > lot.open_quantity:
+            raise LedgerError(f"Cannot close {quantity}; open quantity is {lot.open_quantity}")
+
+        if lot.side == TradeType.BUY:
+            profit_loss = (closing_price - lot.price) * quantity
+            exit_type = TradeType.SELL
+        else:
+            profit_loss = (lot.price - closing_price) * quantity
+            exit_type = TradeType.BUY
+        closed_at = closed_at or datetime.now()
+
+        position = LedgerService._lock_position(db, lot.user_id, lot.ticker_symbol)
+        lot.open_quantity -= quantity
+        lot.realized_profit_loss += profit_loss
+        position.quantity -= quantity
+        position.total_amount -= quantity * lot.price
+        position.realized_profit_loss += profit_loss
+        if lot.open_quantity == 0:
+            lot.closed_at = closed_at
+            lot.entry_trade.status = TradeStatus.CLOSED
+
+        exit_trade = Trade(
+            user_id=lot.user_id,
+            ticker_symbol=lot.ticker_symbol,
+            trade_type=exit_type,
+            quantity=quantity,
+            price=closing_price,
+            total_amount=quantity * closing_price,
+            executed_at=closed_at,
+            status=TradeStatus.CLOSED,
+            profit_loss=profit_loss,
+            rationale=rationale,
+            related_trade_id=lot.entry_trade_id,
+        )
+        db.add(exit_trade)
+        db.flush()
+        return exit_trade
+
+    @staticmethod
+    def close_fifo(
+        db: Session,
+        user_id: UUID,
+        ticker_symbol: str,
+        quantity: Decimal,
+        closing_price: Decimal,
+        side: Optional[TradeType] = None,
+        closed_at: Optional[datetime] = None,
+        rationale: Optional[str] = None,
+    ) -> List[Trade]:
+        """
+        Close `quantity` of a ticker against its open lots, oldest first.
+
+        Rows are locked trades -> lots -> positions, each in id order, like
+        close_batch and settling a single trade, so concurrent closes of
+        overlapping lots queue instead of deadlocking.
+        """
+        query = db.query(PositionLot.entry_trade_id).filter(
+            PositionLot.user_id == user_id,
+            PositionLot.ticker_symbol == ticker_symbol,
+            PositionLot.open_quantity > 0,
+        )
+        if side is not None:
+            query = query.filter(PositionLot.side == side)
+        entry_ids = [entry_id for entry_id, in query.all()]
+        if entry_ids:
+            db.query(Trade.id).filter(Trade.id.in_(entry_ids)).order_by(Trade.id).with_for_update().all()
+        lots = (
+            db.query(PositionLot)
+            .filter(PositionLot.entry_trade_id.in_(entry_ids), PositionLot.open_quantity > 0)
+            .order_by(PositionLot.entry_trade_id)
+            .with_for_update()
+            .populate_existing()
+            .all()
+        )
+        lots.sort(key=lambda lot: (lot.opened_at, lot.id))
+
+        if side is None and len({lot.side for lot in lots}) > 1:
+            raise LedgerError("Both long and short lots are open; specify side")
+        available = sum((lot.open_quantity for lot in lots), Decimal(0))
+        if quantity > available:
+            raise LedgerError(f"Cannot close {quantity}; open quantity is {available}")
+
+        exits = []
+        remaining = quantity
+        for lot in lots:
+            if remaining <= 0:
+                break
+            take = min(lot.open_quantity, remaining)
+            exits.append(LedgerService.close_lot(db, lot, take, closing_price, closed_at, rationale))
+            remaining -= take
+        return exits
+
+    @staticmethod
+    def close_batch(
+        db: Session,
+        user_id: UUID,
+        prices: Dict[str, Decimal],
+        closing_price: Optional[Decimal] = None,
+        trade_ids: Optional[Sequence[UUID]] = None,
+        ticker_symbol: Optional[str] = None,
+        closed_at: Optional[datetime] = None,
+        rationale: Optional[str] = None,
+    ) -> List[UUID]:
+        """
+        Fully close many open entry trades (given ids, or every open lot of a ticker).
+
+        Set-based: rows are locked trades -> lots -> positions (the same order
+        as close_lot), then one statement closes the lots and inserts all exit
+        trades, one marks the entries CLOSED and one refreshes the positions.
+        `prices` maps ticker -> closing price, falling back to `closing_price`.
+        Returns the exit trade ids.
+        """
+        trades = Trade.__table__
+        lots = PositionLot.__table__
+        positions = Position.__table__
+        closed_at = closed_at or datetime.now()
+
+        query = select(trades.c.id, trades.c.ticker_symbol).where(
+            trades.c.user_id == user_id,
+            trades.c.related_trade_id.is_(None),
+            trades.c.status == TradeStatus.OPEN,
+        )
+        if trade_ids is not None:
+            query = query.where(trades.c.id.in_(trade_ids))
+        if ticker_symbol is not None:
+            query = query.where(trades.c.ticker_symbol == ticker_symbol)
+        entries = dict(db.execute(query.order_by(trades.c.id).with_for_update()).all())
+
+        if trade_ids is not None:
+            missing = set(trade_ids) - set(entries)
+            if missing:
+                raise LedgerError(f"Trades not found or already closed: {', '.join(sorted(map(str, missing)))}")
+        if not entries:
+            return []
+        tickers = sorted(set(entries.values()))
+        prices = {ticker: prices.get(ticker, closing_price) for ticker in tickers}
+        unpriced = [ticker for ticker, price in prices.items() if price is None]
+        if unpriced:
+            raise LedgerError(f"No closing price for: {', '.join(unpriced)}")
+
+        entry_ids = list(entries)
+        locked = set(db.execute(
+            select(lots.c.entry_trade_id)
+            .where(lots.c.entry_trade_id.in_(entry_ids))
+            .order_by(lots.c.entry_trade_id)
+            .with_for_update()
+        ).scalars())
+        unledgered = [entry_id for entry_id in entry_ids if entry_id not in locked]
+        if unledgered:
+            # Trades recorded before the ledger existed
+            for trade in db.query(Trade).filter(Trade.id.in_(unledgered)).all():
+                LedgerService.open_lot(db, trade)
+        db.execute(
+            select(positions.c.ticker_symbol)
+            .where(positions.c.user_id == user_id, positions.c.ticker_symbol.in_(tickers))
+            .order_by(positions.c.ticker_symbol)
+            .with_for_update()
+        )
+
+        # 1) close the lots and 2) insert their exit trades in one statement
+        px = values(column("ticker_symbol", String), column("price", Numeric), name="px").data(
+            list(prices.items())
+        )
+        old = (
+            select(lots.c.id, lots.c.open_quantity.label("closed_quantity"), px.c.price.label("closing_price"))
+            .join(px, px.c.ticker_symbol == lots.c.ticker_symbol)
+            .where(lots.c.entry_trade_id.in_(entry_ids), lots.c.open_quantity > 0)
+            .subquery("old")
+        )
+        profit_loss = case(
+            (lots.c.side == TradeType.BUY, (old.c.closing_price - lots.c.price) * old.c.closed_quantity),
+            else_=(lots.c.price - old.c.closing_price) * old.c.closed_quantity,
+        )
+        closed = (
+            update(lots)
+            .where(lots.c.id == old.c.id)
+            .values(
+                open_quantity=0,
+                realized_profit_loss=lots.c.realized_profit_loss + profit_loss,
+                closed_at=closed_at,
+            )
+            .returning(
+                lots.c.user_id,
+                lots.c.ticker_symbol,
+                lots.c.entry_trade_id,
+                lots.c.side,
+                old.c.closed_quantity,
+                old.c.closing_price,
+                profit_loss.label("profit_loss"),
+            )
+            .cte("closed")
+        )
+        trade_type = trades.c.trade_type.type
+        exits = (
+            insert(trades)
+            .from_select(
+                [
+                    "id", "user_id", "ticker_symbol", "trade_type", "quantity", "price", "total_amount",
+                    "executed_at", "status", "profit_loss", "rationale", "related_trade_id",
+                ],
+                select(
+                    func.gen_random_uuid(),
+                    closed.c.user_id,
+                    closed.c.ticker_symbol,
+                    case(
+                        (closed.c.side == TradeType.BUY, cast(TradeType.SELL, trade_type)),
+                        else_=cast(TradeType.BUY, trade_type),
+                    ),
+                    closed.c.closed_quantity,
+                    closed.c.closing_price,
+                    closed.c.closed_quantity * closed.c.closing_price,
+                    literal(closed_at, DateTime(timezone=True)),
+                    cast(TradeStatus.CLOSED, trades.c.status.type),
+                    closed.c.profit_loss,
+                    literal(rationale, Text),
+                    closed.c.entry_trade_id,
+                ),
+            )
+            .add_cte(closed)
+            .returning(trades.c.id)
+        )
+        exit_ids = list(db.execute(exits).scalars())
+
+        db.execute(
+            update(trades)
+            .where(trades.c.id.in_(entry_ids))
+            .values(status=TradeStatus.CLOSED)
+        )
+
+        totals = (
+            select(
+                lots.c.ticker_symbol,
+                func.sum(lots.c.open_quantity).label("quantity"),
+                func.sum(lots.c.open_quantity * lots.c.price).label("total_amount"),
+                func.sum(lots.c.realized_profit_loss).label("realized_profit_loss"),
+            )
+            .where(lots.c.user_id == user_id, lots.c.ticker_symbol.in_(tickers))
+            .group_by(lots.c.ticker_symbol)
+            .subquery("totals")
+        )
+        db.execute(
+            update(positions)
+            .where(positions.c.user_id == user_id, positions.c.ticker_symbol == totals.c.ticker_symbol)
+            .values(
+                quantity=totals.c.quantity,
+                total_amount=totals.c.total_amount,
+                realized_profit_loss=totals.c.realized_profit_loss,
+            )
+        )
+        # ORM objects loaded earlier in the session are now stale
+        db.expire_all()
+        return exit_ids
+
+    @staticmethod
+    def reverse_exit(db: Session, exit_trade: Trade) -> None:
+        """
+        Undo an exit trade that is being deleted: its quantity goes back on
+        the entry's lot, its P&L comes off the lot, and the entry reopens.
+        The entry's trade metrics are dropped so the metrics job recomputes
+        them from the remaining exits (or not at all while it is open).
+        Call rebuild_position afterwards.
+        """
+        entry = db.query(Trade).filter(Trade.id == exit_trade.related_trade_id).with_for_update().first()
+        if entry is None:
+            return
+        db.query(TradeMetric).filter(TradeMetric.trade_id == entry.id).delete(synchronize_session=False)
+        lot = LedgerService.get_lot(db, entry, for_update=True)
+        if lot is None:
+            return
+        lot.open_quantity = min(lot.open_quantity + exit_trade.quantity, lot.quantity)
+        lot.realized_profit_loss -= exit_trade.profit_loss or 0
+        if lot.open_quantity > 0:
+            lot.closed_at = None
+            entry.status = TradeStatus.OPEN
+        db.flush()
+
+    @staticmethod
+    def backfill(db: Session) -> int:
+        """
+        Create lots for entry trades that have none (trades recorded before
+        the ledger existed, or a database created with create_all rather
+        than the migration) and recompute the positions they belong to.
+        Idempotent; returns lots created.
+        """
+        created = db.execute(text("""
+            WITH created AS (
+                INSERT INTO position_lots (
+                    id, user_id, ticker_symbol, entry_trade_id, side, quantity, open_quantity,
+                    price, realized_profit_loss, opened_at, closed_at
+                )
+                SELECT
+                    gen_random_uuid(), e.user_id, e.ticker_symbol, e.id, e.trade_type, e.quantity,
+                    CASE WHEN e.status = 'OPEN' THEN GREATEST(e.quantity - COALESCE(x.quantity, 0), 0) ELSE 0 END,
+                    e.price, COALESCE(x.profit_loss, 0), COALESCE(e.executed_at, now()),
+                    CASE WHEN e.status = 'OPEN' THEN NULL ELSE COALESCE(x.closed_at, e.executed_at, now()) END
+                FROM trades e
+                LEFT JOIN (
+                    SELECT related_trade_id, SUM(quantity) AS quantity, SUM(profit_loss) AS profit_loss,
+                           MAX(executed_at) AS closed_at
+                    FROM trades
+                    WHERE related_trade_id IS NOT NULL
+                    GROUP BY related_trade_id
+                ) x ON x.related_trade_id = e.id
+                WHERE e.related_trade_id IS NULL
+                  AND NOT EXISTS (SELECT 1 FROM position_lots l WHERE l.entry_trade_id = e.id)
+                ON CONFLICT (entry_trade_id) DO NOTHING
+                RETURNING user_id, ticker_symbol
+            )
+            SELECT DISTINCT user_id, ticker_symbol FROM created ORDER BY user_id, ticker_symbol
+        """)).all()
+        if not created:
+            return 0
+        for user_id, ticker_symbol in created:
+            LedgerService.rebuild_position(db, user_id, ticker_symbol)
+        return len(created)
+
+    @staticmethod
+    def sync_entry(db: Session, trade: Trade, previous_ticker: Optional[str] = None) -> None:
+        """Bring the lot of an edited entry trade in line with the trade row."""
+        if trade.related_trade_id is not None:
+            return
+        lot = LedgerService.get_lot(db, trade, for_update=True)
+        if lot is None:
+            if trade.status == TradeStatus.OPEN:
+                LedgerService.open_lot(db, trade)
+            return
+
+        closed_quantity = lot.quantity - lot.open_quantity
+        lot.ticker_symbol = trade.ticker_symbol
+        lot.side = trade.trade_type
+        lot.price = trade.price
+        lot.quantity = trade.quantity
+        lot.opened_at = trade.executed_at or lot.opened_at
+        if trade.status == TradeStatus.OPEN:
+            lot.open_quantity = max(trade.quantity - closed_quantity, Decimal(0))
+        else:
+            lot.open_quantity = Decimal(0)
+        lot.closed_at = None if lot.open_quantity > 0 else (lot.closed_at or datetime.now())
+        db.flush()
+
+        LedgerService.rebuild_position(db, trade.user_id, trade.ticker_symbol)
+        if previous_ticker and previous_ticker != trade.ticker_symbol:
+            LedgerService.rebuild_position(db, trade.user_id, previous_ticker)
+
+    @staticmethod
+    def rebuild_position(db: Session, user_id: UUID, ticker_symbol: str) -> Position:
+        """Recompute one position from its lots (after edits/deletes; O(lots of one ticker))."""
+        position = LedgerService._lock_position(db, user_id, ticker_symbol)
+        quantity, total_amount, realized = db.query(
+            func.coalesce(func.sum(PositionLot.open_quantity), 0),
+            func.coalesce(func.sum(PositionLot.open_quantity * PositionLot.price), 0),
+            func.coalesce(func.sum(PositionLot.realized_profit_loss), 0),
+        ).filter(
+            PositionLot.user_id == user_id,
+            PositionLot.ticker_symbol == ticker_symbol,
+        ).one()
+        position.quantity = quantity
+        position.total_amount = total_amount
+        position.realized_profit_loss = realized
+        db.flush()
+        return position
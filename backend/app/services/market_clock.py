@@ -0,0 +1,200 @@
+"""
+Tokyo Stock Exchange calendar and session clock.
+
+Holidays are computed from the rules of the Japanese national holiday law
+(fixed dates, Happy Monday days, equinoxes, substitute and sandwiched
+holidays, the 2019-2021 one-off moves) plus the exchange's own year-end
+closures (Dec 31 - Jan 3), so no calendar data has to be shipped or
+fetched. Unscheduled closures and half days can be added through
+MARKET_EXTRA_HOLIDAYS / MARKET_HALF_DAYS.
+"""
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import FrozenSet, List, NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from app.core.config import settings
+
+TOKYO = ZoneInfo("Asia/Tokyo")
+
+MORNING_OPEN = time(9, 0)
+MORNING_CLOSE = time(11, 30)
+AFTERNOON_OPEN = time(12, 30)
+# arrowhead 4.0 extended the afternoon session by 30 minutes
+AFTERNOON_CLOSE = time(15, 30)
+AFTERNOON_CLOSE_BEFORE_2024_11_05 = time(15, 0)
+EXTENDED_CLOSE_FROM = date(2024, 11, 5)
+
+# Yahoo's TSE quotes lag the exchange by 20 minutes, so prices keep moving that long after a close
+QUOTE_DELAY = timedelta(minutes=20)
+
+# One-off dates set by special laws (enthronement 2019, Olympics 2020/2021)
+_SPECIAL_HOLIDAYS = {
+    date(2019, 5, 1), date(2019, 10, 22),
+    date(2020, 7, 23), date(2020, 7, 24), date(2020, 8, 10),
+    date(2021, 7, 22), date(2021, 7, 23), date(2021, 8, 8),
+}
+# Holidays those laws moved away from their usual dates
+_MOVED_AWAY = {
+    date(2020, 7, 20), date(2020, 8, 11), date(2020, 10, 12),
+    date(2021, 7, 19), date(2021, 8, 11), date(2021, 10, 11),
+}
+
+
+def _nth_monday(year: int, month: int, n: int) -> date:
+    first = date(year, month, 1)
+    return first + timedelta(days=(7 - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _equinox(year: int, base: float) -> int:
+    # Approximation used by the National Astronomical Observatory, valid for 1980-2099
+    return int(base + 0.242194 * (year - 1980) - (year - 1980) // 4)
+
+
+@lru_cache(maxsize=None)
+def national_holidays(year: int) -> FrozenSet[date]:
+    """Japanese national holidays of `year` (rules as of 2000 onwards)."""
+    days = {
+        date(year, 1, 1),
+        _nth_monday(year, 1, 2),
+        date(year, 2, 11),
+        date(year, 3, _equinox(year, 20.8431)),
+        date(year, 4, 29),
+        date(year, 5, 3),
+        date(year, 5, 5),
+        _nth_monday(year, 9, 3) if year >= 2003 else date(year, 9, 15),
+        date(year, 9, _equinox(year, 23.2488)),
+        _nth_monday(year, 10, 2),
+        date(year, 11, 3),
+        date(year, 11, 23),
+    }
+    days.add(_nth_monday(year, 7, 3) if year >= 2003 else date(year, 7, 20))
+    if year >= 2007:
+        days.add(date(year, 5, 4))  # before 2007 only a sandwiched (citizens') holiday, added below
+    if year >= 2016:
+        days.add(date(year, 8, 11))
+    if year >= 2020:
+        days.add(date(year, 2, 23))
+    elif year <= 2018:
+        days.add(date(year, 12, 23))
+    days -= _MOVED_AWAY
+    days |= {day for day in _SPECIAL_HOLIDAYS if day.year == year}
+
+    # Citizens' holiday: a weekday sandwiched between two holidays (e.g. 2019-04-30, 2019-05-02)
+    for day in sorted(days):
+        between = day + timedelta(days=1)
+        if between not in days and day + timedelta(days=2) in days and between.weekday() != 6:
+            days.add(between)
+    # Substitute holiday: a holiday on Sunday moves to the next day that is not already a holiday
+    for day in sorted(days):
+        if day.weekday() == 6:
+            substitute = day + timedelta(days=1)
+            while substitute in days:
+                substitute += timedelta(days=1)
+            days.add(substitute)
+    return frozenset(days)
+
+
+@lru_cache(maxsize=1)
+def _configured(dates: Tuple[str, ...]) -> FrozenSet[date]:
+    return frozenset(date.fromisoformat(day) for day in dates)
+
+
+def is_trading_day(day: date) -> bool:
+    if day.weekday() >= 5:
+        return False
+    if (day.month == 12 and day.day == 31) or (day.month == 1 and day.day <= 3):
+        return False
+    if day in national_holidays(day.year):
+        return False
+    return day not in _configured(tuple(settings.MARKET_EXTRA_HOLIDAYS))
+
+
+def sessions(day: date) -> List[Tuple[datetime, datetime]]:
+    """(open, close) of each trading session on `day` in Tokyo time; empty on holidays."""
+    if not is_trading_day(day):
+        return []
+    morning = (datetime.combine(day, MORNING_OPEN, TOKYO), datetime.combine(day, MORNING_CLOSE, TOKYO))
+    if day in _configured(tuple(settings.MARKET_HALF_DAYS)):
+        return [morning]
+    close = AFTERNOON_CLOSE if day >= EXTENDED_CLOSE_FROM else AFTERNOON_CLOSE_BEFORE_2024_11_05
+    return [morning, (datetime.combine(day, AFTERNOON_OPEN, TOKYO), datetime.combine(day, close, TOKYO))]
+
+
+def previous_trading_day(day: date) -> date:
+    day -= timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+
+class MarketState(NamedTuple):
+    phase: str  # "open", "lunch" (between sessions), "closed" (before open, after close, holidays)
+    next_open: datetime  # start of the next session (Tokyo time)
+    last_session: date  # latest trading day whose close (plus the quote delay) has passed
+
+    @property
+    def is_open(self) -> bool:
+        return self.phase == "open"
+
+
+class MarketClock:
+    @staticmethod
+    def now() -> datetime:
+        return datetime.now(TOKYO)
+
+    @staticmethod
+    def state(now: Optional[datetime] = None) -> MarketState:
+        """
+        Where the market is at `now`. Sessions count as open until QUOTE_DELAY
+        after their close, since that is when delayed quotes stop changing.
+        """
+        now = (now or MarketClock.now()).astimezone(TOKYO)
+        today = now.date()
+        todays = sessions(today)
+
+        upcoming = [open_ for open_, _ in todays if open_ > now]
+        if any(open_ <= now < close + QUOTE_DELAY for open_, close in todays):
+            phase = "open"
+        elif upcoming and now >= todays[0][0]:
+            phase = "lunch"
+        else:
+            phase = "closed"
+        if upcoming:
+            next_open = upcoming[0]
+        else:
+            day = today + timedelta(days=1)
+            while not is_trading_day(day):
+                day += timedelta(days=1)
+            next_open = sessions(day)[0][0]
+
+        if todays and now >= todays[-1][1] + QUOTE_DELAY:
+            last = today
+        else:
+            last = previous_trading_day(today)
+        return MarketState(phase, next_open, last)
+
+    @staticmethod
+    def last_session(now: Optional[datetime] = None) -> date:
+        """Latest trading day with a final daily bar."""
+        return MarketClock.state(now).last_session
+
+    @staticmethod
+    def seconds_until_open(now: Optional[datetime] = None) -> float:
+        now = now or MarketClock.now()
+        return max((MarketClock.state(now).next_open - now).total_seconds(), 0.0)
+
+    @staticmethod
+    def cache_window(bucket_seconds: int, now: Optional[datetime] = None) -> Tuple[str, float]:
+        """
+        (cache key suffix, ttl seconds) for market data. While a session is
+        open, fixed time buckets; otherwise one entry that lives until the
+        next session opens, since nothing upstream changes before then.
+        """
+        now = now or MarketClock.now()
+        state = MarketClock.state(now)
+        if state.is_open:
+            epoch = now.timestamp()
+            bucket = int(epoch // bucket_seconds)
+            return str(bucket), (bucket + 1) * bucket_seconds - epoch
+        return f"until{int(state.next_open.timestamp())}", max((state.next_open - now).total_seconds(), 1.0)
@@ -0,0 +1,59 @@
+from typing import TYPE_CHECKING, Dict, Optional, Sequence
+
+from app.core.config import settings
+from app.services.market_data.base import MarketDataProvider, Quote
+from app.services.market_data.instrumented import InstrumentedProvider
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_provider: Optional[MarketDataProvider] = None
+
+
+def _create_provider() -> MarketDataProvider:
+    if settings.MARKET_DATA_PROVIDER == "fixture":
+        from app.services.market_data.fixture_provider import FixtureProvider
+        return FixtureProvider(settings.MARKET_DATA_FIXTURE_DIR)
+
+    if settings.MARKET_DATA_PROVIDER != "yfinance":
+        raise ValueError(f"Unknown market data provider: {settings.MARKET_DATA_PROVIDER}")
+
+    from app.services.market_data.yfinance_provider import YFinanceProvider
+    provider: MarketDataProvider = YFinanceProvider()
+    if settings.MARKET_DATA_RECORD_DIR:
+        from app.services.market_data.fixture_provider import RecordingProvider
+        provider = RecordingProvider(provider, settings.MARKET_DATA_RECORD_DIR)
+    return provider
+
+
+def get_market_data_provider() -> MarketDataProvider:
+    """Process-wide market data provider selected by MARKET_DATA_PROVIDER."""
+    global _provider
+    if _provider is None:
+        _provider = InstrumentedProvider(_create_provider())
+    return _provider
+
+
+def set_market_data_provider(provider: Optional[MarketDataProvider]) -> None:
+    """Override the provider (benchmarks, load tests). None restores the configured one."""
+    global _provider
+    _provider = InstrumentedProvider(provider) if provider is not None else None
+
+
+def get_history_batch(
+    symbols: Sequence[str], period: str = "1mo", interval: str = "1d"
+) -> Dict[str, "pd.DataFrame"]:
+    """
+    History for many symbols from sync code. With the async client enabled the
+    symbols are fetched concurrently on the app's event loop (no worker thread
+    per request); otherwise through the provider.
+    """
+    from app.services.market_data.async_client import get_history_batch_blocking
+
+    frames = get_history_batch_blocking(symbols, period=period, interval=interval)
+    if frames is None:
+        frames = get_market_data_provider().get_history_batch(symbols, period=period, interval=interval)
+    return frames
+
+
+__all__ = ["MarketDataProvider", "Quote", "get_history_batch", "get_market_data_provider", "set_market_data_provider"]
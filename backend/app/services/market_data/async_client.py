@@ -0,0 +1,254 @@
+"""
+Asyncio-native client for Yahoo Finance's chart endpoint (httpx, optional).
+
+yfinance is synchronous, so every in-flight call made through the provider
+holds a worker thread. This client calls /v8/finance/chart directly from the
+event loop over shared httpx connection pools: a quote or a history
+download is an awaited request, and hundreds of symbols are fetched
+concurrently without a thread each. History comes back in the provider's
+DataFrame shape (auto-adjusted OHLC, midnight exchange-time index for daily
+bars), so callers can use either source interchangeably.
+
+Sync code in worker threads (the screener, BarStore) reaches it through
+market_data.get_history_batch, which runs the batch on the app's event loop.
+
+Enabled with MARKET_DATA_ASYNC=true while the live provider is configured;
+MARKET_DATA_YAHOO_BASE_URL can point it at a local stub
+(benchmarks/yahoo_stub.py) to run offline.
+"""
+import asyncio
+import itertools
+import logging
+import math
+import random
+from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence
+from urllib.parse import quote as urlquote
+
+from app.core.config import settings
+from app.core.metrics import track_upstream
+from app.services.market_data.base import Quote
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# httpcore checks every pooled connection each time it schedules a request,
+# which turns quadratic with large pools (500 quotes over one 100-connection
+# pool: ~10s, over 25 pools of 4: ~1s); limits are split into pools this small
+SHARD_CONNECTIONS = 4
+# Intervals whose bars are whole days or longer (indexed at midnight exchange time, like yfinance)
+_DAILY_INTERVALS = {"1d", "5d", "1wk", "1mo", "3mo"}
+
+
+def _frame(result: Dict[str, Any], interval: str) -> "pd.DataFrame":
+    import pandas as pd
+
+    timestamps = result.get("timestamp") or []
+    if not timestamps:
+        return pd.DataFrame(columns=COLUMNS)
+    indicators = result.get("indicators") or {}
+    quote = (indicators.get("quote") or [{}])[0]
+    timezone = (result.get("meta") or {}).get("exchangeTimezoneName") or "UTC"
+
+    index = pd.to_datetime(timestamps, unit="s", utc=True).tz_convert(timezone)
+    if interval in _DAILY_INTERVALS:
+        index = index.normalize()
+    df = pd.DataFrame(
+        {column: pd.to_numeric(quote.get(column.lower()), errors="coerce") for column in COLUMNS},
+        index=index,
+    )
+    adjclose = (indicators.get("adjclose") or [{}])[0].get("adjclose")
+    if adjclose:
+        # auto_adjust: scale OHLC by Adj Close / Close, as yfinance history() does
+        ratio = pd.to_numeric(pd.Series(adjclose, index=index), errors="coerce") / df["Close"]
+        for column in ("Open", "High", "Low", "Close"):
+            df[column] = df[column] * ratio
+    df.index.name = "Date"
+    df = df.dropna(how="all", subset=["Open", "High", "Low", "Close"])
+    # The live session can appear twice (last bar plus the current quote); keep the latest
+    return df[~df.index.duplicated(keep="last")]
+
+
+class AsyncYahooClient:
+    name = "yahoo-async"
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        import httpx
+
+        max_connections = max_connections or settings.MARKET_DATA_ASYNC_MAX_CONNECTIONS
+        shards = math.ceil(max_connections / SHARD_CONNECTIONS)
+        per_shard = math.ceil(max_connections / shards)
+        self._clients = [
+            httpx.AsyncClient(
+                base_url=base_url or settings.MARKET_DATA_YAHOO_BASE_URL,
+                timeout=timeout or settings.MARKET_DATA_HTTP_TIMEOUT_SECONDS,
+                headers={"User-Agent": "Mozilla/5.0", "Accept": "application/json"},
+                # retries here cover connection failures only; status retries are in _chart
+                transport=httpx.AsyncHTTPTransport(
+                    limits=httpx.Limits(max_connections=per_shard, max_keepalive_connections=per_shard),
+                    retries=settings.MARKET_DATA_HTTP_RETRIES,
+                ),
+            )
+            for _ in range(shards)
+        ]
+        # Callers queue here rather than in httpx's pool, where waiting counts against the timeout
+        self._slots = [asyncio.Semaphore(per_shard) for _ in range(shards)]
+        self._next = itertools.cycle(range(shards))
+
+    async def aclose(self) -> None:
+        await asyncio.gather(*(client.aclose() for client in self._clients))
+
+    async def _chart(self, symbol: str, params: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """First chart result for `symbol`, None for an unknown symbol."""
+        url = f"/v8/finance/chart/{urlquote(symbol, safe='')}"
+        attempt = 0
+        while True:
+            shard = next(self._next)
+            async with self._slots[shard]:
+                response = await self._clients[shard].get(url, params=params)
+            if response.status_code not in RETRY_STATUSES or attempt >= settings.MARKET_DATA_HTTP_RETRIES:
+                break
+            attempt += 1
+            # Same schedule as the sync session: immediate, then exponential backoff plus jitter
+            delay = settings.MARKET_DATA_HTTP_BACKOFF_SECONDS * 2 ** (attempt - 1) if attempt > 1 else 0.0
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            await asyncio.sleep(delay + random.uniform(0, settings.MARKET_DATA_HTTP_BACKOFF_JITTER_SECONDS))
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        results = (response.json().get("chart") or {}).get("result") or []
+        return results[0] if results else None
+
+    async def get_quote(self, symbol: str) -> Quote:
+        """Latest price from the chart metadata, falling back to the last close of the past 5 sessions."""
+        with track_upstream(self.name, "quote"):
+            result = await self._chart(symbol, {"range": "5d", "interval": "1d"})
+        if result is None:
+            return Quote(last_price=None, currency=None)
+        meta = result.get("meta") or {}
+        price = meta.get("regularMarketPrice")
+        if not price:
+            closes = [c for c in ((result.get("indicators") or {}).get("quote") or [{}])[0].get("close") or [] if c]
+            price = closes[-1] if closes else None
+        return Quote(last_price=float(price) if price else None, currency=meta.get("currency"))
+
+    async def get_history(self, symbol: str, period: str = "1mo", interval: str = "1d") -> "pd.DataFrame":
+        with track_upstream(self.name, "history"):
+            result = await self._chart(symbol, {
+                "range": period,
+                "interval": interval,
+                "includeAdjustedClose": "true",
+                "events": "div,splits",
+            })
+        if result is None:
+            import pandas as pd
+            return pd.DataFrame(columns=COLUMNS)
+        return _frame(result, interval)
+
+    async def get_quotes(self, symbols: Sequence[str]) -> Dict[str, Quote]:
+        """Quotes for many symbols concurrently; failed symbols are logged and omitted."""
+        quotes = await asyncio.gather(*(self.get_quote(symbol) for symbol in symbols), return_exceptions=True)
+        result = {}
+        for symbol, quote in zip(symbols, quotes):
+            if isinstance(quote, BaseException):
+                logger.warning(f"Failed to fetch quote for {symbol}: {quote}")
+            else:
+                result[symbol] = quote
+        return result
+
+    async def get_history_batch(
+        self, symbols: Sequence[str], period: str = "1mo", interval: str = "1d"
+    ) -> Dict[str, "pd.DataFrame"]:
+        """History for many symbols concurrently, keyed by symbol (missing or failed symbols omitted)."""
+        frames = await asyncio.gather(
+            *(self.get_history(symbol, period=period, interval=interval) for symbol in symbols),
+            return_exceptions=True,
+        )
+        result = {}
+        for symbol, df in zip(symbols, frames):
+            if isinstance(df, BaseException):
+                logger.warning(f"Failed to fetch history for {symbol}: {df}")
+            elif not df.empty:
+                result[symbol] = df
+        return result
+
+
+_client: Optional[AsyncYahooClient] = None
+# Set once httpx turned out to be missing, so the import is not retried on every call
+_unavailable = False
+# The app's event loop, which owns the shared client's connections
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_async_client() -> Optional[AsyncYahooClient]:
+    """
+    The shared client, or None when MARKET_DATA_ASYNC is off, the fixture
+    provider is configured or httpx is not installed; callers then run the
+    sync provider in a thread.
+    """
+    global _client, _unavailable
+    if _client is None:
+        if _unavailable or not settings.MARKET_DATA_ASYNC or settings.MARKET_DATA_PROVIDER != "yfinance":
+            return None
+        try:
+            _client = AsyncYahooClient()
+        except ImportError:
+            logger.warning("MARKET_DATA_ASYNC is set but httpx is not installed; using the sync provider")
+            _unavailable = True
+            return None
+    return _client
+
+
+def set_async_client(client: Optional[AsyncYahooClient]) -> None:
+    """Override the client (benchmarks, load tests). None restores the configured one."""
+    global _client
+    _client = client
+
+
+def bind_event_loop(loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    """Register the app's running loop so sync code in worker threads can use the client."""
+    global _loop
+    _loop = loop
+
+
+def get_history_batch_blocking(
+    symbols: Sequence[str], period: str = "1mo", interval: str = "1d"
+) -> Optional[Dict[str, "pd.DataFrame"]]:
+    """
+    get_history_batch for sync code running in a worker thread: the requests
+    are submitted to the app's event loop, where the client's pools live, and
+    this thread waits for the result. None when there is no client or bound
+    loop, or when called on the loop's own thread (waiting there would
+    deadlock it); callers then use the sync provider.
+    """
+    client = get_async_client()
+    loop = _loop
+    if client is None or loop is None or not loop.is_running():
+        return None
+    try:
+        if asyncio.get_running_loop() is loop:
+            return None
+    except RuntimeError:
+        pass
+    future = asyncio.run_coroutine_threadsafe(
+        client.get_history_batch(symbols, period=period, interval=interval), loop
+    )
+    return future.result()
+
+
+async def close_async_client() -> None:
+    global _client, _loop
+    _loop = None
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,62 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    # pandas is only needed once history is actually fetched; keep it off the import path
+    import pandas as pd
+
+
+@dataclass(frozen=True, slots=True)
+class Quote:
+    """Latest quote for a symbol. Fields are None when the source has no value."""
+    last_price: Optional[float]
+    currency: Optional[str]
+
+
+class MarketDataProvider(ABC):
+    """
+    Source of market data used by StockService.
+
+    Symbols are passed already formatted for the upstream (e.g. "7203.T", "^N225").
+    History is returned as a DataFrame indexed by timestamp with at least
+    Open/High/Low/Close/Volume columns, the same shape yfinance returns.
+    An empty DataFrame / dict / list means "no data", never an error.
+    """
+
+    name: str = "base"
+
+    @abstractmethod
+    def get_quote(self, symbol: str) -> Quote:
+        ...
+
+    @abstractmethod
+    def get_history(self, symbol: str, period: str = "1mo", interval: str = "1d") -> "pd.DataFrame":
+        ...
+
+    def get_history_batch(
+        self, symbols: Sequence[str], period: str = "1mo", interval: str = "1d"
+    ) -> Dict[str, "pd.DataFrame"]:
+        """
+        History for many symbols at once, keyed by symbol (missing symbols omitted).
+        The default makes one get_history call per symbol; providers with a
+        bulk endpoint override it.
+        """
+        result = {}
+        for symbol in symbols:
+            df = self.get_history(symbol, period=period, interval=interval)
+            if not df.empty:
+                result[symbol] = df
+        return result
+
+    @abstractmethod
+    def get_fundamentals(self, symbol: str) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def get_calendar(self, symbol: str) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def get_news(self, symbol: str) -> List[Dict[str, Any]]:
+        ...
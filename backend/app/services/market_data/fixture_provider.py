@@ -0,0 +1,123 @@
+import json
+import logging
+import os
+from typing import Any, Dict, List, Sequence
+
+import pandas as pd
+
+from app.services.market_data.base import MarketDataProvider, Quote
+
+logger = logging.getLogger(__name__)
+
+
+def _history_filename(period: str, interval: str) -> str:
+    return f"history_{period}_{interval}.csv"
+
+
+class FixtureProvider(MarketDataProvider):
+    """
+    Deterministic offline provider that replays recorded data from disk.
+
+    Layout (one directory per upstream symbol):
+        <root>/<SYMBOL>/quote.json
+        <root>/<SYMBOL>/info.json
+        <root>/<SYMBOL>/calendar.json
+        <root>/<SYMBOL>/news.json
+        <root>/<SYMBOL>/history_<period>_<interval>.csv
+
+    Missing files behave like an upstream with no data for that request.
+    """
+
+    name = "fixture"
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, symbol: str, filename: str) -> str:
+        return os.path.join(self.root, symbol, filename)
+
+    def _read_json(self, symbol: str, filename: str, default: Any) -> Any:
+        path = self._path(symbol, filename)
+        if not os.path.exists(path):
+            logger.debug(f"Fixture not found: {path}")
+            return default
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def get_quote(self, symbol: str) -> Quote:
+        data = self._read_json(symbol, "quote.json", {})
+        return Quote(last_price=data.get("last_price"), currency=data.get("currency"))
+
+    def get_history(self, symbol: str, period: str = "1mo", interval: str = "1d") -> pd.DataFrame:
+        path = self._path(symbol, _history_filename(period, interval))
+        if not os.path.exists(path):
+            logger.debug(f"Fixture not found: {path}")
+            return pd.DataFrame()
+        df = pd.read_csv(path, index_col=0)
+        df.index = pd.to_datetime(df.index, utc=True)
+        return df
+
+    def get_fundamentals(self, symbol: str) -> Dict[str, Any]:
+        return self._read_json(symbol, "info.json", {})
+
+    def get_calendar(self, symbol: str) -> Dict[str, Any]:
+        return self._read_json(symbol, "calendar.json", {})
+
+    def get_news(self, symbol: str) -> List[Dict[str, Any]]:
+        return self._read_json(symbol, "news.json", [])
+
+
+class RecordingProvider(MarketDataProvider):
+    """
+    Wraps another provider and writes every response to disk in the
+    FixtureProvider layout, so a live session can be replayed offline later.
+    """
+
+    name = "recording"
+
+    def __init__(self, inner: MarketDataProvider, root: str):
+        self.inner = inner
+        self.root = root
+
+    def _write_json(self, symbol: str, filename: str, data: Any) -> None:
+        directory = os.path.join(self.root, symbol)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, filename), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+
+    def get_quote(self, symbol: str) -> Quote:
+        quote = self.inner.get_quote(symbol)
+        self._write_json(symbol, "quote.json", {"last_price": quote.last_price, "currency": quote.currency})
+        return quote
+
+    def get_history(self, symbol: str, period: str = "1mo", interval: str = "1d") -> pd.DataFrame:
+        df = self.inner.get_history(symbol, period=period, interval=interval)
+        directory = os.path.join(self.root, symbol)
+        os.makedirs(directory, exist_ok=True)
+        df.to_csv(os.path.join(directory, _history_filename(period, interval)))
+        return df
+
+    def get_history_batch(
+        self, symbols: Sequence[str], period: str = "1mo", interval: str = "1d"
+    ) -> Dict[str, pd.DataFrame]:
+        frames = self.inner.get_history_batch(symbols, period=period, interval=interval)
+        for symbol, df in frames.items():
+            directory = os.path.join(self.root, symbol)
+            os.makedirs(directory, exist_ok=True)
+            df.to_csv(os.path.join(directory, _history_filename(period, interval)))
+        return frames
+
+    def get_fundamentals(self, symbol: str) -> Dict[str, Any]:
+        info = self.inner.get_fundamentals(symbol)
+        self._write_json(symbol, "info.json", info)
+        return info
+
+    def get_calendar(self, symbol: str) -> Dict[str, Any]:
+        calendar = self.inner.get_calendar(symbol)
+        self._write_json(symbol, "calendar.json", calendar)
+        return calendar
+
+    def get_news(self, symbol: str) -> List[Dict[str, Any]]:
+        news = self.inner.get_news(symbol)
+        self._write_json(symbol, "news.json", news)
+        return news
@@ -0,0 +1,92 @@
+"""
+Process-wide HTTP session for outbound market-data requests.
+
+Every upstream call goes through one requests.Session whose adapters keep
+connections alive per host, so the TLS handshake and DNS lookup to Yahoo
+happen once per pooled connection instead of once per request. The adapter
+also applies a default timeout and retries idempotent requests on
+connection errors, 429 and 5xx with exponential backoff plus jitter
+(honouring Retry-After), so workers hitting a rate limit together do not
+retry in lockstep.
+"""
+import threading
+from typing import TYPE_CHECKING, Any, Optional
+
+from app.core.config import settings
+from app.core.metrics import UPSTREAM_CONNECTIONS
+
+if TYPE_CHECKING:
+    import requests
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_lock = threading.Lock()
+_session: Optional["requests.Session"] = None
+
+
+def _counting_pool(base: type) -> type:
+    class CountingPool(base):
+        """Counts new connections (each one costs a TCP, and for https a TLS, handshake)."""
+
+        def _new_conn(self):
+            UPSTREAM_CONNECTIONS.inc(self.scheme, self.host)
+            return super()._new_conn()
+
+    CountingPool.__name__ = f"Counting{base.__name__}"
+    return CountingPool
+
+
+def build_session(
+    pool_size: Optional[int] = None,
+    timeout: Optional[float] = None,
+    retries: Optional[int] = None,
+    backoff: Optional[float] = None,
+    jitter: Optional[float] = None,
+) -> "requests.Session":
+    """A new pooled session; arguments default to the MARKET_DATA_HTTP_* settings."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+    from urllib3.util.retry import Retry
+
+    pool_size = pool_size or settings.MARKET_DATA_HTTP_POOL_SIZE
+    default_timeout = timeout or settings.MARKET_DATA_HTTP_TIMEOUT_SECONDS
+
+    class PooledAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {
+                "http": _counting_pool(HTTPConnectionPool),
+                "https": _counting_pool(HTTPSConnectionPool),
+            }
+
+        def send(self, request, **kwargs: Any):
+            if kwargs.get("timeout") is None:
+                kwargs["timeout"] = default_timeout
+            return super().send(request, **kwargs)
+
+    retry = Retry(
+        total=settings.MARKET_DATA_HTTP_RETRIES if retries is None else retries,
+        backoff_factor=settings.MARKET_DATA_HTTP_BACKOFF_SECONDS if backoff is None else backoff,
+        backoff_jitter=settings.MARKET_DATA_HTTP_BACKOFF_JITTER_SECONDS if jitter is None else jitter,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=("GET", "HEAD", "OPTIONS"),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # the caller sees the last response, as without retries
+    )
+    # pool_block=False: a burst beyond pool_size opens extra short-lived connections instead of waiting
+    adapter = PooledAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_http_session() -> "requests.Session":
+    """The shared session, created on first use (requests is not imported at worker startup)."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = build_session()
+    return _session
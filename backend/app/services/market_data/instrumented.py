@@ -0,0 +1,41 @@
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence
+
+from app.core.metrics import track_upstream
+from app.services.market_data.base import MarketDataProvider, Quote
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class InstrumentedProvider(MarketDataProvider):
+    """Records call counts and latency of every upstream call made through `inner`."""
+
+    def __init__(self, inner: MarketDataProvider):
+        self.inner = inner
+        self.name = inner.name
+
+    def get_quote(self, symbol: str) -> Quote:
+        with track_upstream(self.name, "quote"):
+            return self.inner.get_quote(symbol)
+
+    def get_history(self, symbol: str, period: str = "1mo", interval: str = "1d") -> "pd.DataFrame":
+        with track_upstream(self.name, "history"):
+            return self.inner.get_history(symbol, period=period, interval=interval)
+
+    def get_history_batch(
+        self, symbols: Sequence[str], period: str = "1mo", interval: str = "1d"
+    ) -> Dict[str, "pd.DataFrame"]:
+        with track_upstream(self.name, "history_batch"):
+            return self.inner.get_history_batch(symbols, period=period, interval=interval)
+
+    def get_fundamentals(self, symbol: str) -> Dict[str, Any]:
+        with track_upstream(self.name, "fundamentals"):
+            return self.inner.get_fundamentals(symbol)
+
+    def get_calendar(self, symbol: str) -> Dict[str, Any]:
+        with track_upstream(self.name, "calendar"):
+            return self.inner.get_calendar(symbol)
+
+    def get_news(self, symbol: str) -> List[Dict[str, Any]]:
+        with track_upstream(self.name, "news"):
+            return self.inner.get_news(symbol)
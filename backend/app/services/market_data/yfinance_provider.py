@@ -0,0 +1,81 @@
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence
+
+from app.core.config import settings
+from app.services.market_data.base import MarketDataProvider, Quote
+from app.services.market_data.http import get_http_session
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class YFinanceProvider(MarketDataProvider):
+    """
+    Live market data from Yahoo Finance via yfinance.
+    yfinance (and with it pandas/numpy/requests) is imported on first use,
+    not at worker startup. Every call shares the pooled session from
+    get_http_session(), so connections to Yahoo are reused across requests.
+    """
+
+    name = "yfinance"
+
+    def __init__(self) -> None:
+        self._yf = None
+
+    @property
+    def yf(self):
+        if self._yf is None:
+            import yfinance
+            self._yf = yfinance
+        return self._yf
+
+    def _ticker(self, symbol: str):
+        return self.yf.Ticker(symbol, session=get_http_session())
+
+    def get_quote(self, symbol: str) -> Quote:
+        fast_info = self._ticker(symbol).fast_info
+        return Quote(last_price=fast_info.last_price, currency=fast_info.currency)
+
+    def get_history(self, symbol: str, period: str = "1mo", interval: str = "1d") -> "pd.DataFrame":
+        return self._ticker(symbol).history(period=period, interval=interval)
+
+    def get_history_batch(
+        self, symbols: Sequence[str], period: str = "1mo", interval: str = "1d"
+    ) -> Dict[str, "pd.DataFrame"]:
+        """One bulk yf.download (threaded, chunked by yfinance) instead of a request per symbol."""
+        if not symbols:
+            return {}
+        data = self.yf.download(
+            list(symbols),
+            period=period,
+            interval=interval,
+            group_by="ticker",
+            auto_adjust=True,  # same prices as Ticker.history
+            threads=True,
+            progress=False,
+            timeout=settings.MARKET_DATA_HTTP_TIMEOUT_SECONDS,
+            session=get_http_session(),
+        )
+        if data is None or data.empty:
+            return {}
+
+        result = {}
+        for symbol in symbols:
+            if data.columns.nlevels > 1:
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                df = data[symbol]
+            else:
+                df = data
+            df = df.dropna(how="all")
+            if not df.empty:
+                result[symbol] = df
+        return result
+
+    def get_fundamentals(self, symbol: str) -> Dict[str, Any]:
+        return self._ticker(symbol).info or {}
+
+    def get_calendar(self, symbol: str) -> Dict[str, Any]:
+        return self._ticker(symbol).calendar or {}
+
+    def get_news(self, symbol: str) -> List[Dict[str, Any]]:
+        return self._ticker(symbol).news or []
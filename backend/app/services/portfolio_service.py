@@ -0,0 +1,180 @@
+import logging
+import time
+from bisect import bisect_left
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from sqlalchemy import Float, cast, func
+from sqlalchemy.orm import Session
+
+from app.core.cache import TieredCache
+from app.core.config import settings
+from app.models.trade import Trade, TradeType
+from app.models.user import User
+from app.services.bar_store import MARKET_TIMEZONE, BarStore
+from app.services.securities import normalize_ticker
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EPOCH = date(1970, 1, 1)
+
+# Daily valuation per (user, data_version); extended as new bars arrive
+_history_cache = TieredCache(
+    "portfolio",
+    maxsize=settings.USER_CACHE_MAX_ENTRIES,
+    lock_timeout=settings.CACHE_LOCK_TIMEOUT_SECONDS,
+)
+
+
+def ffill(matrix: "np.ndarray", initial: Optional["np.ndarray"] = None) -> "np.ndarray":
+    """Forward-fill NaN down each column, seeding the first row from `initial`."""
+    import numpy as np
+
+    if initial is not None:
+        matrix = np.vstack([initial, matrix])
+    rows = np.where(~np.isnan(matrix), np.arange(matrix.shape[0])[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    filled = np.take_along_axis(matrix, rows, axis=0)
+    return filled[1:] if initial is not None else filled
+
+
+def _valuation(position: "np.ndarray", cash: "np.ndarray", marks: "np.ndarray", peak: float) -> Dict[str, "np.ndarray"]:
+    import numpy as np
+
+    value = position * np.nan_to_num(marks)
+    net = value.sum(axis=1)
+    nav = cash + net
+    running_peak = np.maximum.accumulate(np.maximum(nav, peak))
+    return {
+        "nav": nav,
+        "net_exposure": net,
+        "gross_exposure": np.abs(value).sum(axis=1),
+        "drawdown": nav - running_peak,
+    }
+
+
+class PortfolioService:
+    @staticmethod
+    def _compute(db: Session, user_id) -> Dict[str, Any]:
+        """Full daily valuation from the first trade to the latest stored bar."""
+        import numpy as np
+
+        trades = db.query(
+            Trade.ticker_symbol,
+            Trade.trade_type,
+            cast(Trade.quantity, Float),
+            cast(Trade.price, Float),
+            func.timezone(MARKET_TIMEZONE, Trade.executed_at),
+        ).filter(Trade.user_id == user_id).order_by(Trade.executed_at, Trade.id).all()
+        if not trades:
+            return {"days": [], "tickers": [], "checked_at": time.time()}
+
+        keys = [normalize_ticker(trade[0]) for trade in trades]
+        tickers = sorted(set(keys))
+        start = trades[0][4].date()
+        try:
+            BarStore.refresh(db, tickers, start)
+        except Exception as e:
+            logger.warning(f"Bar refresh failed, valuing with stored bars only: {e}")
+        bar_days, closes = BarStore.load_closes(db, tickers, start=start)
+
+        # Signed quantity: BUY adds, SELL removes (entries and exits alike), cash is the opposite flow
+        col = np.searchsorted(tickers, keys)
+        trade_days = np.array([(trade[4].date() - EPOCH).days for trade in trades], dtype=np.int64)
+        signed = np.array([
+            trade[2] if trade[1] == TradeType.BUY else -trade[2] for trade in trades
+        ])
+        prices = np.array([trade[3] for trade in trades])
+
+        days = np.union1d(bar_days, trade_days)
+        row = np.searchsorted(days, trade_days)
+        quantity = np.zeros((len(days), len(tickers)))
+        np.add.at(quantity, (row, col), signed)
+        cash = np.zeros(len(days))
+        np.add.at(cash, row, -signed * prices)
+        # Mark at the close; on days without a bar, at the latest close or trade price
+        trade_marks = np.full((len(days), len(tickers)), np.nan)
+        trade_marks[row, col] = prices
+        bar_marks = np.full((len(days), len(tickers)), np.nan)
+        bar_marks[np.searchsorted(days, bar_days)] = closes
+        marks = ffill(np.where(np.isnan(bar_marks), trade_marks, bar_marks))
+
+        position = np.cumsum(quantity, axis=0)
+        cash = np.cumsum(cash)
+        series = _valuation(position, cash, marks, peak=-np.inf)
+        return {
+            "days": days.tolist(),
+            "tickers": tickers,
+            "position": position[-1].tolist(),
+            "cash": float(cash[-1]),
+            "marks": marks[-1].tolist(),
+            "peak": float(np.max(series["nav"])),
+            "checked_at": time.time(),
+            **{name: values.tolist() for name, values in series.items()},
+        }
+
+    @staticmethod
+    def _extend(db: Session, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        A copy of a cached valuation with days of new bars appended, or None if
+        nothing changed. Positions are unchanged (same data_version), so new days
+        only need the closing marks.
+        """
+        import numpy as np
+
+        if not state["days"] or time.time() - state["checked_at"] < settings.BAR_REFRESH_INTERVAL_SECONDS:
+            return None
+        state = {**state, "checked_at": time.time()}
+        last_day = EPOCH + timedelta(days=state["days"][-1])
+        try:
+            BarStore.refresh(db, state["tickers"], last_day)
+        except Exception as e:
+            logger.warning(f"Bar refresh failed: {e}")
+        new_days, closes = BarStore.load_closes(db, state["tickers"], after=last_day)
+        if not len(new_days):
+            return state
+
+        count = len(new_days)
+        marks = ffill(closes, initial=np.asarray(state["marks"], dtype=float)[None, :])
+        position = np.tile(np.asarray(state["position"], dtype=float), (count, 1))
+        cash = np.full(count, state["cash"])
+        series = _valuation(position, cash, marks, peak=state["peak"])
+
+        state["days"] = state["days"] + new_days.tolist()
+        state["marks"] = marks[-1].tolist()
+        state["peak"] = max(state["peak"], float(np.max(series["nav"])))
+        for name, values in series.items():
+            state[name] = state[name] + values.tolist()
+        return state
+
+    @staticmethod
+    def history(db: Session, user: User, since: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Daily mark-to-market history of the user's book: NAV (cumulative realized +
+        unrealized P&L, since deposits are not recorded), net/gross exposure and
+        drawdown from the running NAV peak.
+
+        The whole history is one set of array operations over a (days x tickers)
+        matrix. It is cached per data_version (any trade write invalidates it),
+        and a cached history is only extended with days that have new bars.
+        """
+        key = f"{user.id}:{user.data_version or 0}"
+        state = _history_cache.get(key)
+        if state is None:
+            state = PortfolioService._compute(db, user.id)
+            _history_cache.set(key, state, ttl=settings.PORTFOLIO_CACHE_TTL_SECONDS)
+        else:
+            extended = PortfolioService._extend(db, state)
+            if extended is not None:
+                state = extended
+                _history_cache.set(key, state, ttl=settings.PORTFOLIO_CACHE_TTL_SECONDS)
+
+        first = bisect_left(state["days"], (since - EPOCH).days) if since is not None else 0
+        return {
+            "dates": [(EPOCH + timedelta(days=day)).isoformat() for day in state["days"][first:]],
+            "tickers": state["tickers"],
+            **{name: state.get(name, [])[first:] for name in ("nav", "net_exposure", "gross_exposure", "drawdown")},
+        }
@@ -0,0 +1,65 @@
+"""
+Per-user versioned response cache.
+
+Every mutating endpoint bumps users.data_version in the same transaction as
+its write. User-scoped GET results are cached under
+(user_id, data_version, endpoint, params) and tagged with ETag
+W/"<user_id>:<version>" (Vary: Authorization), so an unchanged view costs
+only the user lookup every authenticated request already does, plus a 304.
+"""
+from typing import Any, Callable, Hashable
+
+import orjson
+from fastapi import Request, Response, status
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.core.cache import TieredCache
+from app.core.config import settings
+from app.core.responses import _default
+from app.models.user import User
+
+_user_cache = TieredCache(
+    "user",
+    maxsize=settings.USER_CACHE_MAX_ENTRIES,
+    lock_timeout=settings.CACHE_LOCK_TIMEOUT_SECONDS,
+)
+
+
+def bump_data_version(db: Session, user: User) -> None:
+    """ユーザーのデータバージョンを更新（コミットは呼び出し側で行う）"""
+    db.query(User).filter(User.id == user.id).update(
+        {User.data_version: User.data_version + 1}, synchronize_session=False
+    )
+
+
+def cached_user_response(
+    request: Request,
+    user: User,
+    namespace: str,
+    params: Hashable,
+    compute: Callable[[], Any],
+    media_type: str = "application/json",
+) -> Response:
+    """
+    Serve a user-scoped GET from the versioned cache.
+    `compute` returns JSON-serializable content, or an already encoded body
+    (bytes) for non-JSON media types; it only runs on a cache miss.
+    """
+    version = user.data_version or 0
+    # The user id keeps a browser shared by two accounts with equal versions from a false 304
+    etag = f'W/"{user.id}:{version}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if deps.etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    key = f"{user.id}:{version}:{namespace}:{params!r}"
+
+    def encode() -> bytes:
+        content = compute()
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+    body = _user_cache.get_or_set(key, encode, ttl=settings.USER_CACHE_TTL_SECONDS)
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,166 @@
+import logging
+from datetime import date, timedelta
+from typing import Any, Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import Float, case, cast, func
+from sqlalchemy.orm import Session
+
+from app.core.cache import TieredCache
+from app.core.config import settings
+from app.models.position import PositionLot
+from app.models.trade import TradeType
+from app.models.user import User
+from app.services.bar_store import BarStore
+from app.services.market_clock import MarketClock
+from app.services.portfolio_service import ffill
+from app.services.securities import normalize_ticker
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Risk report per (user, data_version, trading day, parameters)
+_risk_cache = TieredCache(
+    "risk",
+    maxsize=settings.USER_CACHE_MAX_ENTRIES,
+    lock_timeout=settings.CACHE_LOCK_TIMEOUT_SECONDS,
+)
+
+
+def _open_book(db: Session, user_id: UUID) -> List[Tuple[str, float]]:
+    """Net open quantity per symbol from the lots: longs positive, shorts negative."""
+    signed = case((PositionLot.side == TradeType.BUY, PositionLot.open_quantity), else_=-PositionLot.open_quantity)
+    rows = db.query(PositionLot.ticker_symbol, cast(func.sum(signed), Float)).filter(
+        PositionLot.user_id == user_id,
+        PositionLot.open_quantity > 0,
+    ).group_by(PositionLot.ticker_symbol).all()
+    book: Dict[str, float] = {}
+    for ticker_symbol, quantity in rows:
+        key = normalize_ticker(ticker_symbol)
+        book[key] = book.get(key, 0.0) + quantity
+    return sorted((key, quantity) for key, quantity in book.items() if quantity)
+
+
+class RiskService:
+    @staticmethod
+    def compute(db: Session, user_id: UUID, lookback: int, confidence: float) -> Dict[str, Any]:
+        """
+        Risk of the open book over the last `lookback` daily returns.
+
+        Closes are loaded as one (days x symbols) matrix and transposed to
+        symbols x days; covariance, correlation, portfolio volatility,
+        historical VaR / expected shortfall and each position's contribution
+        to volatility are matrix operations over it. Amounts are in yen of
+        market value (quantity x latest close), so contributions sum to the
+        portfolio's daily volatility.
+        """
+        import numpy as np
+
+        book = _open_book(db, user_id)
+        empty = {"as_of": None, "observations": 0, "tickers": [], "excluded": [], "positions": [], "portfolio": None,
+                 "correlation": [], "covariance": [], "correlated_pairs": []}
+        if not book:
+            return empty
+
+        keys = [key for key, _ in book]
+        # Calendar days covering `lookback` sessions with holidays to spare
+        start = date.today() - timedelta(days=lookback * 7 // 5 + 30)
+        try:
+            BarStore.refresh(db, keys, start)
+        except Exception as e:
+            logger.warning(f"Bar refresh failed, using stored bars only: {e}")
+        days, closes = BarStore.load_closes(db, keys, start=start)
+        if not len(days):
+            return {**empty, "excluded": keys}
+
+        closes = closes[-(lookback + 1):]
+        # Forward-fill single missing sessions (suspensions); a symbol without a full window is left out
+        filled = ffill(closes)
+        complete = ~np.isnan(filled).any(axis=0)
+        excluded = [key for key, ok in zip(keys, complete) if not ok]
+        if complete.sum() == 0 or len(filled) < 3:
+            return {**empty, "excluded": keys}
+
+        tickers = [key for key, ok in zip(keys, complete) if ok]
+        prices = filled[:, complete].T  # symbols x days
+        returns = prices[:, 1:] / prices[:, :-1] - 1.0
+        quantity = np.array([quantity for (_, quantity), ok in zip(book, complete) if ok])
+        value = quantity * prices[:, -1]
+
+        covariance = np.atleast_2d(np.cov(returns))
+        volatility = np.sqrt(np.diag(covariance))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            correlation = covariance / np.outer(volatility, volatility)
+        correlation = np.nan_to_num(correlation)
+        np.fill_diagonal(correlation, 1.0)
+
+        # Daily P&L in yen: covariance-based volatility and its per-position split (Euler allocation)
+        marginal = covariance @ value
+        portfolio_variance = float(value @ marginal)
+        portfolio_volatility = np.sqrt(max(portfolio_variance, 0.0))
+        contribution = value * marginal / portfolio_volatility if portfolio_volatility > 0 else np.zeros_like(value)
+
+        # Historical simulation: today's book replayed over each past day's returns
+        pnl = value @ returns
+        cutoff = np.quantile(pnl, 1.0 - confidence)
+        value_at_risk = max(-float(cutoff), 0.0)
+        expected_shortfall = max(-float(pnl[pnl <= cutoff].mean()), 0.0)
+
+        gross = float(np.abs(value).sum())
+        weights = np.abs(value) / gross if gross > 0 else np.zeros_like(value)
+        herfindahl = float((weights ** 2).sum())
+
+        upper = np.triu_indices(len(tickers), k=1)
+        flagged = np.abs(correlation[upper]) >= settings.RISK_CORRELATION_THRESHOLD
+        pairs = sorted(
+            (
+                {"tickers": [tickers[i], tickers[j]], "correlation": float(correlation[i, j])}
+                for i, j in zip(upper[0][flagged], upper[1][flagged])
+            ),
+            key=lambda pair: -abs(pair["correlation"]),
+        )
+
+        annualize = np.sqrt(TRADING_DAYS_PER_YEAR)
+        return {
+            "as_of": (date(1970, 1, 1) + timedelta(days=int(days[-1]))).isoformat(),
+            "observations": int(returns.shape[1]),
+            "tickers": tickers,
+            "excluded": excluded,
+            "positions": [
+                {
+                    "ticker_symbol": ticker,
+                    "quantity": float(quantity[i]),
+                    "market_value": float(value[i]),
+                    "weight": float(weights[i]),
+                    "volatility": float(volatility[i] * annualize),
+                    "risk_contribution": float(contribution[i]),
+                    "risk_contribution_pct": float(contribution[i] / portfolio_volatility) if portfolio_volatility > 0 else 0.0,
+                }
+                for i, ticker in enumerate(tickers)
+            ],
+            "portfolio": {
+                "net_exposure": float(value.sum()),
+                "gross_exposure": gross,
+                "volatility": float(portfolio_volatility * annualize / gross) if gross > 0 else 0.0,
+                "daily_volatility_amount": float(portfolio_volatility),
+                "confidence": confidence,
+                "value_at_risk": value_at_risk,
+                "expected_shortfall": expected_shortfall,
+                "herfindahl": herfindahl,
+                "effective_positions": 1.0 / herfindahl if herfindahl > 0 else 0.0,
+            },
+            "correlation": correlation.tolist(),
+            "covariance": covariance.tolist(),
+            "correlated_pairs": pairs,
+        }
+
+    @staticmethod
+    def report(db: Session, user: User, lookback: int, confidence: float) -> Dict[str, Any]:
+        """Cached per trading day: bars change once a session, positions bump data_version."""
+        key = f"{user.id}:{user.data_version or 0}:{MarketClock.last_session().isoformat()}:{lookback}:{confidence}"
+        return _risk_cache.get_or_set(
+            key,
+            lambda: RiskService.compute(db, user.id, lookback, confidence),
+            ttl=settings.RISK_CACHE_TTL_SECONDS,
+        )
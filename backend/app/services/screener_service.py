@@ -0,0 +1,242 @@
+import hashlib
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.cache import TieredCache
+from app.core.config import settings
+from app.schemas.stock import ScreenerRequest
+from app.services.bar_cache import CLOSE, DAY, VOLUME, BarCache, stack, weekly_last
+from app.services.market_clock import MarketClock
+from app.services.market_data import get_history_batch, get_market_data_provider
+from app.services.securities import normalize_ticker, upstream_symbol
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Screen results keyed by (criteria hash, time bucket), same bucketing as the analysis checklist
+_screener_cache = TieredCache(
+    "screener",
+    maxsize=settings.ANALYSIS_CACHE_MAX_ENTRIES,
+    lock_timeout=settings.CACHE_LOCK_TIMEOUT_SECONDS,
+)
+
+# The checklist needs 75 daily bars for SMA75
+MIN_DAILY_BARS = 76
+
+
+def _clean(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    value = float(value)
+    return None if math.isnan(value) or math.isinf(value) else round(value, 4)
+
+
+def _fundamentals(symbols: List[str]) -> Dict[str, Dict[str, Optional[float]]]:
+    """PER/PBR/dividend yield per symbol. The upstream has no bulk endpoint, so fetch concurrently."""
+    provider = get_market_data_provider()
+
+    def fetch(symbol: str) -> Dict[str, Optional[float]]:
+        try:
+            info = provider.get_fundamentals(symbol)
+        except Exception as e:
+            logger.warning(f"Failed to fetch fundamentals for {symbol}: {e}")
+            return {}
+        dividend_yield = info.get('dividendYield')
+        if dividend_yield is not None and float(dividend_yield) < 0.5:
+            dividend_yield = float(dividend_yield) * 100
+        return {
+            "per": info.get('forwardPE') or info.get('trailingPE'),
+            "pbr": info.get('priceToBook'),
+            "dividend_yield": dividend_yield,
+        }
+
+    if not symbols:
+        return {}
+    with ThreadPoolExecutor(max_workers=settings.SCREENER_FUNDAMENTALS_WORKERS) as pool:
+        return dict(zip(symbols, pool.map(fetch, symbols)))
+
+
+def _fetched_matrices(symbols: List[str]) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """(close, volume, weekly close) right-aligned matrices from one batch history call."""
+    from app.services import indicators
+
+    frames = get_history_batch(symbols, period="1y")
+    close_frame = indicators.frame_to_matrix(frames, symbols, "Close")
+    close = indicators.right_align(close_frame.to_numpy(dtype=float))
+    volume = indicators.right_align(indicators.frame_to_matrix(frames, symbols, "Volume").to_numpy(dtype=float))
+    weekly = indicators.right_align(indicators.weekly_close(close_frame).to_numpy(dtype=float))
+    return close, volume, weekly
+
+
+def _live_bars(codes: Sequence[str], symbols: Sequence[str], today: date) -> Dict[str, Tuple[float, float]]:
+    """(close, volume) of today's still-trading session per code, from one small batch call."""
+    frames = get_history_batch(list(symbols), period="1d")
+    live = {}
+    for code, symbol in zip(codes, symbols):
+        df = frames.get(symbol)
+        if df is not None and not df.empty and df.index[-1].date() == today:
+            live[code] = (float(df["Close"].iloc[-1]), float(df["Volume"].iloc[-1]))
+    return live
+
+
+def _cached_matrices(codes: List[str], symbols: List[str]) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    Same matrices as _fetched_matrices from the memory-mapped bar cache: each
+    symbol's year of closes and volumes is a view into its mapped file, and
+    stacking the right-aligned matrices is the only copy. Only completed
+    sessions are stored, so while one is trading today's bar is fetched live
+    and appended.
+    """
+    import numpy as np
+
+    now = MarketClock.now()
+    today = now.date()
+    start = today - timedelta(days=364)  # a year, fetched as "1y" like _fetched_matrices
+    mapped = BarCache.ensure(codes, start)
+    live = _live_bars(codes, symbols, today) if MarketClock.state(now).phase != "closed" else {}
+    today_day = (today - date(1970, 1, 1)).days
+
+    closes, volumes, weeklies = [], [], []
+    for code in codes:
+        bars = mapped.get(code)
+        if bars is None and code not in live:
+            closes.append(None)
+            volumes.append(None)
+            weeklies.append(None)
+            continue
+        if bars is not None:
+            days = BarCache.window(bars, DAY, start)
+            close = BarCache.window(bars, CLOSE, start)
+            volume = BarCache.window(bars, VOLUME, start)
+        else:
+            days = close = volume = np.empty(0)
+        if code in live and (not len(days) or days[-1] < today_day):
+            days = np.append(days, today_day)
+            close = np.append(close, live[code][0])
+            volume = np.append(volume, live[code][1])
+        closes.append(close)
+        volumes.append(volume)
+        weeklies.append(weekly_last(days, close))
+    return stack(closes), stack(volumes), stack(weeklies)
+
+
+class ScreenerService:
+    @staticmethod
+    def screen(criteria: ScreenerRequest) -> Dict[str, Any]:
+        """
+        Evaluate the analysis checklist rules across a whole watchlist.
+
+        A year of history for every symbol is stacked into a (days x symbols)
+        matrix, from the memory-mapped bar cache when BAR_CACHE_DIR is set,
+        otherwise from one batch history call; trend, volume and RSI are then
+        computed for all symbols at once. Fundamentals (one request per
+        symbol) are only fetched for symbols that pass the technical filters.
+        """
+        import numpy as np
+        from app.services import indicators
+
+        codes = list(dict.fromkeys(normalize_ticker(code) for code in criteria.tickers if code.strip()))
+        symbols = [upstream_symbol(code) for code in codes]
+
+        if settings.BAR_CACHE_DIR:
+            close, volume, weekly = _cached_matrices(codes, symbols)
+        else:
+            close, volume, weekly = _fetched_matrices(symbols)
+
+        # At most SCREENER_MAX_TICKERS columns: the whole pass takes a few milliseconds, and a
+        # process pool splitting it by symbol was measured slower than computing it here
+        price = indicators.last(close)
+        prev = indicators.last(close, 1)
+        sma25 = indicators.sma(close, 25)
+        sma75 = indicators.sma(close, 75)
+        sma13w = indicators.sma(weekly, 13)
+        weekly_price = indicators.last(weekly)
+        vol_ratio = indicators.ratio(indicators.last(volume), indicators.sma(volume, 5), default=1.0)
+        rsi = indicators.rsi(close, 14)
+        change_pct = indicators.ratio(price - prev, prev) * 100
+        sma25_gap_pct = indicators.ratio(price - sma25, sma25) * 100
+
+        has_data = indicators.bar_count(close) >= MIN_DAILY_BARS
+        mask = has_data.copy()
+        # NaN comparisons are False, so a symbol lacking an indicator fails any filter on it
+        if criteria.above_sma25 is not None:
+            mask &= (price > sma25) == criteria.above_sma25
+        if criteria.above_sma13w is not None:
+            mask &= ~np.isnan(sma13w) & ((weekly_price > sma13w) == criteria.above_sma13w)
+        if criteria.rsi_min is not None:
+            mask &= rsi >= criteria.rsi_min
+        if criteria.rsi_max is not None:
+            mask &= rsi <= criteria.rsi_max
+        if criteria.volume_ratio_min is not None:
+            mask &= vol_ratio >= criteria.volume_ratio_min
+
+        selected = np.flatnonzero(mask)
+        valuation_filter = any(
+            value is not None for value in (criteria.per_max, criteria.pbr_max, criteria.dividend_yield_min)
+        )
+        fundamentals = {}
+        if criteria.include_fundamentals or valuation_filter or criteria.sort_by in ("per", "pbr", "dividend_yield"):
+            fundamentals = _fundamentals([symbols[i] for i in selected])
+
+        rows = []
+        for i in selected:
+            valuation = fundamentals.get(symbols[i], {})
+            row = {
+                "ticker_symbol": codes[i],
+                "price": _clean(price[i]),
+                "change_pct": _clean(change_pct[i]),
+                "sma25": _clean(sma25[i]),
+                "sma75": _clean(sma75[i]),
+                "sma25_gap_pct": _clean(sma25_gap_pct[i]),
+                "sma13w": _clean(sma13w[i]),
+                "trend": "Up" if price[i] > sma25[i] else "Down",
+                "weekly_trend": None if np.isnan(sma13w[i]) else ("Up" if weekly_price[i] > sma13w[i] else "Down"),
+                "volume_ratio": _clean(vol_ratio[i]),
+                "rsi": _clean(rsi[i]),
+                "per": _clean(valuation.get("per")),
+                "pbr": _clean(valuation.get("pbr")),
+                "dividend_yield": _clean(valuation.get("dividend_yield")),
+            }
+            if criteria.per_max is not None and (row["per"] is None or row["per"] > criteria.per_max):
+                continue
+            if criteria.pbr_max is not None and (row["pbr"] is None or row["pbr"] > criteria.pbr_max):
+                continue
+            if criteria.dividend_yield_min is not None and (
+                row["dividend_yield"] is None or row["dividend_yield"] < criteria.dividend_yield_min
+            ):
+                continue
+            rows.append(row)
+
+        # Rows without the sort value go last regardless of direction
+        key = criteria.sort_by
+        present = [row for row in rows if row[key] is not None]
+        absent = [row for row in rows if row[key] is None]
+        present.sort(key=lambda row: row[key], reverse=criteria.descending)
+        rows = present + absent
+        # matched counts every symbol passing the filters, not just the page returned
+        matched = len(rows)
+        if criteria.limit is not None:
+            rows = rows[:criteria.limit]
+
+        return {
+            "screened": int(has_data.sum()),
+            "matched": matched,
+            "missing": [codes[i] for i in np.flatnonzero(~has_data)],
+            "results": rows,
+        }
+
+    @staticmethod
+    def get_cached_screen(criteria: ScreenerRequest) -> Dict[str, Any]:
+        """screen() result, shared across users and workers within an analysis cache bucket."""
+        window, ttl = MarketClock.cache_window(settings.ANALYSIS_CACHE_BUCKET_SECONDS)
+        digest = hashlib.sha1(criteria.model_dump_json().encode()).hexdigest()
+        return _screener_cache.get_or_set(
+            f"{digest}:{window}",
+            lambda: ScreenerService.screen(criteria),
+            ttl=ttl,
+        )
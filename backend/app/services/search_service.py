@@ -0,0 +1,108 @@
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, load_only
+
+from app.models import reflection as reflection_models
+from app.models import trade as trade_models
+
+logger = logging.getLogger(__name__)
+
+SNIPPET_CONTEXT = 40
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _snippet(obj: Any, fields: Sequence[str], query: str) -> Optional[Dict[str, str]]:
+    """Return the first field containing the query and a window of text around the match."""
+    needle = query.lower()
+    for field in fields:
+        text = getattr(obj, field) or ""
+        pos = text.lower().find(needle)
+        if pos < 0:
+            continue
+        start = max(pos - SNIPPET_CONTEXT, 0)
+        end = min(pos + len(query) + SNIPPET_CONTEXT, len(text))
+        snippet = ("…" if start > 0 else "") + text[start:end] + ("…" if end < len(text) else "")
+        return {"field": field, "snippet": snippet}
+    return None
+
+
+class SearchService:
+    @staticmethod
+    def search(db: Session, user_id: UUID, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Search a user's trade rationale and reflection text.
+
+        Matching is a substring ILIKE over the generated search_text columns,
+        served by pg_trgm GIN indexes (trigrams work for Japanese, which has no
+        word boundaries for tsvector to split on). Queries shorter than three
+        characters cannot use the trigram index and fall back to a scan of the
+        user's rows. Hits are ranked by word_similarity and returned with a
+        snippet around the first match.
+        """
+        Trade = trade_models.Trade
+        TradeReflection = reflection_models.TradeReflection
+        pattern = f"%{_escape_like(query)}%"
+
+        trade_score = func.word_similarity(query, Trade.search_text).label("score")
+        trade_rows = (
+            db.query(Trade, trade_score)
+            .options(load_only(
+                Trade.id, Trade.ticker_symbol, Trade.trade_type, Trade.executed_at,
+                *(getattr(Trade, f) for f in trade_models.SEARCH_FIELDS),
+            ))
+            .filter(Trade.user_id == user_id, Trade.search_text.ilike(pattern, escape="\\"))
+            .order_by(trade_score.desc(), Trade.executed_at.desc())
+            .limit(limit)
+            .all()
+        )
+
+        reflection_score = func.word_similarity(query, TradeReflection.search_text).label("score")
+        reflection_rows = (
+            db.query(TradeReflection, Trade.ticker_symbol, Trade.trade_type, Trade.executed_at, reflection_score)
+            .join(Trade, TradeReflection.trade_id == Trade.id)
+            .options(load_only(
+                TradeReflection.trade_id,
+                *(getattr(TradeReflection, f) for f in reflection_models.SEARCH_FIELDS),
+            ))
+            .filter(Trade.user_id == user_id, TradeReflection.search_text.ilike(pattern, escape="\\"))
+            .order_by(reflection_score.desc(), Trade.executed_at.desc())
+            .limit(limit)
+            .all()
+        )
+
+        hits = []
+        for trade, score in trade_rows:
+            match = _snippet(trade, trade_models.SEARCH_FIELDS, query)
+            if match is None:
+                continue
+            hits.append({
+                "trade_id": trade.id,
+                "ticker_symbol": trade.ticker_symbol,
+                "trade_type": trade.trade_type,
+                "executed_at": trade.executed_at,
+                "source": "trade",
+                "score": float(score or 0.0),
+                **match,
+            })
+        for reflection, ticker_symbol, trade_type, executed_at, score in reflection_rows:
+            match = _snippet(reflection, reflection_models.SEARCH_FIELDS, query)
+            if match is None:
+                continue
+            hits.append({
+                "trade_id": reflection.trade_id,
+                "ticker_symbol": ticker_symbol,
+                "trade_type": trade_type,
+                "executed_at": executed_at,
+                "source": "reflection",
+                "score": float(score or 0.0),
+                **match,
+            })
+
+        hits.sort(key=lambda hit: (hit["score"], hit["executed_at"]), reverse=True)
+        return hits[:limit]
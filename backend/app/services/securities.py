@@ -0,0 +1,270 @@
+import asyncio
+import csv
+import io
+import logging
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.security import Security
+
+logger = logging.getLogger(__name__)
+
+# TSE codes: 4 characters, digits or (since 2024) alphanumeric like 130A
+_TSE_CODE = re.compile(r"^\d[0-9A-Z]\d[0-9A-Z]$")
+
+
+def normalize_ticker(ticker_symbol: str) -> str:
+    """Canonical code as stored on trades, bars and securities: upper-case without .T (7203, 130A, ^N225)."""
+    symbol = ticker_symbol.strip().upper()
+    return symbol[:-2] if symbol.endswith(".T") else symbol
+
+
+def upstream_symbol(ticker_symbol: str) -> str:
+    """Symbol for the market data provider: TSE codes get .T, indices and FX pass through (^N225, USDJPY=X)."""
+    code = normalize_ticker(ticker_symbol)
+    return f"{code}.T" if code.isdigit() or _TSE_CODE.match(code) else code
+
+
+def _fold(text: Optional[str]) -> str:
+    """
+    Search form of a code or name: NFKC (full-width ASCII and half-width
+    kana to their standard forms), case-folded, katakana as hiragana so
+    either script matches both.
+    """
+    if not text:
+        return ""
+    folded = unicodedata.normalize("NFKC", text).casefold()
+    return "".join(chr(ord(ch) - 0x60) if "ァ" <= ch <= "ヶ" else ch for ch in folded)
+
+
+class SecurityEntry(NamedTuple):
+    code: str
+    name: str
+    name_kana: Optional[str]
+    market: Optional[str]
+    sector: Optional[str]
+    industry: Optional[str]
+    lot_size: int
+
+
+class _SortedKeys:
+    """Sorted (key, security) pairs; all keys starting with a prefix are one contiguous bisect range."""
+
+    __slots__ = ("keys", "refs")
+
+    def __init__(self, entries: List[tuple]):
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.refs = [ref for _, ref in entries]
+
+    def prefixed(self, prefix: str) -> Iterable[int]:
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and self.keys[i].startswith(prefix):
+            yield self.refs[i]
+            i += 1
+
+
+class SecurityIndex:
+    """
+    In-memory completion index over the securities master.
+
+    Three sorted key lists searched in ranking order: codes, name / kana
+    prefixes, and every suffix of the names (so a prefix match on a suffix
+    is a substring match, e.g. 自動車 finds トヨタ自動車). A sorted list with
+    bisect behaves like a flattened trie: each lookup is a binary search
+    plus one step per returned result, and a search stops as soon as
+    `limit` distinct securities are found.
+    """
+
+    def __init__(self, securities: List[SecurityEntry]):
+        self.securities = securities
+        self._by_code = {security.code: security for security in securities}
+        codes, prefixes, suffixes = [], [], []
+        for i, security in enumerate(securities):
+            codes.append((_fold(security.code), i))
+            for name in {_fold(security.name), _fold(security.name_kana)}:
+                if not name:
+                    continue
+                prefixes.append((name, i))
+                suffixes.extend((name[offset:], i) for offset in range(1, len(name)))
+        self._codes = _SortedKeys(codes)
+        self._prefixes = _SortedKeys(prefixes)
+        self._suffixes = _SortedKeys(suffixes)
+
+    def __len__(self) -> int:
+        return len(self.securities)
+
+    def search(self, query: str, limit: int = 10) -> List[SecurityEntry]:
+        prefix = _fold(normalize_ticker(query))
+        if not prefix:
+            return []
+        found: Dict[int, None] = {}
+        for keys in (self._codes, self._prefixes, self._suffixes):
+            for ref in keys.prefixed(prefix):
+                found.setdefault(ref)
+                if len(found) >= limit:
+                    return [self.securities[ref] for ref in found]
+        return [self.securities[ref] for ref in found]
+
+    def get(self, ticker_symbol: str) -> Optional[SecurityEntry]:
+        return self._by_code.get(normalize_ticker(ticker_symbol))
+
+
+# CSV header aliases: English names or the columns of the TSE listed-company list (data_j)
+_CSV_COLUMNS = {
+    "code": ("code", "コード"),
+    "name": ("name", "銘柄名"),
+    "name_kana": ("name_kana", "銘柄名（カナ）", "カナ"),
+    "market": ("market", "市場・商品区分"),
+    "sector": ("sector", "17業種区分"),
+    "industry": ("industry", "33業種区分"),
+    "lot_size": ("lot_size", "売買単位"),
+}
+
+
+def _decode(raw: bytes) -> str:
+    # JPX distributes Shift_JIS; exports from spreadsheets are usually UTF-8 with a BOM
+    try:
+        return raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return raw.decode("cp932")
+
+
+def _clean(value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip()
+    return None if value in ("", "-") else value
+
+
+def parse_securities_csv(raw: bytes) -> List[dict]:
+    """Rows for the securities table; lines without a code or name are skipped."""
+    reader = csv.DictReader(io.StringIO(_decode(raw)))
+    header = {field.strip(): field for field in reader.fieldnames or []}
+    columns = {
+        column: next((header[alias] for alias in aliases if alias in header), None)
+        for column, aliases in _CSV_COLUMNS.items()
+    }
+    if columns["code"] is None or columns["name"] is None:
+        raise ValueError("Securities CSV needs a code and a name column")
+
+    rows = {}
+    for line in reader:
+        values = {column: _clean(line.get(field)) if field else None for column, field in columns.items()}
+        if not values["code"] or not values["name"]:
+            continue
+        code = normalize_ticker(values["code"])
+        lot_size = values["lot_size"]
+        rows[code] = {
+            **values,
+            "code": code,
+            "lot_size": int(float(lot_size)) if lot_size and lot_size.replace(".", "", 1).isdigit() else 100,
+        }
+    return list(rows.values())
+
+
+_lock = threading.Lock()
+_index: Optional[SecurityIndex] = None
+# (row count, latest updated_at) of the table the index was built from, and when it was last compared
+_version: Optional[tuple] = None
+_checked_at = 0.0
+
+
+def _table_version(db: Session) -> tuple:
+    return tuple(db.query(func.count(Security.code), func.max(Security.updated_at)).one())
+
+
+class SecurityService:
+    @staticmethod
+    def load_csv(db: Session, raw: bytes) -> int:
+        """Upsert the securities master from a listings CSV and rebuild the index. Returns rows loaded."""
+        rows = parse_securities_csv(raw)
+        if rows:
+            # RETURNING lets SQLAlchemy batch the ON CONFLICT executemany into multi-row
+            # VALUES pages; without it each of the ~4000 listings is its own round trip
+            stmt = pg_insert(Security.__table__)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[Security.code],
+                set_={
+                    **{column: stmt.excluded[column] for column in rows[0] if column != "code"},
+                    "updated_at": func.now(),
+                },
+            ).returning(Security.code), rows)
+            db.commit()
+        SecurityService.build_index(db)
+        return len(rows)
+
+    @staticmethod
+    def build_index(db: Session) -> SecurityIndex:
+        global _index, _version
+        # Read before the rows: a load committed in between makes the next check rebuild again
+        version = _table_version(db)
+        securities = [
+            SecurityEntry(*row)
+            for row in db.query(
+                Security.code, Security.name, Security.name_kana, Security.market,
+                Security.sector, Security.industry, Security.lot_size,
+            ).order_by(Security.code)
+        ]
+        index = SecurityIndex(securities)
+        with _lock:
+            _index = index
+            _version = version
+        logger.info(f"Securities index built ({len(index)} securities)")
+        return index
+
+    @staticmethod
+    def get_index(db: Optional[Session] = None) -> SecurityIndex:
+        """The current index, built from the table on first use."""
+        index = _index
+        if index is None:
+            if db is None:
+                return SecurityIndex([])
+            index = SecurityService.build_index(db)
+        return index
+
+    @staticmethod
+    def refresh_if_stale(db: Session) -> bool:
+        """
+        Rebuild the index if the table changed since it was built, e.g. a CSV
+        loaded by another worker or process. Returns whether it was rebuilt.
+        """
+        if _index is not None and _table_version(db) == _version:
+            return False
+        SecurityService.build_index(db)
+        return True
+
+    @staticmethod
+    def _refresh_in_session() -> None:
+        db = SessionLocal()
+        try:
+            SecurityService.refresh_if_stale(db)
+        except Exception as e:
+            logger.warning(f"Securities index freshness check failed: {e}")
+        finally:
+            db.close()
+
+    @staticmethod
+    async def get_current_index() -> SecurityIndex:
+        """
+        get_index() for async endpoints, first rebuilt if the table changed in
+        another worker. The check is one aggregate query run in a thread, at
+        most every SECURITIES_INDEX_CHECK_SECONDS; searches in between only
+        touch memory.
+        """
+        global _checked_at
+        with _lock:
+            due = time.monotonic() - _checked_at >= settings.SECURITIES_INDEX_CHECK_SECONDS
+            if due:
+                _checked_at = time.monotonic()
+        if due:
+            await asyncio.to_thread(SecurityService._refresh_in_session)
+        return SecurityService.get_index()
@@ -1,49 +1,170 @@
-import yfinance as yf
-from datetime import datetime
+import asyncio
+from datetime import date, datetime, timedelta
+import hashlib
 import logging
-from typing import Dict, Any, Optional
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+import orjson
+
+from app.core.cache import TieredCache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.bar_store import BarStore
+from app.services.market_clock import MarketClock
+from app.services.market_data import get_market_data_provider
+from app.services.market_data.async_client import get_async_client
+from app.services.securities import normalize_ticker, upstream_symbol
 
 logger = logging.getLogger(__name__)
 
+# Assembled checklists keyed by (normalized symbol, time bucket or next session open)
+_analysis_cache = TieredCache(
+    "analysis",
+    maxsize=settings.ANALYSIS_CACHE_MAX_ENTRIES,
+    lock_timeout=settings.CACHE_LOCK_TIMEOUT_SECONDS,
+)
+
+# Prices outside trading hours keyed by (normalized symbol, next session open)
+_price_cache = TieredCache(
+    "price",
+    maxsize=settings.ANALYSIS_CACHE_MAX_ENTRIES,
+    lock_timeout=settings.CACHE_LOCK_TIMEOUT_SECONDS,
+)
+
+@dataclass(frozen=True, slots=True)
+class ChecklistItem:
+    """
+    One analysis checklist entry. value is a number, or "Up"/"Down" for
+    trend rows and "Error" for a failed section. Immutable, so fixed entries
+    are built once and shared by every checklist.
+    """
+    label: str
+    value: Union[float, str, None]
+    text: str
+    is_met: bool = False
+    url: Optional[str] = None
+
+
+def _is_complete(analysis: Dict[str, Any]) -> bool:
+    """False when a checklist section failed (its items carry value "Error")."""
+    return not any(item.value == "Error" for items in analysis["checklist"].values() for item in items)
+
+
+_EARNINGS_HISTORY_ITEM = ChecklistItem(
+    label="数年の決算を確認したこと",
+    value=0.0,
+    text="過去数年分の売上・営業利益の推移、キャッシュフロー等を確認しましたか？\n💡通期予想の修正履歴も重要です。",
+)
+
+
 class StockService:
     @staticmethod
     def get_stock_price(ticker_symbol: str) -> Dict[str, Any]:
         """
         Get current stock price for a Japanese stock (TSE).
         If market is open, returns current price.
-        If market is closed, returns latest closing price.
+        If market is closed, returns latest closing price: the stored daily
+        bar of the last session when there is one, without asking upstream,
+        cached until the next session opens.
+        """
+        state = MarketClock.state()
+        if state.is_open:
+            return StockService._live_price(ticker_symbol)
+
+        symbol = normalize_ticker(ticker_symbol)
+        window, ttl = MarketClock.cache_window(settings.ANALYSIS_CACHE_BUCKET_SECONDS)
+
+        def compute() -> Dict[str, Any]:
+            # At lunch the morning close is newer than any stored bar
+            if state.phase == "closed":
+                stored = StockService._stored_close(symbol, state.last_session)
+                if stored is not None:
+                    return stored
+            return StockService._live_price(ticker_symbol)
+
+        result = _price_cache.get_or_set(f"{symbol}:{window}", compute, ttl=ttl)
+        return {**result, "ticker_symbol": ticker_symbol}
+
+    @staticmethod
+    async def get_stock_price_async(ticker_symbol: str) -> Dict[str, Any]:
+        """
+        get_stock_price for async endpoints. While the market is open and the
+        async client is enabled, the live quote is one awaited chart request
+        on the event loop; otherwise (stored closes need the DB, or no async
+        client) the sync path runs in a worker thread.
         """
+        client = get_async_client()
+        if client is None or not MarketClock.state().is_open:
+            # to_thread runs it in a copy of this context, so its DB/upstream time is still counted for the request
+            return await asyncio.to_thread(StockService.get_stock_price, ticker_symbol)
+
+        quote = await client.get_quote(upstream_symbol(ticker_symbol))
+        if quote.last_price is None:
+            raise ValueError(f"Could not fetch price for {ticker_symbol}")
+        return {
+            "ticker_symbol": ticker_symbol,
+            "price": round(quote.last_price, 2),
+            "currency": quote.currency,
+            "timestamp": datetime.now().isoformat(),
+            "source": "chart",
+        }
+
+    @staticmethod
+    def _stored_close(symbol: str, session: date) -> Optional[Dict[str, Any]]:
+        """Close of `session` from the bar store (fetched once if missing); None if unavailable."""
+        if not upstream_symbol(symbol).endswith(".T"):
+            return None  # indices and FX follow other calendars
+        start = session - timedelta(days=7)
+        db = SessionLocal()
         try:
-            # Add .T suffix for Japanese stocks if not present
-            formatted_symbol = ticker_symbol.upper()
-            if not formatted_symbol.endswith('.T'):
-                formatted_symbol = f"{formatted_symbol}.T"
+            try:
+                BarStore.refresh(db, [symbol], start)
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Bar refresh failed for {symbol}: {e}")
+            days, closes = BarStore.load_closes(db, [symbol], start=start)
+        finally:
+            db.close()
+        if not len(days) or int(days[-1]) != (session - date(1970, 1, 1)).days or closes[-1, 0] != closes[-1, 0]:
+            return None
+        return {
+            "ticker_symbol": symbol,
+            "price": round(float(closes[-1, 0]), 2),
+            "currency": "JPY",
+            "timestamp": datetime.now().isoformat(),
+            "source": "stored_close",
+        }
 
-            stock = yf.Ticker(formatted_symbol)
+    @staticmethod
+    def _live_price(ticker_symbol: str) -> Dict[str, Any]:
+        try:
+            formatted_symbol = upstream_symbol(ticker_symbol)
+
+            provider = get_market_data_provider()
             
-            # Get fast info (more reliable for real-time/current data)
-            # info = stock.info # This is sometimes slow, fast_info is better
-            fast_info = stock.fast_info
+            # Get quote (fast_info on yfinance, more reliable for real-time/current data)
+            quote = provider.get_quote(formatted_symbol)
 
             # Check if we can get a price
             current_price = None
             price_source = ""
             
             # Try to get the last price
-            if fast_info.last_price is not None:
-                current_price = fast_info.last_price
+            if quote.last_price is not None:
+                current_price = quote.last_price
                 price_source = "last_price"
             
             # If last_price is not available or 0, fallback to history
             if not current_price:
                 # Get 1 day history
-                hist = stock.history(period="1d")
+                hist = provider.get_history(formatted_symbol, period="1d")
                 if not hist.empty:
                     current_price = hist['Close'].iloc[-1]
                     price_source = "history_close"
                 else:
                     # Get 5 day history if today's data is missing (e.g. holiday morning)
-                    hist = stock.history(period="5d")
+                    hist = provider.get_history(formatted_symbol, period="5d")
                     if not hist.empty:
                         current_price = hist['Close'].iloc[-1]
                         price_source = "history_5d_close"
@@ -53,8 +174,8 @@ class StockService:
 
             return {
                 "ticker_symbol": ticker_symbol,
-                "price": round(current_price, 2), # Japanese stocks usually 0 decimal but some have 0.1
-                "currency": fast_info.currency,
+                "price": round(float(current_price), 2), # Japanese stocks usually 0 decimal but some have 0.1
+                "currency": quote.currency,
                 "timestamp": datetime.now().isoformat(),
                 "source": price_source
             }
@@ -67,21 +188,18 @@ class StockService:
     def get_analysis_data(ticker_symbol: str) -> Dict[str, Any]:
         """
         Fetch data for trade analysis:
-        Returns a structured checklist for Market, Technical, and Fundamental sections.
+        Returns a structured checklist for Market, Technical, and Fundamental sections
+        as lists of ChecklistItem (see schemas.stock.AnalysisResponse for the JSON shape).
         """
         import pandas as pd
         import numpy as np
 
         try:
-            # Add .T suffix for Japanese stocks if not present and it looks like a number
-            formatted_symbol = ticker_symbol.upper()
-            if formatted_symbol.isdigit() or (len(formatted_symbol) == 4 and formatted_symbol.isdigit()):
-                 if not formatted_symbol.endswith('.T'):
-                    formatted_symbol = f"{formatted_symbol}.T"
+            formatted_symbol = upstream_symbol(ticker_symbol)
             
-            stock = yf.Ticker(formatted_symbol)
+            provider = get_market_data_provider()
             
-            checklist = {
+            checklist: Dict[str, List[ChecklistItem]] = {
                 "market": [],
                 "technical": [],
                 "fundamental": []
@@ -97,8 +215,7 @@ class StockService:
             
             for symbol, name in indices.items():
                 try:
-                    idx = yf.Ticker(symbol)
-                    hist = idx.history(period="5d") # Fetch 5 days to confirm trend
+                    hist = provider.get_history(symbol, period="5d") # Fetch 5 days to confirm trend
                     if len(hist) >= 1:
                         current = float(hist['Close'].iloc[-1])
                         change_str = ""
@@ -133,12 +250,11 @@ class StockService:
                         
                         label_text = f"{name}: {current:.2f} {change_str}"
                          # Only add to checklist if there's a significant move or it's a key index
-                        checklist["market"].append({
-                            "label": label_text,
-                            "value": float(current),
-                            "text": f"{trend_text}\n💡{strategy}",
-                            "is_met": False
-                        })
+                        checklist["market"].append(ChecklistItem(
+                            label=label_text,
+                            value=float(current),
+                            text=f"{trend_text}\n💡{strategy}",
+                        ))
 
                 except Exception as e:
                     logger.warning(f"Failed to fetch index {symbol}: {e}")
@@ -146,10 +262,10 @@ class StockService:
             # --- 2. Technical Analysis ---
             try:
                 # Fetch daily data for 1 year
-                hist = stock.history(period="1y")
+                hist = provider.get_history(formatted_symbol, period="1y")
                 
                 # Fetch weekly data for 2 years (approx 104 weeks) to calculate 13w SMA
-                hist_weekly = stock.history(period="2y", interval="1wk")
+                hist_weekly = provider.get_history(formatted_symbol, period="2y", interval="1wk")
                 
                 if not hist.empty and len(hist) > 75:
                     current_price = float(hist['Close'].iloc[-1])
@@ -186,31 +302,28 @@ class StockService:
                     trend_status = "上昇" if current_price > sma25 else "下降"
                     trend_advice = "押し目買いを検討（順張り）。" if current_price > sma25 else "戻り売りを検討（または静観）。"
                     
-                    checklist["technical"].append({
-                        "label": f"日足トレンド: {trend_status} (価格 vs 25日線)",
-                        "value": "Up" if current_price > sma25 else "Down",
-                        "text": f"日足は{trend_status}トレンド (現在値 {current_price:.0f} vs 25日線 {sma25:.0f})。\n💡{trend_advice}",
-                        "is_met": False
-                    })
+                    checklist["technical"].append(ChecklistItem(
+                        label=f"日足トレンド: {trend_status} (価格 vs 25日線)",
+                        value="Up" if current_price > sma25 else "Down",
+                        text=f"日足は{trend_status}トレンド (現在値 {current_price:.0f} vs 25日線 {sma25:.0f})。\n💡{trend_advice}",
+                    ))
 
                     # [ ] 上位足 (Weekly Trend)
                     weekly_advice = "長期トレンドもフォロー。" if "上昇" in weekly_trend_text else "長期は調整局面。短期リバウンド狙いか慎重に。"
-                    checklist["technical"].append({
-                        "label": f"週足トレンド (vs 13週線)",
-                        "value": "Up" if not hist_weekly.empty and current_weekly > sma13w else "Down",
-                        "text": f"{weekly_trend_text}\n💡{weekly_advice}",
-                        "is_met": False
-                    })
+                    checklist["technical"].append(ChecklistItem(
+                        label=f"週足トレンド (vs 13週線)",
+                        value="Up" if not hist_weekly.empty and current_weekly > sma13w else "Down",
+                        text=f"{weekly_trend_text}\n💡{weekly_advice}",
+                    ))
 
                     # [ ] 出来高 (Volume)
                     vol_status = "増加" if vol_ratio > 1.0 else "減少"
                     vol_advice = "トレンドの信頼性が高い。" if vol_ratio > 1.0 else "騙しの可能性に注意。"
-                    checklist["technical"].append({
-                        "label": f"出来高: 前日比{vol_ratio:.1f}倍",
-                        "value": vol_ratio,
-                        "text": f"出来高は5日平均比で{vol_ratio:.1f}倍に{vol_status}。\n💡{vol_advice}",
-                        "is_met": False
-                    })
+                    checklist["technical"].append(ChecklistItem(
+                        label=f"出来高: 前日比{vol_ratio:.1f}倍",
+                        value=vol_ratio,
+                        text=f"出来高は5日平均比で{vol_ratio:.1f}倍に{vol_status}。\n💡{vol_advice}",
+                    ))
 
                     # [ ] インジケーター (RSI)
                     rsi_status = "中立"
@@ -222,25 +335,23 @@ class StockService:
                         rsi_status = "売られすぎ"
                         rsi_advice = "売られすぎ水準。自律反発の可能性あり。"
                     
-                    checklist["technical"].append({
-                        "label": f"RSI(14): {rsi:.1f} ({rsi_status})",
-                        "value": rsi,
-                        "text": f"RSI(14)は{rsi:.1f}で{rsi_status}水準。\n💡{rsi_advice}",
-                        "is_met": False
-                    })
+                    checklist["technical"].append(ChecklistItem(
+                        label=f"RSI(14): {rsi:.1f} ({rsi_status})",
+                        value=rsi,
+                        text=f"RSI(14)は{rsi:.1f}で{rsi_status}水準。\n💡{rsi_advice}",
+                    ))
 
             except Exception as e:
                 logger.error(f"Technical analysis error: {e}")
-                checklist["technical"].append({
-                    "label": "テクニカル分析エラー",
-                    "value": "Error",
-                    "text": f"データ取得エラー: {str(e)}",
-                    "is_met": False
-                })
+                checklist["technical"].append(ChecklistItem(
+                    label="テクニカル分析エラー",
+                    value="Error",
+                    text=f"データ取得エラー: {str(e)}",
+                ))
 
             # --- 3. Fundamental Analysis ---
             try:
-                info = stock.info
+                info = provider.get_fundamentals(formatted_symbol)
                 
                 # [ ] 決算 (Growth)
                 rev_growth = info.get('revenueGrowth')
@@ -254,18 +365,17 @@ class StockService:
                     # Simple growth advice
                     growth_advice = "成長性あり。高PERでも許容される可能性。" if (rev_growth and rev_growth > 0.1) or (earnings_growth and earnings_growth > 0.1) else "成長性は限定的。バリュエーションを重視。"
 
-                    checklist["fundamental"].append({
-                        "label": f"成長性: {full_text}",
-                        "value": float(rev_growth) if rev_growth else 0.0,
-                        "text": f"直近の成長性は {full_text}。\n💡{growth_advice}",
-                        "is_met": False
-                    })
+                    checklist["fundamental"].append(ChecklistItem(
+                        label=f"成長性: {full_text}",
+                        value=float(rev_growth) if rev_growth else 0.0,
+                        text=f"直近の成長性は {full_text}。\n💡{growth_advice}",
+                    ))
 
                 # [ ] 決算日 (Earnings Date)
                 # Try stock.calendar first as it often has future dates that info lacks
                 earnings_date = None
                 try:
-                    cal = stock.calendar
+                    cal = provider.get_calendar(formatted_symbol)
                     if cal and 'Earnings Date' in cal and cal['Earnings Date']:
                         earnings_date = cal['Earnings Date'][0]
                 except:
@@ -290,23 +400,21 @@ class StockService:
                         label_prefix = "前回の決算日"
                         earn_advice = "決算発表直後です。内容と市場の反応を確認してください。"
 
-                    checklist["fundamental"].append({
-                        "label": f"{label_prefix}: {date_str} ({'あと' if days_to_earnings >= 0 else 'から'}{abs(days_to_earnings)}日)",
-                        "value": float(days_to_earnings),
-                        "text": f"{label_prefix}は {date_str} です。\n💡{earn_advice}",
-                        "is_met": False
-                    })
+                    checklist["fundamental"].append(ChecklistItem(
+                        label=f"{label_prefix}: {date_str} ({'あと' if days_to_earnings >= 0 else 'から'}{abs(days_to_earnings)}日)",
+                        value=float(days_to_earnings),
+                        text=f"{label_prefix}は {date_str} です。\n💡{earn_advice}",
+                    ))
 
                 # [ ] セクター (Sector)
                 sector = info.get('sector')
                 industry = info.get('industry')
                 if sector:
-                    checklist["fundamental"].append({
-                        "label": f"セクター: {sector} ({industry})",
-                        "value": 0.0,
-                        "text": f"業種は {sector} - {industry} です。セクター全体の流れ（騰落）も確認しましょう。\n💡同業他社の決算やニュースも材料になります。",
-                        "is_met": False
-                    })
+                    checklist["fundamental"].append(ChecklistItem(
+                        label=f"セクター: {sector} ({industry})",
+                        value=0.0,
+                        text=f"業種は {sector} - {industry} です。セクター全体の流れ（騰落）も確認しましょう。\n💡同業他社の決算やニュースも材料になります。",
+                    ))
 
                 # [ ] バリュエーション (Valuation)
                 forward_pe = info.get('forwardPE') or info.get('trailingPE')
@@ -320,24 +428,22 @@ class StockService:
                     val_label = ", ".join(val_text_parts)
                     val_advice = "割安水準。下値不安は少ない。" if (forward_pe and forward_pe < 15) or (pb_ratio and pb_ratio < 1.0) else "割高または標準的。成長性や材料が必要。"
                     
-                    checklist["fundamental"].append({
-                        "label": f"割安性: {val_label}",
-                        "value": float(forward_pe) if forward_pe else 0.0,
-                        "text": f"バリュエーションは {val_label}。\n💡{val_advice}",
-                        "is_met": False
-                    })
+                    checklist["fundamental"].append(ChecklistItem(
+                        label=f"割安性: {val_label}",
+                        value=float(forward_pe) if forward_pe else 0.0,
+                        text=f"バリュエーションは {val_label}。\n💡{val_advice}",
+                    ))
 
                 # [ ] カタリスト/ニュース (Catalyst)
-                news = stock.news
+                news = provider.get_news(formatted_symbol)
                 if news:
                     latest = news[0]
                     title = latest.get('title') or "ニュース項目あり"
-                    checklist["fundamental"].append({
-                        "label": f"最新ニュース: {title[:30]}...",
-                        "value": 0.0,
-                        "text": f"最新のヘッドライン: {title}\n💡これが株価を動かす材料（カタリスト）になるか検討してください。",
-                        "is_met": False # User to review
-                    })
+                    checklist["fundamental"].append(ChecklistItem(
+                        label=f"最新ニュース: {title[:30]}...",
+                        value=0.0,
+                        text=f"最新のヘッドライン: {title}\n💡これが株価を動かす材料（カタリスト）になるか検討してください。",
+                    ))
 
                 # [ ] 配当 (Dividend)
                 div_yield = info.get('dividendYield')
@@ -347,12 +453,11 @@ class StockService:
                     
                     div_advice = "高配当。インカムゲイン狙いや下支え要因に。" if val >= 3.0 else "配当は限定的。キャピタルゲイン狙い。"
                     
-                    checklist["fundamental"].append({
-                        "label": f"配当利回り: {val:.2f}%",
-                        "value": val,
-                        "text": f"配当利回りは{val:.2f}%。\n💡{div_advice}",
-                        "is_met": False
-                    })
+                    checklist["fundamental"].append(ChecklistItem(
+                        label=f"配当利回り: {val:.2f}%",
+                        value=val,
+                        text=f"配当利回りは{val:.2f}%。\n💡{div_advice}",
+                    ))
                 
                 # [ ] 時価総額 (Market Cap)
                 market_cap = info.get('marketCap')
@@ -369,39 +474,31 @@ class StockService:
                         cap_str = f"{market_cap}円"
                         cap_advice = "超小型株。板が薄い可能性。"
                     
-                    checklist["fundamental"].append({
-                        "label": f"時価総額: {cap_str}",
-                        "value": float(market_cap),
-                        "text": f"時価総額は{cap_str}。\n💡{cap_advice}",
-                        "is_met": False
-                    })
+                    checklist["fundamental"].append(ChecklistItem(
+                        label=f"時価総額: {cap_str}",
+                        value=float(market_cap),
+                        text=f"時価総額は{cap_str}。\n💡{cap_advice}",
+                    ))
 
                 # [ ] Confirm several years of earnings
-                checklist["fundamental"].append({
-                    "label": "数年の決算を確認したこと",
-                    "value": 0.0,
-                    "text": "過去数年分の売上・営業利益の推移、キャッシュフロー等を確認しましたか？\n💡通期予想の修正履歴も重要です。",
-                    "is_met": False
-                })
+                checklist["fundamental"].append(_EARNINGS_HISTORY_ITEM)
 
                 # [ ] Market Consensus Check
                 ticker_only = ticker_symbol.split('.')[0] if '.' in ticker_symbol else ticker_symbol
-                checklist["fundamental"].append({
-                    "label": "市場コンセンサスを確認したか",
-                    "value": 0.0,
-                    "text": "目標株価、アナリスト予想、コンセンサスの推移を確認しましたか？",
-                    "url": f"https://kabuyoho.jp/reportTarget?bcode={ticker_only}",
-                    "is_met": False
-                })
+                checklist["fundamental"].append(ChecklistItem(
+                    label="市場コンセンサスを確認したか",
+                    value=0.0,
+                    text="目標株価、アナリスト予想、コンセンサスの推移を確認しましたか？",
+                    url=f"https://kabuyoho.jp/reportTarget?bcode={ticker_only}",
+                ))
 
             except Exception as e:
                 logger.error(f"Fundamental analysis error: {e}")
-                checklist["fundamental"].append({
-                    "label": "ファンダメンタル分析エラー",
-                    "value": "Error",
-                    "text": f"データ取得エラー: {str(e)}",
-                    "is_met": False
-                })
+                checklist["fundamental"].append(ChecklistItem(
+                    label="ファンダメンタル分析エラー",
+                    value="Error",
+                    text=f"データ取得エラー: {str(e)}",
+                ))
 
             return {
                 "checklist": checklist
@@ -410,3 +507,33 @@ class StockService:
         except Exception as e:
             logger.error(f"Error fetching analysis data for {ticker_symbol}: {str(e)}")
             raise e
+
+    @staticmethod
+    def get_cached_analysis(ticker_symbol: str) -> Tuple[bytes, str, int, bool]:
+        """
+        Return (JSON body, ETag, seconds until expiry, whether every section succeeded).
+        The checklist is identical for every user within a time bucket,
+        so it is computed once per (symbol, bucket) across all workers and
+        served from the in-process or shared cache afterwards. Outside
+        trading hours the bucket lasts until the next session opens.
+        The cache holds the encoded body, so a hit is served as is.
+        A checklist with a failed section is kept for at most
+        ANALYSIS_ERROR_CACHE_SECONDS, so one upstream failure is retried
+        soon instead of being served to everyone for the whole window.
+        """
+        window, expires_in = MarketClock.cache_window(settings.ANALYSIS_CACHE_BUCKET_SECONDS)
+        symbol = normalize_ticker(ticker_symbol)
+
+        def compute() -> Dict[str, Any]:
+            data = StockService.get_analysis_data(ticker_symbol)
+            # orjson encodes the ChecklistItem dataclasses directly
+            body = orjson.dumps(data)
+            return {"body": body, "etag": f'"{hashlib.sha1(body).hexdigest()}"', "complete": _is_complete(data)}
+
+        def ttl_for(entry: Dict[str, Any]) -> float:
+            return expires_in if entry["complete"] else min(expires_in, settings.ANALYSIS_ERROR_CACHE_SECONDS)
+
+        entry = _analysis_cache.get_or_set(f"{symbol}:{window}", compute, ttl_for=ttl_for)
+        complete = entry.get("complete", True)
+        max_age = expires_in if complete else min(expires_in, settings.ANALYSIS_ERROR_CACHE_SECONDS)
+        return entry["body"], entry["etag"], int(max_age), complete
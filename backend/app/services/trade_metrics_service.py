@@ -0,0 +1,350 @@
+import asyncio
+import logging
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import Float, cast, func, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.leader import Leadership
+from app.models.metric import FirstTouch, TradeMetric
+from app.models.trade import Trade, TradeStatus, TradeType
+from app.services.bar_store import MARKET_TIMEZONE, BarStore
+from app.services.portfolio_service import ffill
+from app.services.securities import normalize_ticker
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EPOCH = date(1970, 1, 1)
+
+# Entry rationale fields the attribution can be grouped by
+ATTRIBUTION_GROUPS = {
+    "confidence_level": Trade.confidence_level,
+    "holding_period": Trade.holding_period,
+}
+
+# Sentinel bar offset for "level never touched" in the first-touch reduction
+_NEVER = 1 << 62
+
+
+def _pending_query(db: Session, user_id: Optional[UUID]):
+    """
+    Closed entry trades without metrics, or whose entry/exits changed since
+    their metrics were computed. One row per entry with its exits aggregated
+    (a join grouped by the entry's primary key, so exits are found through
+    ix_trades_related_trade_id rather than by aggregating every exit first).
+    """
+    exit_trade = aliased(Trade)
+    query = (
+        db.query(
+            Trade.id,
+            Trade.user_id,
+            Trade.ticker_symbol,
+            Trade.trade_type,
+            cast(Trade.price, Float),
+            cast(Trade.stop_loss, Float),
+            cast(Trade.target_price, Float),
+            func.timezone(MARKET_TIMEZONE, Trade.executed_at),
+            func.timezone(MARKET_TIMEZONE, func.max(exit_trade.executed_at)),
+            cast(func.sum(exit_trade.quantity * exit_trade.price) / func.sum(exit_trade.quantity), Float),
+        )
+        .join(exit_trade, exit_trade.related_trade_id == Trade.id)
+        .outerjoin(TradeMetric, TradeMetric.trade_id == Trade.id)
+        .filter(
+            Trade.related_trade_id.is_(None),
+            Trade.status == TradeStatus.CLOSED,
+        )
+        .group_by(Trade.id, TradeMetric.trade_id)
+        .having(or_(
+            TradeMetric.trade_id.is_(None),
+            func.max(TradeMetric.computed_at) < func.greatest(Trade.updated_at, func.max(exit_trade.updated_at)),
+        ))
+    )
+    if user_id is not None:
+        query = query.filter(Trade.user_id == user_id)
+    return query
+
+
+def _rolling_beta(returns: "np.ndarray", market: "np.ndarray", window: int, min_periods: int) -> "np.ndarray":
+    """
+    Beta of every column against `market` over the trailing `window` rows
+    ending at each row, from windowed sums of x, y, xy and x^2 (cumulative
+    sums, so O(rows x columns) regardless of the window). Rows where either
+    return is missing are left out; NaN below `min_periods` observations.
+    """
+    import numpy as np
+
+    valid = ~np.isnan(returns) & ~np.isnan(market)[:, None]
+    x = np.where(valid, market[:, None], 0.0)
+    y = np.where(valid, returns, 0.0)
+    end = np.arange(1, len(returns) + 1)
+    begin = np.maximum(end - window, 0)
+
+    def windowed(values):
+        total = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+        return total[end] - total[begin]
+
+    n = windowed(valid.astype(float))
+    sum_x, sum_y = windowed(x), windowed(y)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = (n * windowed(x * y) - sum_x * sum_y) / (n * windowed(x * x) - sum_x ** 2)
+    beta[(n < min_periods) | ~np.isfinite(beta)] = np.nan
+    return beta
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if value != value else value  # NaN -> NULL
+
+
+class TradeMetricsService:
+    @staticmethod
+    def compute(
+        trades: List[tuple],
+        days: "np.ndarray",
+        bars: Dict[str, "np.ndarray"],
+        keys: List[str],
+        benchmark: str,
+    ) -> List[Dict[str, Any]]:
+        """
+        Metrics for every trade in one pass over the bars.
+
+        Each trade's holding window (entry session through last exit session)
+        is gathered from the (days x symbols) high/low matrices into one flat
+        ragged array; per-window max/min and first stop/target touch are then
+        segment reductions (ufunc.reduceat) over it.
+
+        The return is split against the benchmark column: beta is the rolling
+        beta up to the session before entry, the market component is
+        beta x the benchmark's return from that session's close to the exit
+        session's close (sign-flipped for shorts), and alpha is the rest.
+        `trades` rows are (id, user_id, ticker, side, entry price, stop,
+        target, entered_at, exited_at, exit price).
+        """
+        import numpy as np
+
+        count = len(trades)
+        col = np.searchsorted(keys, [normalize_ticker(trade[2]) for trade in trades])
+        entry_day = np.array([(trade[7].date() - EPOCH).days for trade in trades], dtype=np.int64)
+        exit_day = np.array([(trade[8].date() - EPOCH).days for trade in trades], dtype=np.int64)
+        first = np.searchsorted(days, entry_day, side="left")
+        length = np.searchsorted(days, exit_day, side="right") - first
+        length = np.maximum(length, 0)
+
+        window = length > 0
+        offsets = np.concatenate([[0], np.cumsum(length)[:-1]])
+        total = int(length.sum())
+        # Flat position of every window bar: column-major so each symbol's days are contiguous
+        step = np.arange(total) - np.repeat(offsets, length)
+        flat = np.repeat(col * len(days) + first, length) + step
+        highs = bars["high"].T.ravel()[flat]
+        lows = bars["low"].T.ravel()[flat]
+
+        entry = np.array([trade[4] for trade in trades], dtype=float)
+        exit_price = np.array([trade[9] for trade in trades], dtype=float)
+        stop = np.array([np.nan if trade[5] is None else trade[5] for trade in trades], dtype=float)
+        target = np.array([np.nan if trade[6] is None else trade[6] for trade in trades], dtype=float)
+        long = np.array([trade[3] == TradeType.BUY for trade in trades])
+        direction = np.where(long, 1.0, -1.0)
+
+        high_max = np.full(count, np.nan)
+        low_min = np.full(count, np.nan)
+        first_stop = np.full(count, _NEVER, dtype=np.int64)
+        first_target = np.full(count, _NEVER, dtype=np.int64)
+        if total:
+            starts = offsets[window]
+            # fmax/fmin skip NaN (days the symbol has no bar)
+            high_max[window] = np.fmax.reduceat(highs, starts)
+            low_min[window] = np.fmin.reduceat(lows, starts)
+            # A long is stopped when the low reaches the stop and hits its target on the high; a short the reverse
+            long_bar = np.repeat(long, length)
+            stop_bar = np.repeat(stop, length)
+            target_bar = np.repeat(target, length)
+            stop_hit = np.where(long_bar, lows <= stop_bar, highs >= stop_bar)
+            target_hit = np.where(long_bar, highs >= target_bar, lows <= target_bar)
+            first_stop[window] = np.minimum.reduceat(np.where(stop_hit, step, _NEVER), starts)
+            first_target[window] = np.minimum.reduceat(np.where(target_hit, step, _NEVER), starts)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            favorable = np.maximum(np.where(long, high_max - entry, entry - low_min), 0)
+            adverse = np.maximum(np.where(long, entry - low_min, high_max - entry), 0)
+            realized = direction * (exit_price - entry)
+            risk = direction * (entry - stop)
+            capture = np.where(favorable > 0, realized / favorable, np.nan)
+            r_multiple = np.where(risk > 0, realized / risk, np.nan)
+            favorable_pct = favorable / entry
+            adverse_pct = adverse / entry
+
+        # Benchmark attribution (needs a close before entry: `first` >= 1 for the return, >= 2 for beta)
+        close = ffill(bars["close"])
+        returns = close[1:] / close[:-1] - 1.0
+        market = keys.index(benchmark)
+        beta_rows = _rolling_beta(returns, returns[:, market], settings.BETA_LOOKBACK_DAYS, settings.BETA_MIN_OBSERVATIONS)
+        before = first - 1
+        last_row = np.minimum(first + length - 1, len(days) - 1)
+        beta = np.full(count, np.nan)
+        has_beta = window & (before >= 1)
+        beta[has_beta] = beta_rows[before[has_beta] - 1, col[has_beta]]
+        benchmark_return = np.full(count, np.nan)
+        has_return = window & (before >= 0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            benchmark_return[has_return] = close[last_row[has_return], market] / close[before[has_return], market] - 1.0
+            trade_return = realized / entry
+            market_return = direction * beta * benchmark_return
+            alpha = trade_return - market_return
+
+        touched = np.minimum(first_stop, first_target)
+        touch_kind = np.where(first_stop < first_target, 0, np.where(first_target < first_stop, 1, 2))
+        any_touch = touched < _NEVER
+        touch_day = np.zeros(count, dtype=np.int64)
+        touch_day[any_touch] = days[first[any_touch] + touched[any_touch]]
+        kinds = (FirstTouch.STOP_LOSS, FirstTouch.TARGET_PRICE, FirstTouch.SAME_BAR)
+
+        rows = []
+        for i, trade in enumerate(trades):
+            hit = bool(any_touch[i])
+            rows.append({
+                "trade_id": trade[0],
+                "user_id": trade[1],
+                "ticker_symbol": trade[2],
+                "entered_on": trade[7].date(),
+                "exited_on": trade[8].date(),
+                "exit_price": float(exit_price[i]),
+                "bars": int(length[i]),
+                "max_favorable_excursion": _optional(float(favorable[i])),
+                "max_adverse_excursion": _optional(float(adverse[i])),
+                "max_favorable_excursion_pct": _optional(float(favorable_pct[i])),
+                "max_adverse_excursion_pct": _optional(float(adverse_pct[i])),
+                "capture_ratio": _optional(float(capture[i])),
+                "r_multiple": _optional(float(r_multiple[i])),
+                "trade_return": _optional(float(trade_return[i])),
+                "benchmark_return": _optional(float(benchmark_return[i])),
+                "beta": _optional(float(beta[i])),
+                "market_return": _optional(float(market_return[i])),
+                "alpha": _optional(float(alpha[i])),
+                "first_touch": kinds[touch_kind[i]] if hit else None,
+                "first_touch_on": EPOCH + timedelta(days=int(touch_day[i])) if hit else None,
+            })
+        return rows
+
+    @staticmethod
+    def refresh(db: Session, user_id: Optional[UUID] = None) -> int:
+        """
+        Compute metrics for newly closed (or since edited) trades of one user, or
+        of every user when user_id is None. Bars come from the local store,
+        fetched in one batch for any missing range. Trades whose last exit is
+        newer than their symbol's latest stored bar wait for a later run.
+        Returns the number of trades written.
+        """
+        import numpy as np
+
+        trades = _pending_query(db, user_id).all()
+        if not trades:
+            return 0
+        benchmark = normalize_ticker(settings.BENCHMARK_TICKER)
+        keys = sorted({normalize_ticker(trade[2]) for trade in trades} | {benchmark})
+        # Enough history before the first entry for the rolling beta
+        start = min(trade[7].date() for trade in trades) - timedelta(days=settings.BETA_LOOKBACK_DAYS * 7 // 5 + 30)
+        end = max(trade[8].date() for trade in trades)
+        try:
+            BarStore.refresh(db, keys, start)
+        except Exception as e:
+            logger.warning(f"Bar refresh failed, using stored bars only: {e}")
+        days, bars = BarStore.load_fields(db, keys, ("high", "low", "close"), start=start, end=end)
+
+        # Latest stored bar per symbol: exits after it (or after the benchmark's) are not fully covered yet.
+        # A benchmark with no bars at all does not hold back MFE/MAE; attribution is left empty then.
+        has_bar = ~np.isnan(bars["close"])
+        last_row = np.where(has_bar.any(axis=0), len(days) - 1 - np.argmax(has_bar[::-1], axis=0), -1)
+        covered_until = {key: (int(days[row]) if row >= 0 else -1) for key, row in zip(keys, last_row)}
+        benchmark_until = covered_until[benchmark] if covered_until[benchmark] >= 0 else np.iinfo(np.int64).max
+        ready = [
+            trade for trade in trades
+            if (trade[8].date() - EPOCH).days <= min(covered_until[normalize_ticker(trade[2])], benchmark_until)
+        ]
+        if not ready:
+            return 0
+
+        rows = TradeMetricsService.compute(ready, days, bars, keys, benchmark)
+        # Core executemany (every row has every key), one statement to compile. SQLAlchemy only
+        # batches an ON CONFLICT insert into multi-row VALUES pages when it has RETURNING,
+        # otherwise psycopg2 sends one statement per row
+        stmt = pg_insert(TradeMetric.__table__)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[TradeMetric.trade_id],
+            set_={
+                **{column: stmt.excluded[column] for column in rows[0] if column != "trade_id"},
+                "computed_at": func.now(),
+            },
+        ).returning(TradeMetric.trade_id), rows)
+        db.commit()
+        logger.info(f"Computed metrics for {len(rows)} trades ({len(trades) - len(rows)} waiting for bars)")
+        return len(rows)
+
+    @staticmethod
+    def attribution(db: Session, user_id: UUID, group_by: str) -> List[Dict[str, Any]]:
+        """Average return split (market / alpha) per confidence_level or holding_period, aggregated in SQL."""
+        column = ATTRIBUTION_GROUPS[group_by]
+        rows = (
+            db.query(
+                column,
+                func.count(TradeMetric.trade_id),
+                func.avg(TradeMetric.trade_return),
+                func.avg(TradeMetric.market_return),
+                func.avg(TradeMetric.alpha),
+                func.avg(TradeMetric.beta),
+                cast(func.count(TradeMetric.alpha).filter(TradeMetric.alpha > 0), Float) / func.nullif(func.count(TradeMetric.alpha), 0),
+            )
+            .join(Trade, Trade.id == TradeMetric.trade_id)
+            .filter(TradeMetric.user_id == user_id)
+            .group_by(column)
+            .order_by(column)
+            .all()
+        )
+        return [
+            {
+                "group": None if group is None else str(group),
+                "trades": trades,
+                "average_return": average_return,
+                "average_market_return": average_market_return,
+                "average_alpha": average_alpha,
+                "average_beta": average_beta,
+                "positive_alpha_rate": positive_alpha_rate,
+            }
+            for group, trades, average_return, average_market_return, average_alpha, average_beta, positive_alpha_rate in rows
+        ]
+
+    @staticmethod
+    def list_for_user(db: Session, user_id: UUID) -> List[TradeMetric]:
+        return db.query(TradeMetric).filter(TradeMetric.user_id == user_id).order_by(TradeMetric.exited_on.desc()).all()
+
+
+async def run_trade_metrics_job() -> None:
+    """
+    Background task: compute metrics for trades closed by any user every
+    TRADE_METRICS_INTERVAL_SECONDS, on the elected leader worker only.
+    """
+    loop = asyncio.get_running_loop()
+    leadership = Leadership("trade-metrics")
+
+    def run() -> int:
+        db = SessionLocal()
+        try:
+            return TradeMetricsService.refresh(db)
+        finally:
+            db.close()
+
+    while True:
+        await asyncio.sleep(settings.TRADE_METRICS_INTERVAL_SECONDS)
+        try:
+            if not await loop.run_in_executor(None, leadership.acquire):
+                continue
+            await loop.run_in_executor(None, run)
+        except Exception as e:
+            logger.error(f"Trade metrics job failed: {e}")
@@ -0,0 +1,44 @@
+"""
+Hermetic benchmark of StockService.get_analysis_data against on-disk fixtures.
+
+    python benchmarks/make_fixtures.py --out /tmp/md 7203 6758
+    python benchmarks/bench_analysis.py --fixtures /tmp/md --iterations 50 7203 6758
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.market_data import set_market_data_provider  # noqa: E402
+from app.services.market_data.fixture_provider import FixtureProvider  # noqa: E402
+from app.services.stock_service import StockService  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", default="fixtures/market_data")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("codes", nargs="+")
+    args = parser.parse_args()
+
+    set_market_data_provider(FixtureProvider(args.fixtures))
+
+    timings = []
+    for _ in range(args.iterations):
+        for code in args.codes:
+            start = time.perf_counter()
+            StockService.get_analysis_data(code)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    print(f"calls={len(timings)} "
+          f"mean={statistics.mean(timings):.2f}ms "
+          f"p50={timings[len(timings) // 2]:.2f}ms "
+          f"p95={timings[int(len(timings) * 0.95) - 1]:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Concurrent quote fetches through the async chart client versus the sync
+path (one worker thread per in-flight call), against the local Yahoo stub.
+
+    python benchmarks/bench_async_quotes.py --symbols 500 --latency 0.05
+    python benchmarks/bench_async_quotes.py --fixtures /tmp/md 7203.T ^N225
+
+With --fixtures the stub serves the fixture directory and the async
+client's history is compared with FixtureProvider for the given symbols.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.services.market_data.async_client import AsyncYahooClient  # noqa: E402
+from app.services.market_data.http import build_session  # noqa: E402
+from yahoo_stub import serve  # noqa: E402
+
+STUB = os.path.join(os.path.dirname(__file__), "yahoo_stub.py")
+
+
+def _start_stub(latency: float):
+    """The stub in its own process, so its threads and GIL stay out of the measurement."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen([sys.executable, STUB, "--port", str(port), "--latency", str(latency)], stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("stub did not start")
+
+
+def _peak_threads(run):
+    peak = [threading.active_count()]
+    done = threading.Event()
+
+    def watch():
+        while not done.wait(0.005):
+            peak[0] = max(peak[0], threading.active_count())
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    start = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - start
+    done.set()
+    watcher.join()
+    return result, elapsed, peak[0] - 2  # minus the main thread and the watcher
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub think time per request (seconds)")
+    parser.add_argument("--threads", type=int, default=40, help="worker threads for the sync path (anyio's default)")
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--fixtures")
+    parser.add_argument("codes", nargs="*")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        _, port = serve(fixtures=args.fixtures)
+        base_url = f"http://127.0.0.1:{port}"
+        from app.services.market_data.fixture_provider import FixtureProvider
+
+        fixtures = FixtureProvider(args.fixtures)
+
+        async def compare():
+            client = AsyncYahooClient(base_url=base_url)
+            try:
+                for symbol in args.codes:
+                    quote = await client.get_quote(symbol)
+                    expected = fixtures.get_history(symbol, period="1y")
+                    got = await client.get_history(symbol, period="1y")
+                    diff = (got["Close"].values - expected["Close"].values).max() if len(got) == len(expected) else float("nan")
+                    print(f"{symbol}: quote={quote.last_price} rows={len(got)}/{len(expected)} "
+                          f"max close diff={diff:.3g} last={got.index[-1]}")
+            finally:
+                await client.aclose()
+
+        asyncio.run(compare())
+        return
+
+    process, base_url = _start_stub(args.latency)
+    symbols = [f"{1300 + i}.T" for i in range(args.symbols)]
+
+    session = build_session(pool_size=args.threads)
+
+    def sync_quote(symbol):
+        response = session.get(f"{base_url}/v8/finance/chart/{symbol}", params={"range": "5d", "interval": "1d"})
+        return response.json()["chart"]["result"][0]["meta"]["regularMarketPrice"]
+
+    def run_threads():
+        with ThreadPoolExecutor(args.threads) as pool:
+            return list(pool.map(sync_quote, symbols))
+
+    async def fetch_async():
+        client = AsyncYahooClient(base_url=base_url, max_connections=args.connections)
+        try:
+            return await client.get_quotes(symbols)
+        finally:
+            await client.aclose()
+
+    prices, elapsed, threads = _peak_threads(run_threads)
+    print(f"threads   symbols={len(prices)} wall={elapsed * 1000:.0f}ms worker_threads={threads}")
+    quotes, elapsed, threads = _peak_threads(lambda: asyncio.run(fetch_async()))
+    print(f"asyncio   symbols={len(quotes)} wall={elapsed * 1000:.0f}ms worker_threads={threads} "
+          f"connections<={args.connections}")
+    process.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Handshakes and latency of outbound HTTP with and without the shared pooled
+session, against a local HTTPS server with a throwaway self-signed
+certificate (no network access needed).
+
+    python benchmarks/bench_http_pool.py --requests 500 --threads 8
+
+"per-request" opens a new requests.Session for every call, as a library
+default would; "pooled" uses build_session() from the market-data HTTP
+module. Handshakes are counted on the server (accepted TLS connections).
+"""
+import argparse
+import datetime
+import os
+import ssl
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.market_data.http import build_session  # noqa: E402
+
+BODY = b'{"chart":{"result":[{"meta":{"regularMarketPrice":2500.0,"currency":"JPY"}}]}}'
+
+
+def _self_signed(directory: str) -> str:
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=1)).not_valid_after(now + datetime.timedelta(hours=1))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost")]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    path = os.path.join(directory, "cert.pem")
+    with open(path, "wb") as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    return path
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve(cert: str, latency: float) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("localhost", 0), _Handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.latency = latency
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _run(label: str, server: ThreadingHTTPServer, cert: str, call, count: int, threads: int) -> None:
+    url = f"https://localhost:{server.server_address[1]}/v8/finance/chart/7203.T"
+    server.connections = 0
+
+    def timed(_):
+        start = time.perf_counter()
+        response = call(url, cert)
+        response.raise_for_status()
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        timings = sorted(pool.map(timed, range(count)))
+    total = time.perf_counter() - start
+    print(f"{label:<12} requests={count} handshakes={server.connections} "
+          f"p50={statistics.median(timings):.2f}ms p95={timings[int(len(timings) * 0.95) - 1]:.2f}ms "
+          f"throughput={count / total:.0f}/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.0, help="server think time per request (seconds)")
+    args = parser.parse_args()
+
+    import requests
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert = _self_signed(directory)
+        server = _serve(cert, args.latency)
+
+        def per_request(url, verify):
+            with requests.Session() as session:
+                return session.get(url, verify=verify, timeout=10)
+
+        pooled_session = build_session(pool_size=args.threads)
+
+        def pooled(url, verify):
+            return pooled_session.get(url, verify=verify)
+
+        _run("per-request", server, cert, per_request, args.requests, args.threads)
+        _run("pooled", server, cert, pooled, args.requests, args.threads)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
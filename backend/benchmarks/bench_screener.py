@@ -0,0 +1,50 @@
+"""
+Hermetic benchmark of the watchlist screener against on-disk fixtures,
+optionally compared with running the per-ticker analysis serially.
+
+    python benchmarks/make_fixtures.py --out /tmp/md $(seq 1301 1800)
+    python benchmarks/bench_screener.py --fixtures /tmp/md --serial $(seq 1301 1800)
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.schemas.stock import ScreenerRequest  # noqa: E402
+from app.services.market_data import set_market_data_provider  # noqa: E402
+from app.services.market_data.fixture_provider import FixtureProvider  # noqa: E402
+from app.services.screener_service import ScreenerService  # noqa: E402
+from app.services.stock_service import StockService  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", default="fixtures/market_data")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--serial", action="store_true", help="also time get_analysis_data per ticker")
+    parser.add_argument("codes", nargs="+")
+    args = parser.parse_args()
+
+    set_market_data_provider(FixtureProvider(args.fixtures))
+    criteria = ScreenerRequest(tickers=args.codes, above_sma25=True, rsi_max=70, volume_ratio_min=1.0)
+
+    timings = []
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        result = ScreenerService.screen(criteria)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"screener symbols={len(args.codes)} matched={result['matched']} "
+          f"mean={statistics.mean(timings):.1f}ms min={min(timings):.1f}ms")
+
+    if args.serial:
+        start = time.perf_counter()
+        for code in args.codes:
+            StockService.get_analysis_data(code)
+        print(f"serial analysis symbols={len(args.codes)} total={(time.perf_counter() - start) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
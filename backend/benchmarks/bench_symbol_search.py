@@ -0,0 +1,67 @@
+"""
+Latency of the in-memory securities index used by GET /stock/search.
+
+    python benchmarks/bench_symbol_search.py --csv data_j.csv
+    python benchmarks/bench_symbol_search.py            # synthetic 4,000 listings
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.securities import SecurityEntry, SecurityIndex, parse_securities_csv  # noqa: E402
+
+KANA = "アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワン"
+WORDS = ("自動車", "銀行", "電機", "ホールディングス", "製薬", "商事", "不動産", "化学", "電力", "建設")
+
+
+def synthetic(count: int) -> list:
+    rng = random.Random(0)
+    rows = []
+    for i in range(count):
+        kana = "".join(rng.choice(KANA) for _ in range(rng.randint(2, 6)))
+        rows.append({
+            "code": str(1301 + i * 2), "name": kana + rng.choice(WORDS), "name_kana": kana,
+            "market": "プライム", "sector": None, "industry": None, "lot_size": 100,
+        })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv")
+    parser.add_argument("--count", type=int, default=4000)
+    parser.add_argument("--queries", type=int, default=20000)
+    args = parser.parse_args()
+
+    if args.csv:
+        with open(args.csv, "rb") as f:
+            rows = parse_securities_csv(f.read())
+    else:
+        rows = synthetic(args.count)
+    start = time.perf_counter()
+    index = SecurityIndex([SecurityEntry(**row) for row in rows])
+    print(f"build securities={len(index)} {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    rng = random.Random(1)
+    queries = []
+    for _ in range(args.queries):
+        row = rng.choice(rows)
+        source = rng.choice((row["code"], row["name"], row["name"][1:]))
+        queries.append(source[:rng.randint(1, max(1, len(source)))])
+    timings = []
+    for query in queries:
+        begin = time.perf_counter()
+        index.search(query, 10)
+        timings.append((time.perf_counter() - begin) * 1e6)
+    timings.sort()
+    print(f"search queries={len(queries)} mean={statistics.mean(timings):.1f}us "
+          f"p50={timings[len(timings) // 2]:.1f}us p99={timings[int(len(timings) * 0.99)]:.1f}us max={timings[-1]:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
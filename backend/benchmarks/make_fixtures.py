@@ -0,0 +1,86 @@
+"""
+Generate deterministic synthetic market-data fixtures in the FixtureProvider layout.
+
+    python benchmarks/make_fixtures.py --out fixtures/market_data 7203 6758 9984
+
+Prices are a seeded random walk per symbol, so every run produces identical files.
+"""
+import argparse
+import json
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+
+INDICES = ["^N225", "^DJI", "USDJPY=X", "^VIX"]
+PERIOD_DAYS = {"1d": 1, "5d": 5, "1y": 245}
+
+
+def _daily_bars(symbol: str, days: int) -> pd.DataFrame:
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+    start = 1000.0 + rng.random() * 4000.0
+    close = start * np.exp(np.cumsum(rng.normal(0, 0.015, days)))
+    open_ = close * (1 + rng.normal(0, 0.005, days))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.007, days)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.007, days)))
+    volume = rng.integers(100_000, 5_000_000, days)
+    index = pd.bdate_range(end="2025-12-19", periods=days, tz="Asia/Tokyo", name="Date")
+    return pd.DataFrame(
+        {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume},
+        index=index,
+    )
+
+
+def _write_json(directory: str, filename: str, data) -> None:
+    with open(os.path.join(directory, filename), "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def write_symbol(root: str, symbol: str, is_index: bool = False) -> None:
+    directory = os.path.join(root, symbol)
+    os.makedirs(directory, exist_ok=True)
+
+    daily = _daily_bars(symbol, 520)
+    for period, days in PERIOD_DAYS.items():
+        daily.tail(days).to_csv(os.path.join(directory, f"history_{period}_1d.csv"))
+    weekly = daily.resample("W-FRI").agg(
+        {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+    )
+    weekly.to_csv(os.path.join(directory, "history_2y_1wk.csv"))
+
+    _write_json(directory, "quote.json", {"last_price": float(daily["Close"].iloc[-1]), "currency": "JPY"})
+    if is_index:
+        return
+
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()) + 1)
+    _write_json(directory, "info.json", {
+        "revenueGrowth": round(float(rng.normal(0.05, 0.1)), 4),
+        "earningsGrowth": round(float(rng.normal(0.05, 0.2)), 4),
+        "sector": "Industrials",
+        "industry": "Machinery",
+        "forwardPE": round(float(rng.uniform(5, 40)), 2),
+        "priceToBook": round(float(rng.uniform(0.5, 4)), 2),
+        "dividendYield": round(float(rng.uniform(0, 5)), 2),
+        "marketCap": int(rng.integers(10**10, 10**13)),
+        "earningsTimestamp": 1766102400,
+    })
+    _write_json(directory, "calendar.json", {})
+    _write_json(directory, "news.json", [{"title": f"{symbol} synthetic headline"}])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="fixtures/market_data")
+    parser.add_argument("codes", nargs="+", help="TSE codes, e.g. 7203")
+    args = parser.parse_args()
+
+    for symbol in INDICES:
+        write_symbol(args.out, symbol, is_index=True)
+    for code in args.codes:
+        write_symbol(args.out, code if code.endswith(".T") else f"{code}.T")
+    print(f"Wrote fixtures for {len(args.codes)} symbols (+{len(INDICES)} indices) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Cold-start benchmark based on `python -X importtime`.
+
+    python benchmarks/startup_importtime.py --repeat 5 --max-ms 800
+
+Imports the app module in fresh interpreters, reports wall time and the
+slowest imports, and checks that the market-data stack (yfinance, pandas,
+numpy) is not loaded at startup. Exits non-zero when a limit is exceeded,
+so it can run in CI to track regressions.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+HEAVY_MODULES = ("yfinance", "pandas", "numpy")
+
+
+def run_once(module: str):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(f"import {module} failed")
+
+    imports = []
+    for line in proc.stderr.splitlines():
+        # "import time:      self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append((name.strip(), int(self_us), int(cumulative_us)))
+    return wall_ms, imports
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if median wall time exceeds this")
+    args = parser.parse_args()
+
+    walls = []
+    imports = []
+    for _ in range(args.repeat):
+        wall_ms, imports = run_once(args.module)
+        walls.append(wall_ms)
+
+    total_us = sum(self_us for _, self_us, _ in imports)
+    median_ms = statistics.median(walls)
+    print(f"import {args.module}: median wall {median_ms:.1f}ms "
+          f"(min {min(walls):.1f}ms, max {max(walls):.1f}ms), "
+          f"import time {total_us / 1000:.1f}ms, {len(imports)} modules")
+
+    top_level = {}
+    for name, _, cumulative_us in imports:
+        root = name.split(".")[0]
+        top_level[root] = max(top_level.get(root, 0), cumulative_us)
+    print("\nslowest top-level packages (cumulative):")
+    for root, cumulative_us in sorted(top_level.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f}ms  {root}")
+
+    failed = False
+    loaded_heavy = [m for m in HEAVY_MODULES if m in top_level]
+    if loaded_heavy:
+        print(f"\nFAIL: imported at startup: {', '.join(loaded_heavy)}")
+        failed = True
+    if args.max_ms is not None and median_ms > args.max_ms:
+        print(f"\nFAIL: median wall time {median_ms:.1f}ms > {args.max_ms:.1f}ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Local stand-in for Yahoo Finance's /v8/finance/chart endpoint, for running
+the async market-data client offline.
+
+    python benchmarks/yahoo_stub.py --port 8765 --fixtures /tmp/md
+    MARKET_DATA_ASYNC=true MARKET_DATA_YAHOO_BASE_URL=http://127.0.0.1:8765 uvicorn app.main:app
+
+With --fixtures, charts are served from the FixtureProvider layout
+(quote.json and history_<range>_<interval>.csv per symbol), so results can
+be compared with the fixture provider. Symbols without fixtures (or with no
+--fixtures at all) get a deterministic synthetic random walk; --latency adds
+server think time per request to mimic the real round trip.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+_RANGE_DAYS = {"1d": 1, "5d": 5, "1mo": 21, "3mo": 63, "6mo": 126, "1y": 250, "2y": 500, "5y": 1250, "10y": 2500, "max": 2500}
+_PREFIX = "/v8/finance/chart/"
+
+
+def _timezone(symbol: str) -> str:
+    return "Asia/Tokyo" if symbol.endswith(".T") or symbol == "^N225" else "America/New_York"
+
+
+def _chart(symbol: str, timestamps, opens, highs, lows, closes, volumes, price: Optional[float], currency: str) -> Dict[str, Any]:
+    return {"chart": {"error": None, "result": [{
+        "meta": {
+            "symbol": symbol,
+            "currency": currency,
+            "exchangeTimezoneName": _timezone(symbol),
+            "regularMarketPrice": price,
+        },
+        "timestamp": timestamps,
+        "indicators": {
+            "quote": [{"open": opens, "high": highs, "low": lows, "close": closes, "volume": volumes}],
+            "adjclose": [{"adjclose": closes}],
+        },
+    }]}}
+
+
+def _from_fixtures(root: str, symbol: str, range_: str, interval: str) -> Optional[Dict[str, Any]]:
+    import pandas as pd
+
+    directory = os.path.join(root, symbol)
+    if not os.path.isdir(directory):
+        return None
+    quote: Dict[str, Any] = {}
+    if os.path.exists(os.path.join(directory, "quote.json")):
+        with open(os.path.join(directory, "quote.json")) as f:
+            quote = json.load(f)
+    path = os.path.join(directory, f"history_{range_}_{interval}.csv")
+    if not os.path.exists(path):
+        # Any daily file covers shorter ranges: serve its tail
+        candidates = [name for name in os.listdir(directory) if name.startswith("history_") and name.endswith(f"_{interval}.csv")]
+        if not candidates:
+            return _chart(symbol, [], [], [], [], [], [], quote.get("last_price"), quote.get("currency") or "JPY")
+        path = os.path.join(directory, max(candidates, key=lambda name: os.path.getsize(os.path.join(directory, name))))
+    df = pd.read_csv(path, index_col=0)
+    df.index = pd.to_datetime(df.index, utc=True)
+    df = df.tail(_RANGE_DAYS.get(range_, len(df)))
+
+    def column(name):
+        return [None if value != value else float(value) for value in df[name]]
+
+    return _chart(
+        symbol,
+        [int(ts.timestamp()) for ts in df.index],
+        column("Open"), column("High"), column("Low"), column("Close"),
+        [None if value != value else int(value) for value in df["Volume"]],
+        quote.get("last_price"),
+        quote.get("currency") or "JPY",
+    )
+
+
+def _synthetic(symbol: str, range_: str) -> Dict[str, Any]:
+    rng = random.Random(symbol)
+    days = _RANGE_DAYS.get(range_, 21)
+    end = int(time.time()) // 86400 * 86400
+    price = rng.uniform(500, 5000)
+    timestamps, opens, highs, lows, closes, volumes = [], [], [], [], [], []
+    for i in range(days):
+        open_ = price
+        price *= 1 + rng.gauss(0, 0.015)
+        timestamps.append(end - (days - 1 - i) * 86400)
+        opens.append(round(open_, 1))
+        highs.append(round(max(open_, price) * 1.005, 1))
+        lows.append(round(min(open_, price) * 0.995, 1))
+        closes.append(round(price, 1))
+        volumes.append(rng.randint(10_000, 5_000_000))
+    return _chart(symbol, timestamps, opens, highs, lows, closes, volumes, closes[-1], "JPY")
+
+
+class Stub:
+    """Single-threaded asyncio HTTP/1.1 server (keep-alive), so it is not the bottleneck under high concurrency."""
+
+    def __init__(self, fixtures: Optional[str] = None, latency: float = 0.0, synthetic: bool = True):
+        self.fixtures = fixtures
+        self.latency = latency
+        self.synthetic = synthetic
+        self.requests = 0
+        self.connections = 0
+
+    @lru_cache(maxsize=4096)
+    def body(self, symbol: str, range_: str, interval: str) -> Tuple[int, bytes]:
+        chart = _from_fixtures(self.fixtures, symbol, range_, interval) if self.fixtures else None
+        if chart is None:
+            if self.fixtures and not self.synthetic:
+                return 404, json.dumps({"chart": {"result": None, "error": {"code": "Not Found"}}}).encode()
+            chart = _synthetic(symbol, range_)
+        return 200, json.dumps(chart).encode()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass  # headers; GET requests carry no body
+                target = request_line.decode("latin-1").split(" ")[1]
+                url = urlparse(target)
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                self.requests += 1
+                if url.path.startswith(_PREFIX):
+                    params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                    status, raw = self.body(unquote(url.path[len(_PREFIX):]), params.get("range", "1mo"), params.get("interval", "1d"))
+                else:
+                    status, raw = 404, b'{"chart":{"result":null,"error":{"code":"Not Found"}}}'
+                reason = "OK" if status == 200 else "Not Found"
+                writer.write(
+                    f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(raw)}\r\n\r\n".encode() + raw
+                )
+                await writer.drain()
+        except (ConnectionError, IndexError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, port: int = 0) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle, "127.0.0.1", port, backlog=1024)
+
+
+def serve(port: int = 0, fixtures: Optional[str] = None, latency: float = 0.0, synthetic: bool = True) -> Tuple[Stub, int]:
+    """Start the stub on its own event loop in a background thread. Returns (stub, bound port)."""
+    stub = Stub(fixtures, latency, synthetic)
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(stub.start(port))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return stub, server.sockets[0].getsockname()[1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", help="FixtureProvider directory to serve")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds of think time per request")
+    parser.add_argument("--no-synthetic", action="store_true", help="404 for symbols without fixtures")
+    args = parser.parse_args()
+    stub = Stub(args.fixtures, args.latency, synthetic=not args.no_synthetic)
+
+    async def run() -> None:
+        server = await stub.start(args.port)
+        print(f"Yahoo chart stub on http://127.0.0.1:{server.sockets[0].getsockname()[1]}", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import os
+import sys
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+@pytest.fixture
+def db():
+    """
+    Session on the configured Postgres (POSTGRES_* settings) inside one outer
+    transaction that is rolled back afterwards, tables included: DDL is
+    transactional in Postgres, so nothing is left behind. Skipped when the
+    database is unreachable.
+    """
+    from sqlalchemy import exc, text
+    from sqlalchemy.orm import Session
+
+    from app import models  # noqa: F401
+    from app.core.database import Base, engine
+
+    try:
+        connection = engine.connect()
+    except exc.OperationalError as e:
+        pytest.skip(f"Postgres not available: {e.orig}")
+    transaction = connection.begin()
+    has_trgm = connection.execute(
+        text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    ).scalar()
+    if has_trgm:
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    else:
+        # Only the full-text search indexes need pg_trgm; leave them out
+        for table in Base.metadata.tables.values():
+            for index in [index for index in table.indexes if index.name.endswith("_trgm")]:
+                table.indexes.discard(index)
+    Base.metadata.create_all(bind=connection)
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture
+def user(db):
+    from app.models.user import User
+
+    user = User(email=f"{uuid.uuid4().hex[:8]}@example.com", hashed_password="x", full_name="test")
+    db.add(user)
+    db.flush()
+    return user
+
+
+def _client(db, user):
+    from fastapi.testclient import TestClient
+
+    from app.api import deps
+    from app.core.security import create_access_token
+    from app.main import app
+
+    app.dependency_overrides[deps.get_db] = lambda: db
+    # Not entered as a context manager: startup jobs (poller, index build) stay off
+    client = TestClient(app)
+    client.headers["Authorization"] = f"Bearer {create_access_token({'sub': str(user.id)})}"
+    return client
+
+
+@pytest.fixture
+def client(db, user):
+    """API client authenticated as `user`, with requests running on the test session."""
+    from app.main import app
+
+    yield _client(db, user)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def make_client(db):
+    """Clients for further users (each with a fresh account) on the same test session."""
+    from app.main import app
+    from app.models.user import User
+
+    def make():
+        other = User(email=f"{uuid.uuid4().hex[:8]}@example.com", hashed_password="x", full_name="other")
+        db.add(other)
+        db.flush()
+        return _client(db, other)
+
+    yield make
+    app.dependency_overrides.clear()
@@ -0,0 +1,45 @@
+import uuid
+
+import pytest
+
+from app.services.alert_service import AlertService
+
+
+def _ticker():
+    return "9" + uuid.uuid4().hex[:5].upper()
+
+
+@pytest.fixture
+def watched(client, db):
+    """An open long with a stop, already in the (process-wide) alert index."""
+    ticker = _ticker()
+    trade = client.post("/api/v1/trades/", json={
+        "ticker_symbol": ticker, "trade_type": "BUY", "quantity": 100, "price": 1000,
+        "total_amount": 100000, "stop_loss": 900,
+    }).json()
+    assert ticker in AlertService._get_index(db).symbols()
+    yield trade
+    AlertService.invalidate()
+
+
+@pytest.mark.parametrize("close", [
+    lambda client, trade: client.post(f"/api/v1/trades/{trade['id']}/close", json={"closing_price": 1100}),
+    lambda client, trade: client.post(
+        f"/api/v1/trades/positions/{trade['ticker_symbol']}/close", json={"quantity": 100, "closing_price": 1100},
+    ),
+    lambda client, trade: client.post(
+        "/api/v1/trades/close-batch", json={"trade_ids": [trade["id"]], "closing_price": 1100},
+    ),
+    lambda client, trade: client.delete(f"/api/v1/trades/{trade['id']}"),
+], ids=["settle", "close_position", "close_batch", "delete"])
+def test_closing_or_deleting_drops_the_levels(client, db, watched, close):
+    assert close(client, watched).status_code == 200
+    assert watched["ticker_symbol"] not in AlertService._get_index(db).symbols()
+
+
+def test_deleting_an_exit_rearms_the_entry(client, db, watched):
+    exit_trade = client.post(f"/api/v1/trades/{watched['id']}/close", json={"closing_price": 1100}).json()
+    assert watched["ticker_symbol"] not in AlertService._get_index(db).symbols()
+
+    assert client.delete(f"/api/v1/trades/{exit_trade['id']}").status_code == 200
+    assert watched["ticker_symbol"] in AlertService._get_index(db).symbols()
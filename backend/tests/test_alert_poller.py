@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.core.config import settings
+from app.services import alert_service
+from app.services.alert_service import AlertService, run_alert_poller
+from app.services.market_clock import TOKYO, MarketClock
+
+
+class _Stop(BaseException):
+    pass
+
+
+@pytest.fixture
+def poller(monkeypatch):
+    """Run the poller for `ticks` sleeps at a fixed time; returns (sleeps, polls)."""
+    sleeps, polls = [], []
+
+    class Leadership:
+        def __init__(self, name):
+            pass
+
+        def acquire(self):
+            return True
+
+    monkeypatch.setattr(settings, "ALERT_POLL_INTERVAL_SECONDS", 60)
+    monkeypatch.setattr(alert_service, "Leadership", Leadership)
+    monkeypatch.setattr(alert_service, "get_async_client", lambda: None)
+    monkeypatch.setattr(AlertService, "poll_once", staticmethod(lambda: polls.append(1) or 0))
+
+    def run(now, ticks):
+        async def sleep(seconds):
+            if len(sleeps) == ticks:
+                raise _Stop
+            sleeps.append(seconds)
+
+        monkeypatch.setattr(MarketClock, "now", staticmethod(lambda: now))
+        monkeypatch.setattr(alert_service.asyncio, "sleep", sleep)
+        with pytest.raises(_Stop):
+            asyncio.run(run_alert_poller())
+        return sleeps, polls
+
+    return run
+
+
+def test_polls_every_interval_while_open(poller):
+    sleeps, polls = poller(datetime(2025, 6, 9, 10, 0, tzinfo=TOKYO), ticks=3)
+    assert sleeps == [60, 60, 60]
+    assert len(polls) == 3
+
+
+def test_sleeps_until_the_open_while_closed(poller):
+    # Saturday 10:00: the next session opens Monday 9:00
+    sleeps, polls = poller(datetime(2025, 6, 7, 10, 0, tzinfo=TOKYO), ticks=2)
+    assert sleeps == [60, 47 * 3600]
+    assert polls == []
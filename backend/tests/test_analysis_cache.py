@@ -0,0 +1,80 @@
+import time
+import uuid
+from datetime import datetime
+
+import orjson
+import pytest
+
+from app.core.config import settings
+from app.services import stock_service
+from app.services.market_clock import TOKYO, MarketClock
+from app.services.stock_service import ChecklistItem, StockService
+
+SATURDAY = datetime(2025, 6, 7, 10, 0, tzinfo=TOKYO)
+
+
+def _analysis(value):
+    return {"checklist": {"market": [], "technical": [ChecklistItem(label="RSI", value=value, text="")], "fundamental": []}}
+
+
+@pytest.fixture
+def analyses(monkeypatch):
+    """Queue of checklists get_analysis_data returns, one per call; a fresh symbol per test."""
+    queue = []
+    monkeypatch.setattr(MarketClock, "now", staticmethod(lambda: SATURDAY))
+    monkeypatch.setattr(StockService, "get_analysis_data", staticmethod(lambda ticker_symbol: queue.pop(0)))
+    return queue, uuid.uuid4().hex[:6].upper()
+
+
+def test_complete_checklist_is_kept_until_the_next_session(analyses):
+    queue, symbol = analyses
+    queue.append(_analysis(55.0))
+
+    body, etag, max_age, complete = StockService.get_cached_analysis(symbol)
+    again = StockService.get_cached_analysis(symbol)
+
+    assert orjson.loads(body)["checklist"]["technical"][0]["value"] == 55.0
+    assert complete
+    assert again == (body, etag, max_age, complete)
+    # Saturday morning: the window lasts until Monday's open
+    assert max_age > 40 * 3600
+
+
+def test_failed_section_is_cached_briefly(analyses, monkeypatch):
+    queue, symbol = analyses
+    queue.extend([_analysis("Error"), _analysis(55.0)])
+    monkeypatch.setattr(settings, "ANALYSIS_ERROR_CACHE_SECONDS", 0.05)
+
+    body, _, max_age, complete = StockService.get_cached_analysis(symbol)
+    assert orjson.loads(body)["checklist"]["technical"][0]["value"] == "Error"
+    assert not complete
+    assert max_age == 0
+    # Served from the cache within the short TTL, recomputed after it
+    assert StockService.get_cached_analysis(symbol)[0] == body
+    time.sleep(0.1)
+    body, _, max_age, complete = StockService.get_cached_analysis(symbol)
+    assert orjson.loads(body)["checklist"]["technical"][0]["value"] == 55.0
+    assert complete and max_age > 40 * 3600
+    assert queue == []
+
+
+def test_is_complete():
+    assert stock_service._is_complete(_analysis(1.0))
+    assert not stock_service._is_complete(_analysis("Error"))
+
+
+def test_partial_checklist_is_not_publicly_cached(analyses):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    queue, symbol = analyses
+    queue.extend([_analysis("Error"), _analysis(55.0)])
+    client = TestClient(app)
+
+    partial = client.get(f"/api/v1/stock/analysis/{symbol}")
+    assert partial.status_code == 200
+    assert partial.headers["Cache-Control"] == "no-store"
+
+    complete = client.get(f"/api/v1/stock/analysis/{symbol}X")
+    assert complete.headers["Cache-Control"].startswith("public, max-age=")
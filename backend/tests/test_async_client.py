@@ -0,0 +1,116 @@
+import asyncio
+import math
+
+import pandas as pd
+
+from app.core import metrics
+from app.core.config import settings
+from app.services import stock_service
+from app.services.market_data import async_client
+from app.services.market_data.async_client import COLUMNS, _frame
+from app.services.stock_service import StockService
+
+# 2025-06-02 and 2025-06-03 09:00 Tokyo, then 14:30 on the 3rd (the live session's current quote)
+JUNE_2 = 1748822400
+JUNE_3 = 1748908800
+JUNE_3_LIVE = 1748928600
+
+
+def _result(timestamps, quote, adjclose=None):
+    indicators = {"quote": [quote]}
+    if adjclose is not None:
+        indicators["adjclose"] = [{"adjclose": adjclose}]
+    return {"meta": {"exchangeTimezoneName": "Asia/Tokyo"}, "timestamp": timestamps, "indicators": indicators}
+
+
+def _quote(close, volume=None):
+    return {
+        "open": close, "high": [c and c + 10 for c in close], "low": [c and c - 10 for c in close],
+        "close": close, "volume": volume or [1000] * len(close),
+    }
+
+
+def test_daily_bars_are_indexed_at_midnight_exchange_time():
+    df = _frame(_result([JUNE_2, JUNE_3], _quote([100.0, 110.0])), "1d")
+
+    assert list(df.columns) == COLUMNS
+    assert df.index.name == "Date"
+    assert list(df.index) == [pd.Timestamp("2025-06-02", tz="Asia/Tokyo"), pd.Timestamp("2025-06-03", tz="Asia/Tokyo")]
+    assert list(df["Close"]) == [100.0, 110.0]
+    assert list(df["Volume"]) == [1000, 1000]
+
+
+def test_intraday_bars_keep_their_time():
+    df = _frame(_result([JUNE_3, JUNE_3_LIVE], _quote([100.0, 101.0])), "5m")
+    assert list(df.index) == [
+        pd.Timestamp("2025-06-03 09:00", tz="Asia/Tokyo"), pd.Timestamp("2025-06-03 14:30", tz="Asia/Tokyo"),
+    ]
+
+
+def test_ohlc_is_adjusted_by_adjclose():
+    # A 2:1 split after the first session: its unadjusted prices are twice the adjusted ones
+    df = _frame(_result([JUNE_2, JUNE_3], _quote([200.0, 110.0]), adjclose=[100.0, 110.0]), "1d")
+
+    assert list(df["Close"]) == [100.0, 110.0]
+    assert list(df["High"]) == [105.0, 120.0]
+    assert list(df["Low"]) == [95.0, 100.0]
+    assert list(df["Volume"]) == [1000, 1000]
+
+
+def test_empty_bars_are_dropped_and_the_live_quote_wins():
+    df = _frame(
+        _result([JUNE_2, JUNE_3, JUNE_3_LIVE], _quote([None, 110.0, 112.0], volume=[None, 500, 800])),
+        "1d",
+    )
+    assert list(df.index) == [pd.Timestamp("2025-06-03", tz="Asia/Tokyo")]
+    assert df["Close"].iloc[0] == 112.0
+    assert df["Volume"].iloc[0] == 800
+
+
+def test_missing_values_become_nan():
+    quote = _quote([100.0, 110.0])
+    quote["open"] = [None, 108.0]
+    df = _frame(_result([JUNE_2, JUNE_3], quote), "1d")
+    assert math.isnan(df["Open"].iloc[0]) and df["Close"].iloc[0] == 100.0
+
+
+def test_no_timestamps():
+    df = _frame({"meta": {}, "indicators": {"quote": [{}]}}, "1d")
+    assert df.empty and list(df.columns) == COLUMNS
+
+
+def test_missing_httpx_falls_back_without_touching_settings(monkeypatch):
+    attempts = []
+
+    def missing():
+        attempts.append(1)
+        raise ImportError("httpx")
+
+    monkeypatch.setattr(settings, "MARKET_DATA_ASYNC", True)
+    monkeypatch.setattr(settings, "MARKET_DATA_PROVIDER", "yfinance")
+    monkeypatch.setattr(async_client, "_client", None)
+    monkeypatch.setattr(async_client, "_unavailable", False)
+    monkeypatch.setattr(async_client, "AsyncYahooClient", missing)
+
+    assert async_client.get_async_client() is None
+    assert async_client.get_async_client() is None
+    assert attempts == [1]
+    assert settings.MARKET_DATA_ASYNC is True
+
+
+def test_sync_price_path_is_counted_for_the_request(monkeypatch):
+    monkeypatch.setattr(stock_service, "get_async_client", lambda: None)
+
+    def get_stock_price(ticker_symbol):
+        with metrics.track_upstream("test", "quote"):
+            return {"ticker_symbol": ticker_symbol}
+
+    monkeypatch.setattr(StockService, "get_stock_price", staticmethod(get_stock_price))
+
+    async def request():
+        stats = metrics.RequestStats()
+        metrics._request_stats.set(stats)
+        await StockService.get_stock_price_async("7203")
+        return stats
+
+    assert asyncio.run(request()).upstream_calls == 1
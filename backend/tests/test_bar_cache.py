@@ -0,0 +1,63 @@
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.models.bar import DailyBar
+from app.services.bar_cache import CLOSE, DAY, BarCache
+
+KEY = "9Z99"
+FETCHED = datetime(2025, 6, 6, 16, 0, 0, 123456, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def bars(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "BAR_CACHE_DIR", str(tmp_path))
+    for offset, close in enumerate([100.0, 102.0, 101.0]):
+        db.add(DailyBar(ticker_symbol=KEY, date=date(2025, 6, 2) + timedelta(days=offset), close=close, fetched_at=FETCHED))
+    db.flush()
+    return db
+
+
+def _closes():
+    return list(BarCache.load(KEY)[CLOSE])
+
+
+def test_sync_writes_once(bars):
+    assert BarCache.sync(bars, [KEY]) == 1
+    assert _closes() == [100.0, 102.0, 101.0]
+    assert int(BarCache.load(KEY)[DAY, 0]) == (date(2025, 6, 2) - date(1970, 1, 1)).days
+    assert BarCache.sync(bars, [KEY]) == 0
+
+
+def test_refetched_history_is_rewritten(bars):
+    BarCache.sync(bars, [KEY])
+    # A split re-fetched the whole history: same dates, new prices, later fetched_at
+    bars.execute(
+        update(DailyBar).where(DailyBar.ticker_symbol == KEY)
+        .values(close=DailyBar.close / 2, fetched_at=FETCHED + timedelta(seconds=1))
+    )
+    bars.flush()
+
+    assert BarCache.sync(bars, [KEY]) == 1
+    assert _closes() == [50.0, 51.0, 50.5]
+
+
+def test_a_filled_gap_is_rewritten(bars):
+    bars.query(DailyBar).filter(DailyBar.ticker_symbol == KEY, DailyBar.date == date(2025, 6, 3)).delete()
+    bars.flush()
+    BarCache.sync(bars, [KEY])
+    assert _closes() == [100.0, 101.0]
+
+    # Same first and last day, one more bar
+    bars.add(DailyBar(ticker_symbol=KEY, date=date(2025, 6, 3), close=102.0, fetched_at=FETCHED))
+    bars.flush()
+    assert BarCache.sync(bars, [KEY]) == 1
+    assert _closes() == [100.0, 102.0, 101.0]
+
+
+def test_symbols_without_bars_are_skipped(bars):
+    assert BarCache.sync(bars, ["0000"]) == 0
+    assert BarCache.load("0000") is None
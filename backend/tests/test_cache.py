@@ -0,0 +1,82 @@
+import threading
+import time
+
+import fakeredis
+import pytest
+
+from app.core.cache import LRUCache, TieredCache
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeRedis()
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_lru_ttl_expires():
+    cache = LRUCache()
+    cache.set("a", 1, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+
+def test_workers_share_values_through_redis(redis):
+    # Two caches on one Redis stand in for two worker processes
+    first = TieredCache("test", redis_client=redis)
+    second = TieredCache("test", redis_client=redis)
+    value = {"price": 1234.5, "rows": [1, 2, 3], "raw": b"\x00\x01"}
+
+    first.set("quote", value, ttl=60)
+
+    assert second.get("quote") == value
+    assert second.l1.get("quote") == value
+    assert 0 < redis.pttl("whytrade:test:quote") <= 60_000
+
+
+def test_delete_clears_both_tiers(redis):
+    first = TieredCache("test", redis_client=redis)
+    second = TieredCache("test", redis_client=redis)
+    first.set("k", "v")
+    first.delete("k")
+    assert first.get("k") is None
+    assert second.get("k") is None
+
+
+def test_get_or_set_computes_once_across_workers(redis):
+    workers = [TieredCache("test", redis_client=redis, lock_timeout=5) for _ in range(4)]
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda cache=cache: results.append(cache.get_or_set("key", compute, ttl=60)))
+        for cache in workers
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["value"] * 12
+    assert len(calls) == 1
+
+
+def test_redis_failure_falls_back_to_local(redis):
+    cache = TieredCache("test", redis_client=redis)
+    redis.connected = False
+    assert cache.get_or_set("key", lambda: 42) == 42
+    assert cache.get("key") == 42
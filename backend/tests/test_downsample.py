@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from app.services.downsample import lttb, minmax
+
+
+def _series(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return np.arange(n, dtype=float), np.cumsum(rng.normal(0, 1, n))
+
+
+@pytest.mark.parametrize("threshold", [3, 4, 10, 100, 999])
+def test_lttb_keeps_threshold_points_with_endpoints(threshold):
+    x, y = _series(1000)
+    indices = lttb(x, y, threshold)
+    assert len(indices) == threshold
+    assert indices[0] == 0 and indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+
+
+@pytest.mark.parametrize("threshold", [0, 2, 50, 51])
+def test_lttb_returns_everything_when_nothing_to_drop(threshold):
+    x, y = _series(50)
+    np.testing.assert_array_equal(lttb(x, y, threshold), np.arange(50))
+
+
+def test_lttb_keeps_a_spike():
+    x = np.arange(500, dtype=float)
+    y = np.zeros(500)
+    y[321] = 100.0
+    assert 321 in lttb(x, y, 20)
+
+
+@pytest.mark.parametrize("threshold", [3, 4, 5, 10, 101, 999])
+def test_minmax_stays_within_threshold(threshold):
+    _, y = _series(1000)
+    indices = minmax(y, threshold)
+    assert len(indices) <= threshold
+    assert indices[0] == 0 and indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+
+
+@pytest.mark.parametrize("threshold", [4, 10, 100])
+def test_minmax_keeps_global_extremes(threshold):
+    _, y = _series(1000, seed=1)
+    indices = minmax(y, threshold)
+    assert int(np.argmin(y)) in indices
+    assert int(np.argmax(y)) in indices
+
+
+def test_minmax_threshold_three_keeps_the_furthest_extreme():
+    y = np.array([0.0, 1.0, -5.0, 2.0, 0.0, 3.0, 0.0])
+    np.testing.assert_array_equal(minmax(y, 3), [0, 2, 6])
+
+
+def test_minmax_returns_everything_when_nothing_to_drop():
+    _, y = _series(20)
+    np.testing.assert_array_equal(minmax(y, 20), np.arange(20))
+    np.testing.assert_array_equal(minmax(y, 2), np.arange(20))
@@ -0,0 +1,172 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.models.position import Position, PositionLot
+from app.models.trade import Trade, TradeStatus, TradeType
+from app.services.ledger_service import LedgerError, LedgerService
+
+T0 = datetime(2025, 6, 2, 9, 0, tzinfo=timezone.utc)
+
+
+def _entry(db, user, quantity, price, ticker="7203", side=TradeType.BUY, executed_at=T0, ledger=True):
+    trade = Trade(
+        user_id=user.id,
+        ticker_symbol=ticker,
+        trade_type=side,
+        quantity=Decimal(quantity),
+        price=Decimal(price),
+        total_amount=Decimal(quantity) * Decimal(price),
+        executed_at=executed_at,
+        status=TradeStatus.OPEN,
+    )
+    db.add(trade)
+    db.flush()
+    if ledger:
+        LedgerService.open_lot(db, trade)
+    return trade
+
+
+def _position(db, user, ticker="7203"):
+    db.expire_all()
+    return db.get(Position, (user.id, ticker))
+
+
+def test_open_lot_adds_to_position(db, user):
+    _entry(db, user, 100, 1000)
+    _entry(db, user, 50, 1200)
+
+    position = _position(db, user)
+    assert position.quantity == 150
+    assert position.total_amount == 160000
+    assert position.realized_profit_loss == 0
+
+
+def test_close_lot_partially_then_fully(db, user):
+    entry = _entry(db, user, 100, 1000)
+    lot = LedgerService.get_lot(db, entry)
+
+    exit_trade = LedgerService.close_lot(db, lot, Decimal(40), Decimal(1100))
+    assert exit_trade.trade_type == TradeType.SELL
+    assert exit_trade.related_trade_id == entry.id
+    assert exit_trade.profit_loss == 4000
+    assert lot.open_quantity == 60
+    assert entry.status == TradeStatus.OPEN
+
+    LedgerService.close_lot(db, lot, Decimal(60), Decimal(900))
+    assert lot.open_quantity == 0
+    assert lot.closed_at is not None
+    assert entry.status == TradeStatus.CLOSED
+    position = _position(db, user)
+    assert position.quantity == 0
+    assert position.total_amount == 0
+    assert position.realized_profit_loss == 4000 - 6000
+
+
+def test_close_lot_short_side(db, user):
+    entry = _entry(db, user, 100, 1000, side=TradeType.SELL)
+    exit_trade = LedgerService.close_lot(db, LedgerService.get_lot(db, entry), Decimal(100), Decimal(900))
+    assert exit_trade.trade_type == TradeType.BUY
+    assert exit_trade.profit_loss == 10000
+
+
+def test_close_lot_rejects_more_than_open(db, user):
+    entry = _entry(db, user, 100, 1000)
+    with pytest.raises(LedgerError):
+        LedgerService.close_lot(db, LedgerService.get_lot(db, entry), Decimal(101), Decimal(1000))
+
+
+def test_close_fifo_takes_oldest_lots_first(db, user):
+    newer = _entry(db, user, 100, 1200, executed_at=T0 + timedelta(days=1))
+    older = _entry(db, user, 100, 1000)
+
+    exits = LedgerService.close_fifo(db, user.id, "7203", Decimal(150), Decimal(1100))
+
+    assert [(e.related_trade_id, e.quantity) for e in exits] == [(older.id, 100), (newer.id, 50)]
+    assert older.status == TradeStatus.CLOSED
+    assert newer.status == TradeStatus.OPEN
+    position = _position(db, user)
+    assert position.quantity == 50
+    assert position.realized_profit_loss == 100 * 100 - 50 * 100
+
+
+def test_close_fifo_checks_quantity_and_side(db, user):
+    _entry(db, user, 100, 1000)
+    with pytest.raises(LedgerError):
+        LedgerService.close_fifo(db, user.id, "7203", Decimal(101), Decimal(1000))
+
+    _entry(db, user, 100, 1000, side=TradeType.SELL)
+    with pytest.raises(LedgerError):
+        LedgerService.close_fifo(db, user.id, "7203", Decimal(10), Decimal(1000))
+    exits = LedgerService.close_fifo(db, user.id, "7203", Decimal(10), Decimal(990), side=TradeType.SELL)
+    assert exits[0].profit_loss == 100
+
+
+def test_close_batch_closes_every_open_lot_of_a_ticker(db, user):
+    first = _entry(db, user, 100, 1000)
+    second = _entry(db, user, 200, 1100)
+    other = _entry(db, user, 100, 500, ticker="6758")
+    unledgered = _entry(db, user, 10, 1000, ledger=False)
+
+    exit_ids = LedgerService.close_batch(db, user.id, {"7203": Decimal(1200)}, ticker_symbol="7203")
+
+    assert len(exit_ids) == 3
+    exits = db.query(Trade).filter(Trade.id.in_(exit_ids)).all()
+    assert {e.related_trade_id for e in exits} == {first.id, second.id, unledgered.id}
+    assert sum(e.profit_loss for e in exits) == 100 * 200 + 200 * 100 + 10 * 200
+    for trade in (first, second, unledgered):
+        assert db.get(Trade, trade.id).status == TradeStatus.CLOSED
+    assert db.get(Trade, other.id).status == TradeStatus.OPEN
+    position = _position(db, user)
+    assert position.quantity == 0
+    assert position.realized_profit_loss == 42000
+    assert _position(db, user, "6758").quantity == 100
+
+
+def test_close_batch_requires_a_price(db, user):
+    entry = _entry(db, user, 100, 1000)
+    with pytest.raises(LedgerError):
+        LedgerService.close_batch(db, user.id, {}, trade_ids=[entry.id])
+
+
+def test_reverse_exit_reopens_the_entry(db, user):
+    entry = _entry(db, user, 100, 1000)
+    lot = LedgerService.get_lot(db, entry)
+    partial = LedgerService.close_lot(db, lot, Decimal(40), Decimal(1100))
+    rest = LedgerService.close_lot(db, lot, Decimal(60), Decimal(1050))
+    assert entry.status == TradeStatus.CLOSED
+
+    LedgerService.reverse_exit(db, rest)
+    db.delete(rest)
+    db.flush()
+    LedgerService.rebuild_position(db, user.id, "7203")
+
+    assert lot.open_quantity == 60
+    assert lot.realized_profit_loss == 4000
+    assert lot.closed_at is None
+    assert entry.status == TradeStatus.OPEN
+    position = _position(db, user)
+    assert position.quantity == 60
+    assert position.total_amount == 60000
+    assert position.realized_profit_loss == partial.profit_loss
+
+
+def test_backfill_creates_missing_lots_once(db, user):
+    entry = _entry(db, user, 100, 1000, ledger=False)
+    db.add(Trade(
+        user_id=user.id, ticker_symbol="7203", trade_type=TradeType.SELL, quantity=Decimal(30),
+        price=Decimal(1100), total_amount=Decimal(33000), executed_at=T0 + timedelta(days=1),
+        status=TradeStatus.CLOSED, profit_loss=Decimal(3000), related_trade_id=entry.id,
+    ))
+    db.flush()
+
+    assert LedgerService.backfill(db) == 1
+    assert LedgerService.backfill(db) == 0
+
+    lot = db.query(PositionLot).filter(PositionLot.entry_trade_id == entry.id).one()
+    assert lot.open_quantity == 70
+    assert lot.realized_profit_loss == 3000
+    position = _position(db, user)
+    assert position.quantity == 70
+    assert position.realized_profit_loss == 3000
@@ -0,0 +1,67 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.services.market_clock import TOKYO, is_trading_day, national_holidays, previous_trading_day, sessions
+
+
+def _dates(year: int, *month_days):
+    return {date(year, month, day) for month, day in month_days}
+
+
+def test_national_holidays_2024():
+    # Cabinet Office list, including substitute holidays
+    assert national_holidays(2024) == _dates(
+        2024,
+        (1, 1), (1, 8), (2, 11), (2, 12), (2, 23), (3, 20), (4, 29), (5, 3), (5, 4), (5, 5), (5, 6),
+        (7, 15), (8, 11), (8, 12), (9, 16), (9, 22), (9, 23), (10, 14), (11, 3), (11, 4), (11, 23),
+    )
+
+
+def test_national_holidays_2025():
+    assert national_holidays(2025) == _dates(
+        2025,
+        (1, 1), (1, 13), (2, 11), (2, 23), (2, 24), (3, 20), (4, 29), (5, 3), (5, 4), (5, 5), (5, 6),
+        (7, 21), (8, 11), (9, 15), (9, 23), (10, 13), (11, 3), (11, 23), (11, 24),
+    )
+
+
+def test_national_holidays_2019_enthronement():
+    holidays = national_holidays(2019)
+    # Ten-day Golden Week: the enthronement day makes Apr 30 and May 2 sandwiched holidays
+    assert _dates(2019, (4, 29), (4, 30), (5, 1), (5, 2), (5, 3), (5, 4), (5, 5), (5, 6)) <= holidays
+    assert date(2019, 10, 22) in holidays
+    # No Emperor's Birthday that year: Dec 23 ended with the abdication, Feb 23 starts in 2020
+    assert date(2019, 12, 23) not in holidays
+    assert date(2019, 2, 23) not in holidays
+    assert date(2018, 12, 23) in national_holidays(2018)
+
+
+def test_national_holidays_2020_olympic_moves():
+    holidays = national_holidays(2020)
+    assert _dates(2020, (7, 23), (7, 24), (8, 10)) <= holidays
+    assert not _dates(2020, (7, 20), (8, 11), (10, 12)) & holidays
+
+
+@pytest.mark.parametrize("day, expected", [
+    (date(2024, 12, 30), True),
+    (date(2024, 12, 31), False),
+    (date(2025, 1, 3), False),
+    (date(2025, 1, 6), True),
+    (date(2025, 1, 13), False),  # Coming of Age Day
+    (date(2025, 6, 7), False),  # Saturday
+])
+def test_is_trading_day(day, expected):
+    assert is_trading_day(day) is expected
+
+
+def test_previous_trading_day_skips_year_end():
+    assert previous_trading_day(date(2025, 1, 6)) == date(2024, 12, 30)
+
+
+def test_sessions_close_later_from_2024_11_05():
+    before = sessions(date(2024, 11, 1))
+    after = sessions(date(2024, 11, 5))
+    assert before[-1][1] == datetime(2024, 11, 1, 15, 0, tzinfo=TOKYO)
+    assert after[-1][1] == datetime(2024, 11, 5, 15, 30, tzinfo=TOKYO)
+    assert sessions(date(2024, 11, 4)) == []
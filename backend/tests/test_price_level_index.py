@@ -0,0 +1,67 @@
+import uuid
+from decimal import Decimal
+
+from app.models.alert import AlertKind
+from app.models.trade import TradeType
+from app.services.alert_service import AlertLevel, PriceLevelIndex
+
+USER = uuid.uuid4()
+
+
+def _index(*trades):
+    """trades: (ticker, side, stop_loss, target_price); returns the index and the trade ids in order."""
+    levels, sides, ids = [], {}, []
+    for ticker, side, stop_loss, target_price in trades:
+        trade_id = uuid.uuid4()
+        ids.append(trade_id)
+        sides[trade_id] = side
+        if stop_loss is not None:
+            levels.append(AlertLevel(trade_id, USER, ticker, AlertKind.STOP_LOSS, Decimal(stop_loss)))
+        if target_price is not None:
+            levels.append(AlertLevel(trade_id, USER, ticker, AlertKind.TARGET_PRICE, Decimal(target_price)))
+    return PriceLevelIndex(levels, sides), ids
+
+
+def _fired(levels):
+    return {(level.trade_id, level.kind) for level in levels}
+
+
+def test_long_levels():
+    index, (trade,) = _index(("7203", TradeType.BUY, 900, 1200))
+    assert index.pop_breached("7203", 1000) == []
+    assert _fired(index.pop_breached("7203", 900)) == {(trade, AlertKind.STOP_LOSS)}
+    assert _fired(index.pop_breached("7203", 1250)) == {(trade, AlertKind.TARGET_PRICE)}
+
+
+def test_short_levels_are_mirrored():
+    index, (trade,) = _index(("7203", TradeType.SELL, 1100, 800))
+    assert index.pop_breached("7203", 1000) == []
+    assert _fired(index.pop_breached("7203", 1100)) == {(trade, AlertKind.STOP_LOSS)}
+    assert _fired(index.pop_breached("7203", 799)) == {(trade, AlertKind.TARGET_PRICE)}
+
+
+def test_each_level_fires_once():
+    index, (trade,) = _index(("7203", TradeType.BUY, 900, None))
+    assert len(index.pop_breached("7203", 850)) == 1
+    assert index.pop_breached("7203", 800) == []
+
+
+def test_a_gap_fires_every_level_it_crosses():
+    index, (a, b, c) = _index(
+        ("7203", TradeType.BUY, 950, None),
+        ("7203", TradeType.BUY, 900, None),
+        ("7203", TradeType.BUY, 800, None),
+    )
+    assert _fired(index.pop_breached("7203", 880)) == {(a, AlertKind.STOP_LOSS), (b, AlertKind.STOP_LOSS)}
+    assert _fired(index.pop_breached("7203", 700)) == {(c, AlertKind.STOP_LOSS)}
+
+
+def test_symbols_are_normalized_and_separate():
+    index, (toyota, sony) = _index(
+        ("7203.T", TradeType.BUY, 900, None),
+        ("6758", TradeType.BUY, 900, None),
+    )
+    assert index.symbols() == ["6758", "7203"]
+    assert _fired(index.pop_breached("7203", 500)) == {(toyota, AlertKind.STOP_LOSS)}
+    assert index.pop_breached("9984.T", 1) == []
+    assert _fired(index.pop_breached("6758.T", 500)) == {(sony, AlertKind.STOP_LOSS)}
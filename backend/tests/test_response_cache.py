@@ -0,0 +1,41 @@
+TRADE = {"ticker_symbol": "7203", "trade_type": "BUY", "quantity": 100, "price": 1000, "total_amount": 100000}
+
+
+def test_unchanged_view_is_a_304(client):
+    first = client.get("/api/v1/trades/")
+    assert first.status_code == 200
+    assert first.headers["Vary"] == "Authorization"
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    again = client.get("/api/v1/trades/", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+
+def test_a_write_changes_the_etag_and_the_body(client):
+    before = client.get("/api/v1/trades/")
+    assert before.json() == []
+
+    assert client.post("/api/v1/trades/", json=TRADE).status_code == 200
+
+    after = client.get("/api/v1/trades/", headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert [trade["ticker_symbol"] for trade in after.json()] == ["7203"]
+
+
+def test_etags_are_per_user(client, make_client):
+    other = make_client()
+    mine = client.get("/api/v1/trades/")
+    # Both accounts are at data_version 0; a shared browser sends the first user's ETag
+    theirs = other.get("/api/v1/trades/", headers={"If-None-Match": mine.headers["ETag"]})
+    assert theirs.status_code == 200
+    assert theirs.headers["ETag"] != mine.headers["ETag"]
+
+
+def test_cached_views_are_per_params(client):
+    client.post("/api/v1/trades/", json=TRADE)
+    full = client.get("/api/v1/trades/").json()
+    summary = client.get("/api/v1/trades/", params={"view": "summary"}).json()
+    assert "rationale" in full[0]
+    assert "rationale" not in summary[0]
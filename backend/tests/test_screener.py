@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.config import settings
+from app.schemas.stock import ScreenerRequest
+from app.services import screener_service
+from app.services.screener_service import ScreenerService
+
+DAYS = pd.bdate_range(end="2025-06-06", periods=120)
+
+
+def _frame(close, volume=None):
+    close = np.asarray(close, dtype=float)
+    volume = np.full(len(close), 1000.0) if volume is None else np.asarray(volume, dtype=float)
+    return pd.DataFrame({"Close": close, "Volume": volume}, index=DAYS[-len(close):])
+
+
+UP_VOLUME = np.full(120, 1000.0)
+UP_VOLUME[-1] = 3000.0
+FRAMES = {
+    "1111.T": _frame(100 + np.arange(120), UP_VOLUME),  # rising every day, volume spike today
+    "2222.T": _frame(300 - np.arange(120)),  # falling every day
+    "3333.T": _frame(200 + 2 * (np.arange(120) % 2)),  # zigzag, RSI 50
+    "4444.T": _frame(100 + np.arange(50)),  # listed too recently for SMA75
+}
+VALUATIONS = {
+    "1111.T": {"per": 12.0, "pbr": 0.9, "dividend_yield": 3.5},
+    "2222.T": {"per": 30.0, "pbr": 2.5, "dividend_yield": 1.0},
+    "3333.T": {"per": None, "pbr": 1.1, "dividend_yield": 2.0},
+}
+TICKERS = ["1111", "2222", "3333", "4444", "5555"]
+
+
+@pytest.fixture(autouse=True)
+def provider(monkeypatch):
+    """Batch history from FRAMES (5555 is unknown upstream); fundamentals from VALUATIONS."""
+    fetched = []
+    monkeypatch.setattr(settings, "BAR_CACHE_DIR", None)
+    monkeypatch.setattr(
+        screener_service, "get_history_batch",
+        lambda symbols, period: {s: FRAMES[s] for s in symbols if s in FRAMES},
+    )
+
+    def fundamentals(symbols):
+        fetched.append(list(symbols))
+        return {s: VALUATIONS.get(s, {}) for s in symbols}
+
+    monkeypatch.setattr(screener_service, "_fundamentals", fundamentals)
+    return fetched
+
+
+def _screen(**criteria):
+    return ScreenerService.screen(ScreenerRequest(tickers=TICKERS, **criteria))
+
+
+def _codes(result):
+    return [row["ticker_symbol"] for row in result["results"]]
+
+
+def test_symbols_without_enough_history_are_missing():
+    result = _screen()
+    assert result["screened"] == 3
+    assert result["missing"] == ["4444", "5555"]
+    assert sorted(_codes(result)) == ["1111", "2222", "3333"]
+
+
+def test_indicators():
+    rows = {row["ticker_symbol"]: row for row in _screen()["results"]}
+    up = rows["1111"]
+    assert up["price"] == 219
+    assert up["sma25"] == pytest.approx(207)
+    assert up["sma75"] == pytest.approx(182)
+    assert up["change_pct"] == pytest.approx(100 / 218, abs=1e-4)
+    assert up["trend"] == "Up" and up["weekly_trend"] == "Up"
+    assert up["rsi"] == 100
+    assert up["volume_ratio"] == pytest.approx(3000 / 1400, abs=1e-4)
+    assert rows["2222"]["trend"] == "Down" and rows["2222"]["rsi"] == 0
+    assert rows["3333"]["rsi"] == pytest.approx(50)
+
+
+def test_technical_filters():
+    assert sorted(_codes(_screen(above_sma25=True))) == ["1111", "3333"]
+    assert _codes(_screen(above_sma25=False)) == ["2222"]
+    assert _codes(_screen(above_sma25=True, rsi_min=70)) == ["1111"]
+    assert _codes(_screen(above_sma13w=False)) == ["2222"]
+    assert sorted(_codes(_screen(rsi_min=40, rsi_max=60))) == ["3333"]
+    assert _codes(_screen(volume_ratio_min=1.5)) == ["1111"]
+
+
+def test_fundamentals_only_for_technical_matches(provider):
+    result = _screen(above_sma25=True, per_max=20)
+    # 3333 passes the trend filter but has no PER
+    assert _codes(result) == ["1111"]
+    assert [sorted(symbols) for symbols in provider] == [["1111.T", "3333.T"]]
+
+    provider.clear()
+    _screen(rsi_max=60)
+    assert provider == []
+
+
+def test_valuation_filters():
+    assert sorted(_codes(_screen(pbr_max=1.5))) == ["1111", "3333"]
+    assert sorted(_codes(_screen(dividend_yield_min=2.0))) == ["1111", "3333"]
+
+
+def test_sort_puts_missing_values_last_and_limit_keeps_the_count():
+    assert _codes(_screen(sort_by="per", descending=False)) == ["1111", "2222", "3333"]
+    assert _codes(_screen(sort_by="per", descending=True)) == ["2222", "1111", "3333"]
+
+    result = _screen(sort_by="rsi", limit=1)
+    assert _codes(result) == ["1111"]
+    assert result["matched"] == 3
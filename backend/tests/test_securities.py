@@ -0,0 +1,93 @@
+import pytest
+
+from app.services.securities import SecurityEntry, SecurityIndex, normalize_ticker, parse_securities_csv, upstream_symbol
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SecurityIndex([
+        SecurityEntry("7203", "トヨタ自動車", "トヨタジドウシャ", "プライム", "自動車・輸送機", "輸送用機器", 100),
+        SecurityEntry("7267", "本田技研工業", "ホンダギケンコウギョウ", "プライム", "自動車・輸送機", "輸送用機器", 100),
+        SecurityEntry("7201", "日産自動車", None, "プライム", "自動車・輸送機", "輸送用機器", 100),
+        SecurityEntry("130A", "Ｖｅｒｉｔａｓ　Ｉｎ　Ｓｉｌｉｃｏ", None, "グロース", "医薬品", "医薬品", 100),
+        SecurityEntry("8306", "三菱ＵＦＪフィナンシャル・グループ", None, "プライム", "銀行", "銀行業", 100),
+    ])
+
+
+def _codes(results):
+    return [security.code for security in results]
+
+
+def test_code_prefix(index):
+    assert _codes(index.search("72")) == ["7201", "7203", "7267"]
+    assert _codes(index.search("7203.T")) == ["7203"]
+
+
+def test_code_matches_rank_before_names(index):
+    # "1" is a code prefix of 130A only; names are not searched past the limit
+    assert _codes(index.search("130a", limit=1)) == ["130A"]
+
+
+def test_name_prefix_and_substring(index):
+    assert _codes(index.search("トヨタ")) == ["7203"]
+    # Substring: suffixes of 日産自動車 and トヨタ自動車
+    assert sorted(_codes(index.search("自動車"))) == ["7201", "7203"]
+
+
+def test_kana_and_width_folding(index):
+    assert _codes(index.search("とよた")) == ["7203"]
+    assert _codes(index.search("ほんだ")) == ["7267"]
+    assert _codes(index.search("ver")) == ["130A"]
+    assert _codes(index.search("UFJ")) == ["8306"]
+
+
+def test_limit_and_empty_queries(index):
+    assert len(index.search("7", limit=2)) == 2
+    assert index.search("   ") == []
+    assert index.search("zz") == []
+
+
+def test_get_normalizes(index):
+    assert index.get("7203.t").name == "トヨタ自動車"
+    assert index.get("9999") is None
+
+
+def test_parse_tse_listing_csv():
+    raw = (
+        "日付,コード,銘柄名,市場・商品区分,33業種コード,33業種区分,17業種コード,17業種区分,規模コード,規模区分\n"
+        "20241031,7203,トヨタ自動車,プライム（内国株式）,3700,輸送用機器,6,自動車・輸送機,1,TOPIX Core30\n"
+        "20241031,130A,Ｖｅｒｉｔａｓ　Ｉｎ　Ｓｉｌｉｃｏ,グロース（内国株式）,3250,医薬品,5,医薬品,-,-\n"
+        "20241031,,名前だけ,,,,,,,\n"
+    ).encode("cp932")
+    rows = parse_securities_csv(raw)
+    assert [row["code"] for row in rows] == ["7203", "130A"]
+    assert rows[0]["industry"] == "輸送用機器"
+    assert rows[0]["sector"] == "自動車・輸送機"
+    assert rows[0]["lot_size"] == 100
+
+
+def test_ticker_normalization():
+    assert normalize_ticker(" 7203.t ") == "7203"
+    assert [upstream_symbol(s) for s in ("7203", "130a", "^N225", "USDJPY=X")] == ["7203.T", "130A.T", "^N225", "USDJPY=X"]
+
+
+def test_index_is_rebuilt_when_the_table_changes(db, monkeypatch):
+    from app.models.security import Security
+    from app.services import securities
+    from app.services.securities import SecurityService
+
+    monkeypatch.setattr(securities, "_index", None)
+    monkeypatch.setattr(securities, "_version", None)
+    assert SecurityService.refresh_if_stale(db)
+    assert not SecurityService.refresh_if_stale(db)
+
+    # Loaded elsewhere (another worker's CSV upload)
+    db.add(Security(code="999A", name="テスト銘柄"))
+    db.flush()
+    assert SecurityService.refresh_if_stale(db)
+    assert SecurityService.get_index().get("999A").name == "テスト銘柄"
+
+    db.query(Security).filter(Security.code == "999A").delete()
+    db.flush()
+    assert SecurityService.refresh_if_stale(db)
+    assert SecurityService.get_index().get("999A") is None
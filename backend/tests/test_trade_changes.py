@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.models.trade import Trade
+
+TRADE = {"ticker_symbol": "7203", "trade_type": "BUY", "quantity": 100, "price": 1000, "total_amount": 100000}
+
+
+def _changes(client, since=None):
+    response = client.get("/api/v1/trades/changes", params={"since": since.isoformat()} if since else None)
+    assert response.status_code == 200
+    return response.json()
+
+
+def _backdate(db, trade_id, hours=1):
+    """Push a trade's updated_at back; every write in the test transaction shares one now()."""
+    db.execute(
+        update(Trade).where(Trade.id == trade_id).values(updated_at=Trade.updated_at - timedelta(hours=hours))
+    )
+    db.flush()
+
+
+def test_full_sync_returns_everything_without_tombstones(client):
+    trade = client.post("/api/v1/trades/", json=TRADE).json()
+    doomed = client.post("/api/v1/trades/", json={**TRADE, "ticker_symbol": "6758"}).json()
+    client.delete(f"/api/v1/trades/{doomed['id']}")
+
+    changes = _changes(client)
+
+    assert [t["id"] for t in changes["trades"]] == [trade["id"]]
+    assert changes["deleted"] == []
+    assert changes["watermark"]
+
+
+def test_since_returns_only_rows_changed_after_it(client, db):
+    old = client.post("/api/v1/trades/", json=TRADE).json()
+    _backdate(db, old["id"])
+    new = client.post("/api/v1/trades/", json={**TRADE, "ticker_symbol": "6758"}).json()
+
+    watermark = datetime.fromisoformat(_changes(client)["watermark"])
+    changes = _changes(client, since=watermark - timedelta(minutes=10))
+
+    assert [t["id"] for t in changes["trades"]] == [new["id"]]
+
+
+def test_since_applies_the_overlap(client, db):
+    trade = client.post("/api/v1/trades/", json=TRADE).json()
+    watermark = datetime.fromisoformat(_changes(client)["watermark"])
+    # A row committed just before the previous watermark is re-sent rather than missed
+    _backdate(db, trade["id"], hours=1 / 3600)
+    assert [t["id"] for t in _changes(client, since=watermark)["trades"]] == [trade["id"]]
+
+
+def test_deletions_come_back_as_tombstones(client, db):
+    trade = client.post("/api/v1/trades/", json=TRADE).json()
+    watermark = datetime.fromisoformat(_changes(client)["watermark"])
+    client.delete(f"/api/v1/trades/{trade['id']}")
+
+    changes = _changes(client, since=watermark - timedelta(minutes=10))
+
+    assert changes["trades"] == []
+    assert [(d["entity_type"], d["entity_id"]) for d in changes["deleted"]] == [("trade", trade["id"])]
+
+
+def test_changes_are_per_user(client, make_client):
+    client.post("/api/v1/trades/", json=TRADE)
+    other = make_client()
+    assert _changes(other)["trades"] == []
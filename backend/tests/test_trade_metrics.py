@@ -0,0 +1,129 @@
+import uuid
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.models.metric import FirstTouch
+from app.models.trade import TradeType
+from app.services.trade_metrics_service import EPOCH, TradeMetricsService, _rolling_beta
+
+BENCHMARK = "^N225"
+KEYS = ["7203", BENCHMARK]
+START = (date(2025, 1, 6) - EPOCH).days
+DAYS = np.arange(START, START + 60)
+
+
+def _bars():
+    """The stock moves exactly twice the benchmark every day (beta 2); highs/lows 10 around the close."""
+    rng = np.random.default_rng(7)
+    market = rng.normal(0, 0.01, len(DAYS) - 1)
+    benchmark = 1000 * np.concatenate([[1.0], np.cumprod(1 + market)])
+    stock = 500 * np.concatenate([[1.0], np.cumprod(1 + 2 * market)])
+    close = np.column_stack([stock, benchmark])
+    high = close + 10
+    low = close - 10
+    # A spike and a dip inside the holding window used below (rows 45..50)
+    high[47, 0] = stock[47] + 80
+    low[48, 0] = stock[48] - 60
+    return {"high": high, "low": low, "close": close}
+
+
+def _at(row):
+    return datetime.combine(EPOCH + timedelta(days=int(DAYS[row])), time(10))
+
+
+def _trade(side, entry, exit_price, stop=None, target=None, entered=45, exited=50):
+    return (uuid.uuid4(), uuid.uuid4(), "7203.T", side, entry, stop, target, _at(entered), _at(exited), exit_price)
+
+
+@pytest.fixture(autouse=True)
+def lookback(monkeypatch):
+    monkeypatch.setattr(settings, "BETA_LOOKBACK_DAYS", 30)
+    monkeypatch.setattr(settings, "BETA_MIN_OBSERVATIONS", 20)
+
+
+def _compute(*trades):
+    return TradeMetricsService.compute(list(trades), DAYS, _bars(), KEYS, BENCHMARK)
+
+
+def test_excursions_over_the_holding_window():
+    bars = _bars()
+    entry = float(bars["close"][44, 0])
+    (row,) = _compute(_trade(TradeType.BUY, entry, entry + 20))
+
+    high = bars["high"][45:51, 0].max()
+    low = bars["low"][45:51, 0].min()
+    assert row["bars"] == 6
+    assert row["max_favorable_excursion"] == pytest.approx(high - entry)
+    assert row["max_adverse_excursion"] == pytest.approx(entry - low)
+    assert row["max_favorable_excursion_pct"] == pytest.approx((high - entry) / entry)
+    assert row["capture_ratio"] == pytest.approx(20 / (high - entry))
+
+
+def test_short_excursions_are_mirrored():
+    bars = _bars()
+    entry = float(bars["close"][44, 0])
+    (row,) = _compute(_trade(TradeType.SELL, entry, entry - 20, stop=entry + 50))
+
+    assert row["max_favorable_excursion"] == pytest.approx(entry - bars["low"][45:51, 0].min())
+    assert row["max_adverse_excursion"] == pytest.approx(bars["high"][45:51, 0].max() - entry)
+    assert row["r_multiple"] == pytest.approx(20 / 50)
+
+
+def test_first_touch():
+    bars = _bars()
+    entry = float(bars["close"][44, 0])
+    stop = float(bars["low"][48, 0]) + 1  # only the dip on row 48 reaches it
+    target = float(bars["high"][47, 0])  # reached by the spike on row 47
+
+    stopped, targeted, untouched = _compute(
+        _trade(TradeType.BUY, entry, entry, stop=stop),
+        _trade(TradeType.BUY, entry, entry, stop=stop, target=target),
+        _trade(TradeType.BUY, entry, entry),
+    )
+
+    assert (stopped["first_touch"], stopped["first_touch_on"]) == (FirstTouch.STOP_LOSS, _at(48).date())
+    assert (targeted["first_touch"], targeted["first_touch_on"]) == (FirstTouch.TARGET_PRICE, _at(47).date())
+    assert untouched["first_touch"] is None and untouched["first_touch_on"] is None
+
+
+def test_return_is_split_into_market_and_alpha():
+    bars = _bars()
+    entry = float(bars["close"][44, 0])
+    benchmark_return = bars["close"][50, 1] / bars["close"][44, 1] - 1
+
+    long, short = _compute(
+        _trade(TradeType.BUY, entry, entry * 1.05),
+        _trade(TradeType.SELL, entry, entry * 0.97),
+    )
+
+    for row in (long, short):
+        assert row["beta"] == pytest.approx(2.0)
+        assert row["benchmark_return"] == pytest.approx(benchmark_return)
+    assert long["trade_return"] == pytest.approx(0.05)
+    assert long["market_return"] == pytest.approx(2 * benchmark_return)
+    assert short["trade_return"] == pytest.approx(0.03)
+    assert short["market_return"] == pytest.approx(-2 * benchmark_return)
+    assert short["alpha"] == pytest.approx(0.03 + 2 * benchmark_return)
+
+
+def test_no_attribution_without_enough_history():
+    (row,) = _compute(_trade(TradeType.BUY, 500.0, 510.0, entered=10, exited=12))
+    assert row["beta"] is None and row["alpha"] is None
+    assert row["benchmark_return"] is not None
+    assert row["max_favorable_excursion"] is not None
+
+
+def test_rolling_beta_skips_missing_returns():
+    rng = np.random.default_rng(3)
+    market = rng.normal(0, 0.01, 40)
+    returns = np.column_stack([3 * market, -market])
+    returns[5:10, 0] = np.nan
+
+    beta = _rolling_beta(returns, market, window=20, min_periods=10)
+
+    # Row 12: 13 returns in the second column, 8 in the first (5 missing)
+    assert np.isnan(beta[12, 0]) and beta[12, 1] == pytest.approx(-1.0)
+    np.testing.assert_allclose(beta[20:], [[3.0, -1.0]] * 20)
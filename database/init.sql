@@ -4,6 +4,8 @@
 
 -- 拡張機能の有効化
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+-- 根拠・振り返りテキストの全文検索（トライグラムGINインデックス）
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 -- タイムゾーンの設定
 SET timezone = 'Asia/Tokyo';
@@ -14,6 +14,7 @@ import { logout } from './features/auth/authSlice';
 import LoginPage from './pages/LoginPage';
 import RegisterPage from './pages/RegisterPage';
 import ProtectedRoute from './components/ProtectedRoute';
+import AlertNotifier from './components/AlertNotifier';
 import TradesPage from './pages/TradesPage';
 import PositionsPage from './pages/PositionsPage';
 
@@ -30,6 +31,7 @@ function App() {
     return (
         <>
             <CssBaseline />
+            {isAuthenticated && <AlertNotifier />}
             <AppBar position="static">
                 <Toolbar>
                     <Typography variant="h6" component="div" sx={{ flexGrow: 1 }}>
@@ -0,0 +1,57 @@
+import React, { useEffect, useState } from 'react';
+import { Alert, Snackbar } from '@mui/material';
+import alertService, { TradeAlert } from '../services/alertService';
+
+const KIND_LABELS: Record<TradeAlert['kind'], string> = {
+    STOP_LOSS: '損切りライン',
+    TARGET_PRICE: '目標価格',
+};
+
+// ログイン中に発生した損切り・目標価格アラートを順にスナックバーで通知する
+const AlertNotifier: React.FC = () => {
+    const [queue, setQueue] = useState<TradeAlert[]>([]);
+    const current = queue[0];
+
+    useEffect(() => {
+        const unsubscribe = alertService.subscribe((alert) => {
+            setQueue((prev) => [...prev, alert]);
+        });
+        return unsubscribe;
+    }, []);
+
+    const handleClose = async (_event?: React.SyntheticEvent | Event, reason?: string) => {
+        if (reason === 'clickaway' || !current) {
+            return;
+        }
+        setQueue((prev) => prev.slice(1));
+        try {
+            await alertService.acknowledgeAlert(current.id);
+        } catch (err) {
+            console.error('Failed to acknowledge alert:', err);
+        }
+    };
+
+    if (!current) {
+        return null;
+    }
+
+    return (
+        <Snackbar
+            key={current.id}
+            open
+            anchorOrigin={{ vertical: 'top', horizontal: 'right' }}
+            onClose={handleClose}
+        >
+            <Alert
+                severity={current.kind === 'STOP_LOSS' ? 'warning' : 'success'}
+                onClose={handleClose}
+                sx={{ width: '100%' }}
+            >
+                {current.ticker_symbol}: {KIND_LABELS[current.kind]}（{Number(current.threshold).toLocaleString()}円）に到達しました
+                （現在値 {Number(current.trigger_price).toLocaleString()}円）
+            </Alert>
+        </Snackbar>
+    );
+};
+
+export default AlertNotifier;
@@ -0,0 +1,91 @@
+import apiClient from './api';
+
+export interface TradeAlert {
+    id: string;
+    trade_id: string;
+    ticker_symbol: string;
+    kind: 'STOP_LOSS' | 'TARGET_PRICE';
+    threshold: number;
+    trigger_price: number;
+    triggered_at: string;
+    acknowledged_at?: string;
+}
+
+interface StreamToken {
+    token: string;
+    expires_in: number;
+}
+
+const RECONNECT_DELAY_MS = 5000;
+
+const alertService = {
+    getAlerts: async (unacknowledgedOnly: boolean = false) => {
+        const response = await apiClient.get<TradeAlert[]>('/alerts/', {
+            params: { unacknowledged_only: unacknowledgedOnly }
+        });
+        return response.data;
+    },
+    acknowledgeAlert: async (id: string) => {
+        const response = await apiClient.post<TradeAlert>(`/alerts/${id}/acknowledge`);
+        return response.data;
+    },
+
+    // 新着アラートをSSEで購読する。戻り値の関数で購読を解除
+    // EventSource はAuthorizationヘッダーを送れないため、接続ごとに短命トークンを取得してURLに付ける
+    // トークンは接続時にしか検証されず期限切れになるので、切断時は自動再接続に任せず新しいトークンで繋ぎ直す
+    subscribe: (onAlert: (alert: TradeAlert) => void) => {
+        let source: EventSource | null = null;
+        let timer: ReturnType<typeof setTimeout> | null = null;
+        let since: string | null = null;
+        // 再接続時はサーバーが少し巻き戻して再送するため、id で重複を除く
+        const seen = new Set<string>();
+        let closed = false;
+
+        const reconnect = () => {
+            source?.close();
+            source = null;
+            if (!closed) {
+                timer = setTimeout(connect, RECONNECT_DELAY_MS);
+            }
+        };
+
+        const connect = async () => {
+            let token: string;
+            try {
+                const response = await apiClient.post<StreamToken>('/alerts/stream-token');
+                token = response.data.token;
+            } catch {
+                reconnect();
+                return;
+            }
+            if (closed) {
+                return;
+            }
+            // 初回接続の時刻から後は、切断中に発生したアラートも取りこぼさない
+            since = since ?? new Date().toISOString();
+            const params = new URLSearchParams({ token, since });
+            source = new EventSource(`${apiClient.defaults.baseURL}/alerts/stream?${params}`);
+            source.addEventListener('alert', (event) => {
+                const alert: TradeAlert = JSON.parse((event as MessageEvent).data);
+                if (seen.has(alert.id)) {
+                    return;
+                }
+                seen.add(alert.id);
+                since = alert.triggered_at;
+                onAlert(alert);
+            });
+            source.onerror = reconnect;
+        };
+
+        connect();
+        return () => {
+            closed = true;
+            if (timer) {
+                clearTimeout(timer);
+            }
+            source?.close();
+        };
+    },
+};
+
+export default alertService;